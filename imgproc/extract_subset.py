@@ -34,9 +34,10 @@ from os.path import basename
 from img import (
     FormatOptions, create_geotiff, DEF_GEOTIFF_FOPT,
     Extent, Block, ImageFileReader, Progress, execute,
-    pixel_offset
+    pixel_offset, copy_subsets
 )
-from img.cli import error
+from img.routing import tile_count
+from img.cli import error, warning
 
 def usage():
     """Print a short command usage help."""
@@ -45,9 +46,19 @@ def usage():
         "USAGE: %s <input image> <output TIF> "
         "<offset-x>,<offset-y>,<sizex>,<sizey>" % exename
     )
+    print >>sys.stderr, (
+        "USAGE: %s <input image> @<subset list>|@- [THREADS=<n>] "
+        "[<format options>]" % exename
+    )
     print >>sys.stderr, (
         "EXAMPLE: %s input.tif subset.tif 10,20,200,200" % exename
     )
+    print >>sys.stderr, (
+        "\nThe subset list contains lines of "
+        "'<output TIF> <offset-x>,<offset-y>,<sizex>,<sizey>'."
+        "\nAll listed subsets are extracted in a single read pass."
+        "\nSubsets lying outside of the input image are skipped."
+    )
 
 
 def parse_subset(subset_str):
@@ -59,6 +70,40 @@ def parse_subset(subset_str):
         raise ValueError("Invalid subset specification! %r" % subset_str)
 
 
+def parse_subset_list(fobj):
+    """ Parse list of the (output, subset) pairs. """
+    subsets = []
+    for line in fobj:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            output, subset_str = line.split()
+        except ValueError:
+            raise ValueError("Invalid subset list item! %r" % line)
+        subsets.append((output, parse_subset(subset_str)))
+    return subsets
+
+
+def create_output(img_in, output, subset, options):
+    """ Create output image of the given subset. """
+    # creation parameters
+    param = {
+        'path':   output,
+        'nrow':   subset.size.y,
+        'ncol':   subset.size.x,
+        'nband':  img_in.size.z,
+        'dtype':  img_in.dtype,
+        'nodata': img_in.nodata,
+        'options' : options,
+    }
+    # add translated geo-coding
+    param.update(
+        pixel_offset(img_in.geocoding, (subset.offset.x, subset.offset.y))
+    )
+    return create_geotiff(**param)
+
+
 def process(tile, img_in, img_out, subset):
     """ Process one tile. """
     tile = tile & img_out # clip tile to the image extent
@@ -69,12 +114,24 @@ def process(tile, img_in, img_out, subset):
 
 if __name__ == "__main__":
     FOPTS = FormatOptions(DEF_GEOTIFF_FOPT) # default format options
+    NTHREADS = 4
     try:
         INPUT = sys.argv[1]
-        OUTPUT = sys.argv[2]
-        SUBSET = parse_subset(sys.argv[3])
+        if sys.argv[2].startswith("@"):
+            # multiple subsets
+            LIST = sys.argv[2][1:]
+            OUTPUT, SUBSET = None, None
+            NP = 3
+        else:
+            OUTPUT = sys.argv[2]
+            SUBSET = parse_subset(sys.argv[3])
+            NP = 4
         #anything else treated as a format option
-        FOPTS.set_options(sys.argv[5:])
+        for arg in sys.argv[NP:]:
+            if OUTPUT is None and arg.startswith("THREADS="):
+                NTHREADS = int(arg[len("THREADS="):])
+            else:
+                FOPTS.set_option(arg)
     except IndexError:
         error("Not enough input arguments!")
         usage()
@@ -86,29 +143,42 @@ if __name__ == "__main__":
     # open input image
     IMG_IN = ImageFileReader(INPUT)
 
+    # block size
+    TILE_SIZE = (int(FOPTS["BLOCKXSIZE"]), int(FOPTS["BLOCKYSIZE"]))
+
+    if OUTPUT is None:
+        try:
+            FIN = sys.stdin if LIST == "-" else open(LIST)
+            SUBSETS = parse_subset_list(FIN)
+        except (IOError, ValueError) as exc:
+            error(exc)
+            sys.exit(1)
+
+        # trim the subsets by the input image extent and create the outputs
+        OUTPUTS = []
+        for output, subset in SUBSETS:
+            subset = (subset & IMG_IN).set_z(IMG_IN)
+            if subset.extent <= 0:
+                warning("%s: subset outside of the input image - skipped",
+                        output)
+                continue
+            OUTPUTS.append(
+                (subset, create_output(IMG_IN, output, subset, FOPTS.options))
+            )
+
+        print "Extracting %d image subsets..." % len(OUTPUTS)
+        NTILE = tile_count(IMG_IN, [sub for sub, _ in OUTPUTS], TILE_SIZE)
+        copy_subsets(
+            IMG_IN, OUTPUTS, TILE_SIZE, NTHREADS,
+            progress=Progress(sys.stdout, NTILE) if NTILE > 0 else None,
+        )
+        sys.exit(0)
+
     # trim the subset by the input image extent
     SUBSET = (SUBSET & IMG_IN).set_z(IMG_IN)
 
-    # creation parameters
-    PARAM = {
-        'path':   OUTPUT,
-        'nrow':   SUBSET.size.y,
-        'ncol':   SUBSET.size.x,
-        'nband':  IMG_IN.size.z,
-        'dtype':  IMG_IN.dtype,
-        'nodata': IMG_IN.nodata,
-        'options' : FOPTS.options,
-    }
-    # add translated geo-coding
-    PARAM.update(
-        pixel_offset(IMG_IN.geocoding, (SUBSET.offset.x, SUBSET.offset.y))
-    )
-
     # open output image
-    IMG_OUT = create_geotiff(**PARAM)
-
-    # block size
-    TILE_SIZE = (int(FOPTS["BLOCKXSIZE"]), int(FOPTS["BLOCKYSIZE"]))
+    IMG_OUT = create_output(IMG_IN, OUTPUT, SUBSET, FOPTS.options)
 
     print "Extracting image subset..."
     execute(
@@ -29,10 +29,17 @@
 
 import sys
 import os.path
+from functools import partial
 import img_geom as ig
+import img_stream
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 
 
+def buffer_geometry(geom, bflen):
+    """ Buffer geometry by the given distance. """
+    return ig.bufferGeom(geom, bflen)
+
+
 if __name__ == "__main__":
 
     # TODO: to improve CLI
@@ -40,6 +47,8 @@ if __name__ == "__main__":
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     FORMAT = "WKB"
+    STREAM = False
+    JOBS = 1
 
     try:
         INPUT = sys.argv[1]
@@ -49,6 +58,10 @@ if __name__ == "__main__":
             for arg in sys.argv[NP:]:
                 if arg in ig.OUTPUT_FORMATS:
                     FORMAT = arg # output format
+                elif arg == "STREAM":
+                    STREAM = True # stream of geometries
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2]) # stream worker processes
                 elif arg == "DEBUG":
                     DEBUG = True # dump debugging output
 
@@ -56,9 +69,24 @@ if __name__ == "__main__":
         sys.stderr.write("ERROR: Not enough input arguments!\n")
         sys.stderr.write("\nBuffer geometry and dump new geometry to stdout\n")
         sys.stderr.write("by default in WKB format.\n\n")
-        sys.stderr.write("USAGE: %s <WKB|WKB> <prm.sgm.> [WKT|WKB] [DEBUG]\n"%EXENAME)
+        sys.stderr.write(
+            "USAGE: %s <WKB|WKB> <prm.sgm.> [WKT|WKB] [STREAM [JOBS=<n>]] "
+            "[DEBUG]\n" % EXENAME
+        )
         sys.exit(1)
 
+    if STREAM:
+        # process stream of geometries
+        try:
+            img_stream.run(
+                partial(buffer_geometry, bflen=BFLEN), INPUT, FORMAT, JOBS,
+                DEBUG
+            )
+        except Exception as exc:
+            print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+            sys.exit(1)
+        sys.exit(0)
+
     # open input geometry file
     fin = sys.stdin if INPUT == "-" else open(INPUT)
 
@@ -70,7 +98,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # create the buffer
-    geom = ig.setSR(geom.Buffer(BFLEN), geom.GetSpatialReference())
+    geom = buffer_geometry(geom, BFLEN)
 
     # export
     try:
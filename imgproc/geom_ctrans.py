@@ -31,9 +31,11 @@
 import sys
 import traceback
 import os.path
+from functools import partial
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 from osgeo import osr; osr.UseExceptions() #pylint: disable=multiple-statements
 import img_geom as ig
+import img_stream
 
 #TODO: remove date-line handling moved to the 'geom_to_wgs84.py'
 
@@ -50,7 +52,70 @@ def usage():
     sys.stderr.write("The projection is to be provided as an EPSG code\n")
     sys.stderr.write("(EPSG:4326) or as a WTK string.\n\n")
     sys.stderr.write("USAGE: %s <WKB|WKB> <projection> [DLXFIX] [DLXWRAP] ")
-    sys.stderr.write("[BOUNDS:<xmin>,<ymin>,<xmax>,<ymax>] [WKT|WKB] [DEBUG]\n")
+    sys.stderr.write("[BOUNDS:<xmin>,<ymin>,<xmax>,<ymax>] [WKT|WKB] ")
+    sys.stderr.write("[STREAM [JOBS=<n>]] [DEBUG]\n")
+
+
+def transform_geometry(geom, target_sr, bounds=None, dlxfix=False,
+                       dlxwrap=False):
+    """ Transform geometry to the target spatial reference optionally
+    fixing the date-line wraparound (requires the projection bounds).
+    """
+    # pylint: disable=invalid-name
+    source_sr = geom.GetSpatialReference()
+
+    # 1) geometry either source or target SR is None -> assign the target
+    if (source_sr is None) or (target_sr is None):
+        geom.AssignSpatialReference(target_sr)
+
+    # 2) transform coordinates
+    else:
+
+        # envelope and centroid in the source coordinates
+        x0_min, x0_max, y0_min, y0_max = geom.GetEnvelope()
+        x0_cnt, y0_cnt = 0.5*(x0_min+x0_max), 0.5*(y0_min+y0_max) #centroid
+
+        # coordinate transformation object
+        ctrn = ig.getCTransformation(source_sr, target_sr)
+
+        # perform transformation
+        geom.Transform(ctrn)
+
+        # get envelope and centroid in the target coordinates
+        x1_min, _, _ = ctrn.TransformPoint(x0_min, y0_cnt)
+        x1_max, _, _ = ctrn.TransformPoint(x0_max, y0_cnt)
+        _, y1_min, _ = ctrn.TransformPoint(x0_cnt, y0_min)
+        _, y1_max, _ = ctrn.TransformPoint(x0_cnt, y0_max)
+        x1_cnt, y1_cnt, _ = ctrn.TransformPoint(x0_cnt, y0_cnt)
+
+        # fix the wraparound issues
+
+        if dlxfix: # fix the wild wraparound (unwrap coordinates)
+            # flip axis and projection span
+            xx = 0.5*(x1_min + x1_max)
+            dd = bounds[2] - bounds[0]
+
+            if (x1_cnt < x1_max) and (x1_max < x1_min): # fix needed
+                transform = ig.ArrayTransformer(lambda x, y: (x - dd*(x > xx), y))
+                geom = ig.setSR(transform(geom), geom.GetSpatialReference())
+
+            elif (x1_cnt > x1_min) and (x1_max < x1_min): # fix needed
+                transform = ig.ArrayTransformer(lambda x, y: (x + dd*(x < xx), y))
+                geom = ig.setSR(transform(geom), geom.GetSpatialReference())
+
+        if dlxwrap: # perform proper wrap-around
+            geom = ig.setSR(
+                ig.wrapArroundDateLine(geom, bounds, 1),
+                geom.GetSpatialReference()
+            )
+
+        # fix the overlapping edges
+        if geom.GetGeometryName() == "MULTIPOLYGON":
+            geom = ig.setSR(geom.UnionCascaded(), geom.GetSpatialReference())
+
+        geom = ig.setSR(geom.Buffer(0), geom.GetSpatialReference())
+
+    return geom
 
 
 if __name__ == "__main__":
@@ -61,6 +126,8 @@ if __name__ == "__main__":
     DLXFIX = False  # fix easting wraparroud by providig SR bounds
     DLXWRAP = False  # perform proper easting wraparround
     BOUNDS = None  #  projection bounds -> needed by wraparround handling
+    STREAM = False  # stream of geometries
+    JOBS = 1  # number of the stream worker processes
 
     try:
         INPUT = sys.argv[1]
@@ -77,6 +144,10 @@ if __name__ == "__main__":
                     DLXWRAP = True
                 elif arg.startswith("BOUNDS:"):
                     BOUNDS = [float(v) for v in arg.split(":")[-1].split(",")]
+                elif arg == "STREAM":
+                    STREAM = True
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2])
                 elif arg == "DEBUG":
                     DEBUG = True # dump debuging output
 
@@ -101,6 +172,22 @@ if __name__ == "__main__":
         usage()
         sys.exit(1)
 
+    if STREAM:
+        # process stream of geometries
+        try:
+            img_stream.run(
+                partial(
+                    transform_geometry, target_sr=TARGET_SR, bounds=BOUNDS,
+                    dlxfix=DLXFIX, dlxwrap=DLXWRAP,
+                ), INPUT, FORMAT, JOBS, DEBUG
+            )
+        except Exception as exc:
+            if DEBUG:
+                traceback.print_exc(file=sys.stderr)
+            print >>sys.stderr, "ERROR: %s: %s"%(EXENAME, exc)
+            sys.exit(1)
+        sys.exit(0)
+
     # open and read the input geometry file
     fin = sys.stdin if INPUT == "-" else open(INPUT)
     try:
@@ -112,58 +199,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # re-project geometry
-    SOURCE_SR = geom.GetSpatialReference()
-
-    # 1) geometry either source or target SR is None -> assign the target
-    if (SOURCE_SR is None) or (TARGET_SR is None):
-        geom.AssignSpatialReference(TARGET_SR)
-
-    # 2) transform coordinates
-    else:
-
-        # envelope and centroid in the source coordinates
-        x0_min, x0_max, y0_min, y0_max = geom.GetEnvelope()
-        x0_cnt, y0_cnt = 0.5*(x0_min+x0_max), 0.5*(y0_min+y0_max) #centroid
-
-        # coordinate transformation object
-        ctrn = osr.CoordinateTransformation(SOURCE_SR, TARGET_SR)
-
-        # perform transformation
-        geom.Transform(ctrn)
-
-        # get envelope and centroid in the target coordinates
-        x1_min, _, _ = ctrn.TransformPoint(x0_min, y0_cnt)
-        x1_max, _, _ = ctrn.TransformPoint(x0_max, y0_cnt)
-        _, y1_min, _ = ctrn.TransformPoint(x0_cnt, y0_min)
-        _, y1_max, _ = ctrn.TransformPoint(x0_cnt, y0_max)
-        x1_cnt, y1_cnt, _ = ctrn.TransformPoint(x0_cnt, y0_cnt)
-
-        # fix the wraparound issues
-
-        if DLXFIX: # fix the wild wraparound (unwrap coordinates)
-            # flip axis and projection span
-            xx = 0.5*(x1_min + x1_max)
-            dd = BOUNDS[2] - BOUNDS[0]
-
-            if (x1_cnt < x1_max) and (x1_max < x1_min): # fix needed
-                transform = ig.Transfomer(lambda p: (p[0] - dd*(p[0] > xx), p[1]))
-                geom = ig.setSR(transform(geom), geom.GetSpatialReference())
-
-            elif (x1_cnt > x1_min) and (x1_max < x1_min): # fix needed
-                transform = ig.Transfomer(lambda p: (p[0] + dd*(p[0] < xx), p[1]))
-                geom = ig.setSR(transform(geom), geom.GetSpatialReference())
-
-        if DLXWRAP: # perform proper wrap-around
-            geom = ig.setSR(
-                ig.wrapArroundDateLine(geom, BOUNDS, 1),
-                geom.GetSpatialReference()
-            )
-
-        # fix the overlapping edges
-        if geom.GetGeometryName() == "MULTIPOLYGON":
-            geom = ig.setSR(geom.UnionCascaded(), geom.GetSpatialReference())
-
-        geom = ig.setSR(geom.Buffer(0), geom.GetSpatialReference())
+    geom = transform_geometry(geom, TARGET_SR, BOUNDS, DLXFIX, DLXWRAP)
 
     # export
     try:
@@ -35,6 +35,7 @@ from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 import img_geom as ig
 import utm
 import mgrs
+import mgrs_index
 
 
 def chop2mgrs(geom, utmz):
@@ -42,7 +43,7 @@ def chop2mgrs(geom, utmz):
     # pylint: disable=invalid-name
 
     # convert footprint to utm coordinates
-    geom.TransformTo(ig.OSR_UTM_N[utmz-1])
+    ig.transformTo(geom, ig.OSR_UTM_N[utmz-1])
 
     # get the bounds
     x0, x1, y0, y1 = geom.GetEnvelope()
@@ -63,65 +64,45 @@ def chop2mgrs(geom, utmz):
     return sqids
 
 
-if __name__ == "__main__":
-    EXENAME = basename(sys.argv[0])
-    BUFFER = 0
-    DEBUG = False
-    USE_STDIN = False
-
-    try:
-        INPUT = sys.argv[1]
-        USE_STDIN = (INPUT == "-")
-
-        if len(sys.argv) > 2 and sys.argv[2] == "DEBUG":
-            DEBUG = True
-
-    except IndexError:
-        sys.stderr.write("Not enough input arguments!\n")
-        sys.stderr.write("USAGE: %s <WKT footprint>\n"%EXENAME)
-        sys.exit(1)
-
-    # open input geometry file
-    fin = sys.stdin if INPUT == "-" else open(INPUT)
+def _format_square(sqid, epsg, (x0, y0, x1, y1)):
+    """ Format one line of the square listing. """
+    return "%s\tEPSG:%d\t%d,%d,%d,%d\n" % (sqid, epsg, x0, y0, x1, y1)
 
-    # read the data
-    try:
-        geom = ig.parseGeom(fin.read(), DEBUG)
-    except Exception as exc:
-        print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
-        sys.exit(1)
 
+def cut_to_mgrs_grid(geom, buffer=0, index=None, debug=False):
+    """ List the MGRS 100km squares (square ID, EPSG code and UTM bounds)
+        intersecting the WGS84 geometry. The squares are either looked up
+        in the prebuilt square index (see mgrs_index.py) or the geometry
+        is chopped by the UTM zones extended by the buffer (in km).
+    """
     # checking spatial reference
     # NOTE: The geometry is expected to be projected in WGS84.
     sref = geom.GetSpatialReference()
     if (sref is not None) and (ig.dumpSR(sref) != "EPSG:4326"):
-        print >>sys.stderr, (
-            "ERROR: %s: The input geometry must be projected"\
-            " to WGS84 geographic coordinate system!" % EXENAME
+        raise ValueError(
+            "The input geometry must be projected"
+            " to WGS84 geographic coordinate system!"
         )
-        sys.exit(1)
 
     # wrap-around the geometry to fit the WGS84 bounds
     geom = ig.wrapArroundWGS84(geom)
 
-    # get intersections with the UTM zones
-    #l = []
-    for zone in xrange(1, 61):
-
-        # get the UTM zone polygon with buffer
-        zg = utm.getUTMZoneAsGeom(zone, True, True, BUFFER)
-
-        # wrap it around
-        zg = ig.setSR(ig.wrapArroundWGS84(zg), zg.GetSpatialReference())
+    # query the prebuilt MGRS square index (see mgrs_index.py)
+    if index is not None:
+        index = mgrs_index.MGRSIndex(index)
+        return "".join(
+            _format_square(rec['sqid'], rec['epsg'], rec['utm_bounds'])
+            for rec in index.records[index.geomQuery(geom)]
+        )
 
-        # check intersection
-        if not geom.Intersect(zg):
-            continue
+    lines = []
+    # get intersections with the UTM zones (buffered and wrapped around)
+    for zone, zg in utm.getUTMZoneIndex(True, True, buffer).intersecting(geom):
 
         # get the footprint subset intersecting the UTM zone
         geom_utm = ig.setSR(zg.Intersection(geom), zg.GetSpatialReference())
 
-        if DEBUG:
+        if debug:
             print >>sys.stderr, geom_utm
 
         # get list of MGRS squares
@@ -129,12 +110,55 @@ if __name__ == "__main__":
 
         for sqid in lsq:
             s = mgrs.MGRS(sqid)
-            x0, y0 = s.getCornerSW()
-            x1, y1 = s.getCornerNE()
-            print "%s\tEPSG:%d\t%d,%d,%d,%d" % (sqid, s.epsg, x0, y0, x1, y1)
+            lines.append(
+                _format_square(sqid, s.epsg, s.getCornerSW() + s.getCornerNE())
+            )
 
         #debug print
-        if DEBUG:
+        if debug:
             # convert list of square ID to polygons
             mp = ig.groupPolygons(mgrs.MGRS(s).asPolygonWGS84() for s in lsq)
             print >>sys.stderr, mp
+
+    return "".join(lines)
+
+
+if __name__ == "__main__":
+    EXENAME = basename(sys.argv[0])
+    BUFFER = 0
+    DEBUG = False
+    USE_STDIN = False
+    INDEX = None
+
+    try:
+        INPUT = sys.argv[1]
+        USE_STDIN = (INPUT == "-")
+
+        for arg in sys.argv[2:]:
+            if arg == "DEBUG":
+                DEBUG = True
+            elif arg.startswith("INDEX:"):
+                INDEX = arg[len("INDEX:"):] # prebuilt MGRS square index
+
+    except IndexError:
+        sys.stderr.write("Not enough input arguments!\n")
+        sys.stderr.write(
+            "USAGE: %s <WKT footprint> [INDEX:<MGRS index>] [DEBUG]\n"%EXENAME
+        )
+        sys.exit(1)
+
+    # open input geometry file
+    fin = sys.stdin if INPUT == "-" else open(INPUT)
+
+    # read the data
+    try:
+        geom = ig.parseGeom(fin.read(), DEBUG)
+    except Exception as exc:
+        print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+        sys.exit(1)
+
+    try:
+        sys.stdout.write(cut_to_mgrs_grid(geom, BUFFER, INDEX, DEBUG))
+    except Exception as exc:
+        print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+        sys.exit(1)
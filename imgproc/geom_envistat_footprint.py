@@ -5,15 +5,26 @@
 import sys
 import traceback
 import os.path
-from osgeo import gdal; gdal.UseExceptions() #pylint: disable=multiple-statements
-from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 import img_geom as ig
+from img_wkb import FlatGeometry
+from img_stream import dump_geometry
+from img import load_gcp_grid
 
 WGS84_SR = ig.parseSR("EPSG:4326")
 
 
 def usage():
-    print >>sys.stderr, "USAGE: %s <.N1> [WKT|WKB] [DEBUG]"
+    print >>sys.stderr, (
+        "USAGE: %s <.N1> [<.N1> ...] [WKT|WKB] [DENSIFY=<n>] [DEBUG]" % EXENAME
+    )
+
+
+def get_footprint(grid, densify=1):
+    """ Get footprint polygon of the GCP grid. """
+    ring = grid.boundary(densify)
+    return ig.flatToGeom(
+        FlatGeometry("POLYGON", ring, [0, len(ring)], [0, 1]), WGS84_SR
+    )
 
 
 if __name__ == "__main__":
@@ -21,9 +32,11 @@ if __name__ == "__main__":
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     FORMAT = "WKB"
+    DENSIFY = 1
+    INPUTS = []
 
     try:
-        INPUT = sys.argv[1]
+        INPUTS.append(sys.argv[1])
         NP = 2
         if len(sys.argv) > NP:
             for arg in sys.argv[NP:]:
@@ -31,6 +44,12 @@ if __name__ == "__main__":
                     FORMAT = arg # output format
                 elif arg == "DEBUG":
                     DEBUG = True # dump debuging output
+                elif arg.startswith("DENSIFY=") or arg.startswith("DENSIFY:"):
+                    DENSIFY = int(arg[8:]) # boundary segments per GCP
+                    if DENSIFY < 1:
+                        raise ValueError("Invalid densification %s!" % DENSIFY)
+                else:
+                    INPUTS.append(arg) # next input product
 
     except IndexError:
         print >>sys.stderr, "ERROR: %s: Not enough input arguments!" % EXENAME
@@ -43,50 +62,15 @@ if __name__ == "__main__":
         sys.exit(1)
 
 
-    try:
-        ds = gdal.Open(INPUT)
-        gcps = [(p.GCPLine, p.GCPPixel, p.GCPX, p.GCPY) for p in ds.GetGCPs()]
-
-        row0, row1 = [], []
-        col0, col1 = [], []
-
-        if len(gcps) == 0:
-            raise ValueError("Source image has not GCP!")
+    STATUS = 0
+    for INPUT in INPUTS:
+        try:
+            GRID, _ = load_gcp_grid(INPUT)
+            sys.stdout.write(dump_geometry(get_footprint(GRID, DENSIFY), FORMAT))
+        except Exception as exc:
+            if DEBUG:
+                traceback.print_exc(file=sys.stderr)
+            print >>sys.stderr, "ERROR: %s: %s: %s" % (EXENAME, INPUT, exc)
+            STATUS = 1
 
-        # get the grid dimension
-        nc = 0
-        for gcp in gcps:
-            if gcp[0] < 1:
-                nc += 1
-            else:
-                break
-        nr = len(gcps) / nc
-
-        # collect points
-        xy = []
-        for i in xrange(nr-1):
-            xy.append(gcps[i*nc][2:4])
-        for i in xrange(nc-1):
-            xy.append(gcps[i+(nr-1)*nc][2:4])
-        for i in xrange(nr-1):
-            xy.append(gcps[(nr-i)*nc-1][2:4])
-        for i in xrange(nc-1):
-            xy.append(gcps[nc-i-1][2:4])
-        xy.append(xy[0])
-
-        # create polygon geometry
-        lr = ogr.Geometry(ogr.wkbLinearRing)
-        for p in xy:
-            lr.AddPoint_2D(*p)
-        geom = ogr.Geometry(ogr.wkbPolygon)
-        geom.AddGeometry(lr)
-        geom.AssignSpatialReference(WGS84_SR)
-
-        # export
-        sys.stdout.write(ig.dumpGeom(geom, FORMAT))
-
-    except Exception as exc:
-        if DEBUG:
-            traceback.print_exc(file=sys.stderr)
-        print >>sys.stderr, "ERROR: %s: %s"%(EXENAME, exc)
-        sys.exit(1)
+    sys.exit(STATUS)
@@ -30,16 +30,28 @@
 
 import sys
 import os.path
+from functools import partial
 import img_geom as ig
+import img_stream
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 
 
+def geometry_info(geom, action="ALL", debug=False):
+    """ Get information about geometry as a printable string. """
+    lines = []
+    if action in ("SRS", "ALL"):
+        lines.append(ig.dumpSR(geom.GetSpatialReference(), "", debug))
+    return "".join("%s\n" % line for line in lines)
+
+
 if __name__ == "__main__":
     # TODO: to improve CLI
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     ACTION = "ALL"
     ACTIONS = ("ALL", "SRS")
+    STREAM = False
+    JOBS = 1
 
     try:
         INPUT = sys.argv[1]
@@ -50,13 +62,32 @@ if __name__ == "__main__":
                     DEBUG = True # dump debuging output
                 elif arg in ACTIONS:
                     ACTION = arg
+                elif arg == "STREAM":
+                    STREAM = True # stream of geometries
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2]) # stream worker processes
 
     except IndexError:
         print >>sys.stderr, "ERROR: Not enough input arguments!"
         print >>sys.stderr, "\nPrint information about geometry.\n"
-        print >>sys.stderr, "USAGE: %s <WKB|WKB> [ALL|SRS ...] [DEBUG]" % EXENAME
+        print >>sys.stderr, (
+            "USAGE: %s <WKB|WKB> [ALL|SRS ...] [STREAM [JOBS=<n>]] [DEBUG]"
+            % EXENAME
+        )
         sys.exit(1)
 
+    if STREAM:
+        # process stream of geometries
+        try:
+            img_stream.run(
+                partial(geometry_info, action=ACTION, debug=DEBUG),
+                INPUT, jobs=JOBS, debug=DEBUG
+            )
+        except Exception as exc:
+            print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+            sys.exit(1)
+        sys.exit(0)
+
     # open and read input geometry file
     fin = sys.stdin if INPUT == "-" else open(INPUT)
     try:
@@ -66,5 +97,4 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # print geometry info
-    if ACTION in ("SRS", "ALL"):
-        print ig.dumpSR(geom.GetSpatialReference(), "", DEBUG)
+    sys.stdout.write(geometry_info(geom, ACTION, DEBUG))
@@ -34,6 +34,40 @@ import img_geom as ig
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 
 
+def intersect_geometries(geoms):
+    """ Intersect list of geometries.
+
+    The geometries are intersected in order of their increasing envelope
+    area. Before each exact intersection the envelopes are checked for
+    overlap and the operand is clipped to the envelope of the running result.
+    The intersection stops as soon as the result is empty.
+    """
+    def _area((xmin, xmax, ymin, ymax)):
+        return (xmax - xmin) * (ymax - ymin)
+
+    items = sorted(
+        ((geom.GetEnvelope(), geom) for geom in geoms),
+        key=lambda item: _area(item[0])
+    )
+
+    # overlap of all envelopes
+    envelope = items[0][0]
+    for item_envelope, _ in items[1:]:
+        envelope = ig.envelopeIntersection(envelope, item_envelope)
+        if envelope is None:
+            return ogr.Geometry(ogr.wkbPolygon)
+
+    geom = items[0][1]
+    for _, gsrc in items[1:]:
+        envelope = ig.envelopeIntersection(geom.GetEnvelope(), envelope)
+        if envelope is None:
+            return ogr.Geometry(ogr.wkbPolygon)
+        geom = geom.Intersection(ig.clipToEnvelope(gsrc, envelope))
+        if geom.IsEmpty():
+            break
+    return geom
+
+
 if __name__ == "__main__":
     # TODO: to improve CLI
     EXENAME = os.path.basename(sys.argv[0])
@@ -44,7 +78,7 @@ if __name__ == "__main__":
 
     for arg in sys.argv[1:]:
         # handle reserved keywords
-        if arg in ("WKT", "WKB", "JSON", "KML", "DEBUG", "HELP"):
+        if arg in ("WKT", "WKB", "TWKB", "JSON", "KML", "DEBUG", "HELP"):
             if arg in ig.OUTPUT_FORMATS:
                 FORMAT = arg # output format
             elif arg == "DEBUG":
@@ -61,8 +95,7 @@ if __name__ == "__main__":
         print >>sys.stderr, "USAGE: %s <WKB|WKB> ... [WKT|WKB] [HELP] [DEBUG]" % EXENAME
         sys.exit(1)
 
-    # start with an empty polygon
-    geom = None
+    geoms = []
     sref = None
     for i, INPUT in enumerate(INPUTS):
         if DEBUG:
@@ -79,8 +112,10 @@ if __name__ == "__main__":
         if (sref is None) and (gsrc.GetSpatialReference() is not None):
             sref = gsrc.GetSpatialReference().Clone()
 
-        # intersect geometries
-        geom = gsrc if (geom is None) else geom.Intersection(gsrc)
+        geoms.append(gsrc)
+
+    # intersect geometries
+    geom = intersect_geometries(geoms)
 
     # assign spatial reference
     geom.AssignSpatialReference(sref)
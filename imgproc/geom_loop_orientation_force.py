@@ -30,63 +30,28 @@
 
 import sys
 import os.path
+from functools import partial
 import img_geom as ig
+import img_stream
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 
 
 def force_winding(geometry, is_cw, level=0, inner_loop=False):
     """ For given Geometry change winding of the coordinate loops."""
-    # pylint: disable=invalid-name
-    geometry_name = geometry.GetGeometryName()
-    if geometry_name == "LINEARRING":
+    # pylint: disable=unused-argument
+    if geometry.GetGeometryName() == "LINEARRING":
         if inner_loop: # reversed ordering for inner loop
             is_cw = not is_cw
+        polygon = ogr.Geometry(ogr.wkbPolygon)
+        polygon.AddGeometry(geometry)
+        return ig.forceWinding(polygon, is_cw).GetGeometryRef(0).Clone()
 
-        xy = [geometry.GetPoint_2D(0)]
-        area = 0.0
-        for idx in xrange(1, geometry.GetPointCount()):
-            x0, y0 = xy[-1]
-            x1, y1 = geometry.GetPoint_2D(idx)
-            xy.append((x1, y1))
-            area += x0*y1 - x1*y0
+    return ig.forceWinding(geometry, is_cw)
 
-        if (is_cw and area > 0) or (not is_cw and area < 0):
-            # change orientations (point's order)
-            output_geometry = ogr.Geometry(ogr.wkbLinearRing)
-            for x, y in reversed(xy):
-                output_geometry.AddPoint_2D(x, y)
 
-        else:
-            # nothing is to be changed
-            output_geometry = geometry.clone()
-
-    elif geometry_name == "POLYGON":
-        output_geometry = ogr.Geometry(ogr.wkbPolygon)
-        inner_loop = False
-        for idx in xrange(geometry.GetGeometryCount()):
-            output_geometry.AddGeometry(force_winding(
-                geometry.GetGeometryRef(idx), is_cw, level+1, inner_loop
-            ))
-            inner_loop = True
-
-    elif geometry_name == "MULTIPOLYGON":
-        output_geometry = ogr.Geometry(ogr.wkbMultiPolygon)
-        for idx in xrange(geometry.GetGeometryCount()):
-            output_geometry.AddGeometry(force_winding(
-                geometry.GetGeometryRef(idx), is_cw, level+1
-            ))
-
-    elif geometry_name == "GEOMETRYCOLLECTION":
-        output_geometry = ogr.Geometry(ogr.wkbGeometryCollection)
-        for idx in xrange(geometry.GetGeometryCount()):
-            output_geometry.AddGeometry(force_winding(
-                geometry.GetGeometryRef(idx), is_cw, level+1
-            ))
-
-    else:
-        output_geometry = geometry.Clone()
-
-    return output_geometry
+def _force_winding(geom, is_cw):
+    """ Force winding and keep the spatial reference. """
+    return ig.setSR(force_winding(geom, is_cw), geom.GetSpatialReference())
 
 
 if __name__ == "__main__":
@@ -95,6 +60,8 @@ if __name__ == "__main__":
     DEBUG = False
     IS_CW = False
     FORMAT = "WKB"
+    STREAM = False
+    JOBS = 1
 
     try:
         INPUT = sys.argv[1]
@@ -110,18 +77,36 @@ if __name__ == "__main__":
                     ORIENT = "CW"
                 elif arg == "CCW":
                     ORIENT = "CCW"
+                elif arg in ("STREAM", "BATCH"):
+                    STREAM = True # stream of geometries
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2]) # stream worker processes
         IS_CW = ORIENT == "CW"
 
     except IndexError:
         print >>sys.stderr, "ERROR: Not enough input arguments!"
         print >>sys.stderr, "\nForce linear ring orientation."
-        print >>sys.stderr, "USAGE: %s <WKT|WKB> CW|CCW [WKT|WKB][DEBUG]" % EXENAME
+        print >>sys.stderr, (
+            "USAGE: %s <WKT|WKB> CW|CCW [WKT|WKB] [STREAM|BATCH [JOBS=<n>]] "
+            "[DEBUG]" % EXENAME
+        )
         sys.exit(1)
 
+    if STREAM:
+        # process stream of geometries
+        try:
+            img_stream.run(
+                partial(_force_winding, is_cw=IS_CW),
+                INPUT, FORMAT, JOBS, DEBUG
+            )
+        except Exception as exc:
+            print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+            sys.exit(1)
+        sys.exit(0)
+
     try:
         fin = sys.stdin if INPUT == "-" else open(INPUT)
-        geom = ig.parseGeom(fin.read(), DEBUG)
-        geom = ig.setSR(force_winding(geom, IS_CW), geom.GetSpatialReference())
+        geom = _force_winding(ig.parseGeom(fin.read(), DEBUG), IS_CW)
         sys.stdout.write(ig.dumpGeom(geom, FORMAT))
 
     except Exception as exc:
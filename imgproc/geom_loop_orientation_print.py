@@ -30,44 +30,67 @@
 
 import sys
 import os.path
+from cStringIO import StringIO
+import numpy as np
 import img_geom as ig
+import img_rings
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 
 
-def dump_winding(geometry, level=0, inner_loop=False):
-    """ For a given Geometry print winding of the linear rings."""
+def _winding(area):
+    """ Get winding label for the given signed area. """
+    if area < 0:
+        return "CW"
+    elif area > 0:
+        return "CCW"
+    elif area == 0:
+        return "0"
+    else:
+        return "INVALID"
+
+
+def dump_winding(geometry, level=0, inner_loop=False, fout=None):
+    """ For a given Geometry print winding of the linear rings
+    (by default to the standard output).
+    """
     # pylint: disable=invalid-name
+    fout = sys.stdout if fout is None else fout
 
     geometry_name = geometry.GetGeometryName()
     if geometry_name == "LINEARRING":
-        area = 0.0
-        for i in xrange(geometry.GetPointCount()-1):
-            x0, y0 = geometry.GetPoint_2D(i)
-            x1, y1 = geometry.GetPoint_2D(i+1)
-            area += x0*y1 - x1*y0
-        if area < 0:
-            result = "CW"
-        elif area > 0:
-            result = "CCW"
-        elif area == 0:
-            result = "0"
-        else:
-            result = "INVALID"
-        print "%s%s(%s) %s" % (
-            "  "*level, geometry_name, ("O", "I")[inner_loop], result
+        points = geometry.GetPoints() # None for an empty ring
+        area = img_rings.signed_area(np.array(points)) if points else 0.0
+        print >>fout, "%s%s(%s) %s" % (
+            "  "*level, geometry_name, ("O", "I")[inner_loop], _winding(area)
         )
 
-    elif geometry_name == "POLYGON":
-        print "  "*level, geometry_name
-        inner_loop = False
-        for i in xrange(geometry.GetGeometryCount()):
-            dump_winding(geometry.GetGeometryRef(i), level+1, inner_loop)
-            inner_loop = True
+    elif geometry_name in ("POLYGON", "MULTIPOLYGON"):
+        # signed areas of all rings calculated at once
+        flat = ig.geomToFlat(geometry)
+        areas = img_rings.signed_areas(flat.coords, flat.ring_offsets)
+        if geometry_name == "MULTIPOLYGON":
+            print >>fout, "  "*level, geometry_name
+            level += 1
+        for part in xrange(flat.part_count):
+            print >>fout, "  "*level, "POLYGON"
+            first = flat.part_offsets[part]
+            for ring in xrange(first, flat.part_offsets[part+1]):
+                print >>fout, "%s%s(%s) %s" % (
+                    "  "*(level+1), "LINEARRING", ("O", "I")[ring > first],
+                    _winding(areas[ring])
+                )
 
-    elif geometry_name in ("MULTIPOLYGON", "GEOMETRYCOLLECTION"):
-        print "  "*level, geometry_name
+    elif geometry_name == "GEOMETRYCOLLECTION":
+        print >>fout, "  "*level, geometry_name
         for i in xrange(geometry.GetGeometryCount()):
-            dump_winding(geometry.GetGeometryRef(i), level+1)
+            dump_winding(geometry.GetGeometryRef(i), level+1, fout=fout)
+
+
+def winding_info(geometry):
+    """ Get winding of the linear rings as a printable string. """
+    fout = StringIO()
+    dump_winding(geometry, fout=fout)
+    return fout.getvalue()
 
 
 if __name__ == "__main__":
@@ -30,15 +30,25 @@
 
 import sys
 import os.path
+from functools import partial
 import img_geom as ig
+import img_stream
 from osgeo import ogr; ogr.UseExceptions() # pylint: disable=multiple-statements
 
 
+def segmentize_geometry(geom, sglen):
+    """ Segmentize geometry to segments not longer than the given length. """
+    geom.Segmentize(sglen)
+    return geom
+
+
 if __name__ == "__main__":
     # TODO: to improve CLI
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     FORMAT = "WKB"
+    STREAM = False
+    JOBS = 1
 
     try:
         INPUT = sys.argv[1]
@@ -48,6 +58,10 @@ if __name__ == "__main__":
             for arg in sys.argv[NP:]:
                 if arg in ig.OUTPUT_FORMATS:
                     FORMAT = arg # output format
+                elif arg == "STREAM":
+                    STREAM = True # stream of geometries
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2]) # stream worker processes
                 elif arg == "DEBUG":
                     DEBUG = True # dump debuging output
 
@@ -55,16 +69,27 @@ if __name__ == "__main__":
         print >>sys.stderr, "ERROR: Not enough input arguments!"
         print >>sys.stderr, "\nSegmentize geometry and dump new geometry to stdout"
         print >>sys.stderr, "by default in WKB format.\n"
-        print >>sys.stderr, "USAGE: %s <WKB|WKB> <prm.sgm.> [WKT|WKB] [DEBUG]" % EXENAME
+        print >>sys.stderr, (
+            "USAGE: %s <WKB|WKB> <prm.sgm.> [WKT|WKB] [STREAM [JOBS=<n>]] "
+            "[DEBUG]" % EXENAME
+        )
         sys.exit(1)
 
     try:
+        if STREAM:
+            # process stream of geometries
+            img_stream.run(
+                partial(segmentize_geometry, sglen=SGLEN), INPUT, FORMAT, JOBS,
+                DEBUG
+            )
+            sys.exit(0)
+
         # load geometry
         fin = sys.stdin if INPUT == "-" else open(INPUT)
         geom = ig.parseGeom(fin.read(), DEBUG)
 
-        # simplify geometry
-        geom.Segmentize(SGLEN)
+        # segmentize geometry
+        geom = segmentize_geometry(geom, SGLEN)
 
         # dump new geometry
         sys.stdout.write(ig.dumpGeom(geom, FORMAT))
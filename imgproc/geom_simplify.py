@@ -30,13 +30,17 @@
 
 import sys
 import os.path
+from functools import partial
 import img_geom as ig
+import img_stream
 from osgeo import ogr; ogr.UseExceptions() # pylint: disable=multiple-statements
 
 
-def simplify_geometry(src_geom, gslen):
-    """ Recursively simplify complex 2D geometry (linear-ring, polygon or
-    multi-polygon).
+def simplify_geometry(src_geom, gslen, preserve_topology=False):
+    """ Simplify complex 2D geometry (linear-ring, polygon or multi-polygon).
+    All rings are simplified in one batch by the vectorised Douglas-Peucker
+    algorithm, optionally preserving the topology of the rings. Without
+    the topology preservation the result is repaired to a valid geometry.
     """
     # NOTE: The Geometry.GetGeometryType() method is not reliable.
     # To get the true geometry type always use string names returned
@@ -47,98 +51,46 @@ def simplify_geometry(src_geom, gslen):
         # note simplification works on polygons only
         polygon = ogr.Geometry(ogr.wkbPolygon)
         polygon.AddGeometry(src_geom)
-        geom_simplified = polygon.Simplify(gslen)
+        geom_simplified = simplify_geometry(polygon, gslen, preserve_topology)
 
-        rings = [] # list of simplified rings
+        # the repaired ring may get split to multiple polygons
+        return [
+            #clone to avoid segfaults
+            part.GetGeometryRef(0).Clone()
+            for part in ig.extractPolygons(geom_simplified)
+        ]
 
-        # parse the output and decompose it to linear rings
-        if geom_simplified.IsEmpty():
-            pass
+    elif src_geom.GetGeometryName() in ("POLYGON", "MULTIPOLYGON"):
 
-        elif geom_simplified.GetGeometryName() == "POLYGON":
-            rings.append(
-                #clone to avoid segfaults
-                geom_simplified.GetGeometryRef(0).Clone()
-            )
-
-        elif geom_simplified.GetGeometryName() == "MULTIPOLYGON":
-            rings.extend(
-                #clone to avoid segfaults
-                geom_simplified.GetGeometryRef(i).GetGeometryRef(0).Clone()
-                for i in xrange(geom_simplified.GetGeometryCount())
-            )
-
-        else:
-            raise ValueError(
-                "Unexpected simplified geometry type %s! "
-                "Expected POLYGON or MULTIPOLYGON." %
-                geom_simplified.GetGeometryName()
-            )
-
-        return rings
-
-    elif src_geom.GetGeometryName() == "POLYGON":
-
-        polygon = ogr.Geometry(ogr.wkbPolygon)
-
-        for i in xrange(src_geom.GetGeometryCount()):
-            ring = src_geom.GetGeometryRef(i)
-            if ring.GetGeometryName() != "LINEARRING":
-                raise ValueError(
-                    "Unexpected geometry type %s! Expected LINEARRING." %
-                    geom_simplified.GetGeometryName()
-                )
-
-            simplified_rings = simplify_geometry(ring, gslen)
+        geom = ig.simplifyGeom(src_geom, gslen, preserve_topology)
 
-            if i == 0: # first ring is the outer ring
-                if len(simplified_rings) > 1:
-                    raise ValueError(
-                        "Polygon outer ring split into multiple polygons!"
-                    )
+        if geom.IsEmpty():
+            # outer ring got removed -> return empty multi-polygon
+            return ogr.Geometry(ogr.wkbMultiPolygon)
 
-                elif len(simplified_rings) == 0:
-                    # outer ring got removed -> return empty multi-polygon
-                    return ogr.Geometry(ogr.wkbMultiPolygon)
-
-                else:
-                    polygon.AddGeometry(simplified_rings[0])
-
-            else: # inner rings
-                for ring in simplified_rings:
-                    polygon.AddGeometry(ring)
-
-        return polygon
-
-    elif src_geom.GetGeometryName() == "MULTIPOLYGON":
-        multi_polygon = ogr.Geometry(ogr.wkbMultiPolygon)
-        for i in xrange(src_geom.GetGeometryCount()):
-            polygon = src_geom.GetGeometryRef(i)
-            if polygon.GetGeometryName() != "POLYGON":
-                raise ValueError(
-                    "Unexpected geometry type %s! Expected POLYGON." %
-                    geom_simplified.GetGeometryName()
-                )
-
-            # simplify polygon
-            simplified_polygon = simplify_geometry(polygon, gslen)
-
-            # if non-empty add to multi-polygon
-            if not simplified_polygon.IsEmpty():
-                multi_polygon.AddGeometry(simplified_polygon)
-
-        return multi_polygon
+        return geom
 
     else:
         # any other geometry is passed trough unchanged
         return src_geom
 
 
+def simplify(geom, gslen, preserve_topology=False):
+    """ Simplify geometry and keep its spatial reference. """
+    return ig.setSR(
+        simplify_geometry(geom, gslen, preserve_topology),
+        geom.GetSpatialReference()
+    )
+
+
 if __name__ == "__main__":
     # TODO: to improve CLI
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     FORMAT = "WKB"
+    TOPOLOGY = False
+    STREAM = False
+    JOBS = 1
 
     try:
         INPUT = sys.argv[1]
@@ -148,6 +100,12 @@ if __name__ == "__main__":
             for arg in sys.argv[NP:]:
                 if arg in ig.OUTPUT_FORMATS:
                     FORMAT = arg # output format
+                elif arg == "TOPOLOGY":
+                    TOPOLOGY = True # preserve topology
+                elif arg == "STREAM":
+                    STREAM = True # stream of geometries
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2]) # stream worker processes
                 elif arg == "DEBUG":
                     DEBUG = True # dump debuging output
 
@@ -155,9 +113,24 @@ if __name__ == "__main__":
         print >>sys.stderr, "ERROR: Not enough input arguments!"
         print >>sys.stderr, "\nSimplify geometry and dump new geometry to stdout"
         print >>sys.stderr, "by default in WKB format.\n"
-        print >>sys.stderr, "USAGE: %s <WKB|WKB> <prm.simpl.> [WKT|WKB] [DEBUG]" % EXENAME
+        print >>sys.stderr, (
+            "USAGE: %s <WKB|WKB> <prm.simpl.> [WKT|WKB] [TOPOLOGY] "
+            "[STREAM [JOBS=<n>]] [DEBUG]" % EXENAME
+        )
         sys.exit(1)
 
+    if STREAM:
+        # process stream of geometries
+        try:
+            img_stream.run(
+                partial(simplify, gslen=GSLEN, preserve_topology=TOPOLOGY),
+                INPUT, FORMAT, JOBS, DEBUG
+            )
+        except Exception as exc:
+            print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+            sys.exit(1)
+        sys.exit(0)
+
     # open and read input geometry file
     fin = sys.stdin if INPUT == "-" else open(INPUT)
     try:
@@ -167,7 +140,7 @@ if __name__ == "__main__":
         sys.exit(1)
 
     # simplify geometry
-    geom = ig.setSR(simplify_geometry(geom, GSLEN), geom.GetSpatialReference())
+    geom = simplify(geom, GSLEN, TOPOLOGY)
 
     # export
     try:
@@ -32,8 +32,10 @@
 import sys
 from math import ceil, floor
 from os.path import basename
+import numpy as np
 from osgeo import ogr; ogr.UseExceptions() # pylint: disable=multiple-statements
 import img_geom as ig
+import img_rings
 
 # bounds of well known coordinate systems
 
@@ -45,42 +47,16 @@ KNOWN_BOUNDS = {
 def separate(geometry):
     """ Separate polygons with non-overlapping envelopes. """
 
-    def overlap(envelope0, envelope1):
-        """ check if envelopes overlap """
-        return (
-            (envelope0[0] <= envelope1[1]) and (envelope0[1] >= envelope1[0]) and
-            (envelope0[2] <= envelope1[3]) and (envelope0[3] >= envelope1[2])
-        )
-
     if geometry.GetGeometryName() != 'MULTIPOLYGON':
         return [geometry]
 
-    groups = []
     geometries = ig.ungroupMultiPolygon(geometry)
-    envelopes = [item.GetEnvelope() for item in geometries]
-    idx_src = set(i for i in xrange(len(geometries)))
-
-    while idx_src:
-        idx = idx_src.pop()
-        for item in groups: # find
-            if idx in item:
-                group = item
-                groups.remove(item)
-                break
-        else:
-            group = set()
-            group.add(idx)
-
-        for idy in idx_src:
-            if overlap(envelopes[idx], envelopes[idy]):
-                group.add(idy)
-        groups.append(group)
-
+    groups = ig.groupEnvelopes([item.GetEnvelope() for item in geometries])
 
     final_geometries = []
     for group in groups:
         if len(group) == 1:
-            final_geometries.append(geometries[group.pop()].Clone())
+            final_geometries.append(geometries[group[0]].Clone())
         else:
             final_geometries.append(ig.setSR(
                 ig.groupPolygons([geometries[i].Clone() for i in group]),
@@ -123,6 +99,53 @@ def split(geometry, (dx_max, dy_max), (rx, ry), (bx0, by0, bx1, by1)):
     x0, x1, dx, nx = _get_sizes(x0, x1, dx_max, rx, bx0, bx1)
     y0, y1, dy, ny = _get_sizes(y0, y1, dy_max, ry, by0, by1)
 
+    try:
+        cells = _split_cells(geometry, (x0, dx, nx), (y0, dy, ny))
+    except ValueError:
+        cells = _split_cells_ogr(geometry, (x0, dx, nx), (y0, dy, ny))
+
+    for ix, iy, (xxx0, xxx1, yyy0, yyy1) in cells:
+        xxx0, xxx1 = _round(xxx0, xxx1, x0 + ix*dx, rx)
+        yyy0, yyy1 = _round(yyy0, yyy1, y0 + iy*dy, ry)
+        yield xxx0, yyy0, xxx1, yyy1
+
+
+def _split_cells(geometry, (x0, dx, nx), (y0, dy, ny)):
+    """ Cut polygons to the grid cells without OGR calls. The polygons are
+        cut to columns and the columns to cells by the scanline splitting
+        touching only the parts crossing the grid lines.
+        Returns list of (ix, iy, envelope) tuples of the non-empty cells.
+        ValueError is raised for non-polygon geometries.
+    """
+    flat = ig.geomToFlat(geometry)
+    if flat.type not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError("Not a polygon!")
+
+    def _envelope(polygons):
+        coords = np.vstack([rings[0] for rings in polygons])
+        (xmin, ymin), (xmax, ymax) = coords.min(axis=0), coords.max(axis=0)
+        return xmin, xmax, ymin, ymax
+
+    x_cuts = x0 + dx*np.arange(1, nx)
+    y_cuts = y0 + dy*np.arange(1, ny)
+    cells = []
+    columns = img_rings.split_polygons(flat.parts(), x_cuts, axis=0)
+    for ix, column in enumerate(columns):
+        if not column:
+            continue
+        for iy, cell in enumerate(
+                img_rings.split_polygons(column, y_cuts, axis=1)
+            ):
+            if cell:
+                cells.append((ix, iy, _envelope(cell)))
+    return cells
+
+
+def _split_cells_ogr(geometry, (x0, dx, nx), (y0, dy, ny)):
+    """ Cut generic geometry to the grid cells by the OGR intersections.
+        Returns list of (ix, iy, envelope) tuples of the non-empty cells.
+    """
+    cells = []
     for ix in xrange(nx):
         xx0 = x0 + ix*dx
         xx1 = xx0 + dx
@@ -130,12 +153,9 @@ def split(geometry, (dx_max, dy_max), (rx, ry), (bx0, by0, bx1, by1)):
             yy0 = y0 + iy*dy
             yy1 = yy0 + dy
             gg = geometry.Intersection(ig.getRectangle((xx0, yy0, xx1, yy1)))
-            if gg.IsEmpty():
-                continue
-            xxx0, xxx1, yyy0, yyy1 = gg.GetEnvelope()
-            xxx0, xxx1 = _round(xxx0, xxx1, xx0, rx)
-            yyy0, yyy1 = _round(yyy0, yyy1, yy0, ry)
-            yield xxx0, yyy0, xxx1, yyy1
+            if not gg.IsEmpty():
+                cells.append((ix, iy, gg.GetEnvelope()))
+    return cells
 
 
 if __name__ == "__main__":
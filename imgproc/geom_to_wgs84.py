@@ -32,12 +32,22 @@ import sys
 import traceback
 import os.path
 import img_geom as ig
+import img_stream
 from osgeo import ogr; ogr.UseExceptions() # pylint: disable=multiple-statements
 
 
 WGS84_SR = ig.parseSR("EPSG:4326")
 
 
+def to_wgs84(geom):
+    """ Map geometry to WGS84. Geometries without any spatial reference
+    are assumed to be in WGS84.
+    """
+    if geom.GetSpatialReference() is None:
+        geom.AssignSpatialReference(WGS84_SR)
+    return ig.mapToWGS84(geom)
+
+
 def usage():
     """ print usage """
     print >>sys.stderr, "\nConvert the input geometry to the WGS84 coordinates"
@@ -46,7 +56,14 @@ def usage():
     print >>sys.stderr, "crossing the date-line."
     print >>sys.stderr, "The result is dumped as a new geometry to stdout"
     print >>sys.stderr, "by default in WKB format."
-    print >>sys.stderr, "USAGE: %s <WKB|WKB> [WKT|WKB] [DEBUG]"
+    print >>sys.stderr, "In the STREAM (or BATCH) mode, the input is a stream of"
+    print >>sys.stderr, "geometries (concatenated WKBs, line-separated WKTs, ...,"
+    print >>sys.stderr, "or an OGR vector layer) which are converted by JOBS worker"
+    print >>sys.stderr, "processes and written to the output stream in the input"
+    print >>sys.stderr, "order."
+    print >>sys.stderr, (
+        "USAGE: %s <WKB|WKB> [WKT|WKB] [STREAM|BATCH [JOBS=<n>]] [DEBUG]"
+    )
 
 
 if __name__ == "__main__":
@@ -54,6 +71,8 @@ if __name__ == "__main__":
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     FORMAT = "WKB"
+    STREAM = False
+    JOBS = 1
 
     try:
         INPUT = sys.argv[1]
@@ -62,6 +81,10 @@ if __name__ == "__main__":
             for arg in sys.argv[NP:]:
                 if arg in ig.OUTPUT_FORMATS:
                     FORMAT = arg # output format
+                elif arg in ("STREAM", "BATCH"):
+                    STREAM = True # stream of geometries
+                elif arg.startswith("JOBS="):
+                    JOBS = int(arg.partition("=")[2]) # stream worker processes
                 elif arg == "DEBUG":
                     DEBUG = True # dump debuging output
 
@@ -75,8 +98,20 @@ if __name__ == "__main__":
         usage()
         sys.exit(1)
 
+    if STREAM:
+        # process stream of geometries
+        try:
+            img_stream.run(to_wgs84, INPUT, FORMAT, JOBS, DEBUG)
+        except Exception as exc:
+            if DEBUG:
+                traceback.print_exc(file=sys.stderr)
+            print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+            sys.exit(1)
+        sys.exit(0)
+
     # open and read the input geometry file
     fin = sys.stdin if INPUT == "-" else open(INPUT)
+
     try:
         geom = ig.parseGeom(fin.read(), DEBUG)
     except Exception as exc:
@@ -85,15 +120,8 @@ if __name__ == "__main__":
         print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
         sys.exit(1)
 
-    # project geometry
-    SOURCE_SR = geom.GetSpatialReference()
-
-    # assing the default spatial reference (WGS84)
-    if SOURCE_SR is None:
-        geom.AssignSpatialReference(WGS84_SR)
-
     # process the coordinates
-    geom = ig.mapToWGS84(geom)
+    geom = to_wgs84(geom)
 
     # export
     try:
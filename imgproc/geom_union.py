@@ -30,21 +30,84 @@
 
 import sys
 import os.path
+from multiprocessing import Pool
 import img_geom as ig
 from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
 
 
+def _union_wkb(wkbs):
+    """ Unite geometries passed as a list of WKB strings. (Pool worker.) """
+    geom = ogr.CreateGeometryFromWkb(wkbs[0])
+    for wkb in wkbs[1:]:
+        geom = geom.Union(ogr.CreateGeometryFromWkb(wkb))
+    return geom.ExportToWkb()
+
+
+def cascaded_union(geoms, jobs=1):
+    """ Unite list of geometries by a cascaded union.
+
+    The geometries are grouped by their overlapping envelopes. Geometries
+    of the disjoint groups cannot overlap and they are just collected.
+    Members of each group are ordered by their envelope centres and
+    united pairwise by a tree reduction. The independent pairs of all groups
+    at the same tree level are united in a process pool of the given
+    number of jobs passing the geometries as WKB.
+    """
+    envelopes = [geom.GetEnvelope() for geom in geoms]
+    groups = [
+        sorted(group, key=lambda i: (
+            envelopes[i][0] + envelopes[i][1], envelopes[i][2] + envelopes[i][3]
+        )) for group in ig.groupEnvelopes(envelopes)
+    ]
+    levels = [[geoms[i].ExportToWkb() for i in group] for group in groups]
+
+    pool = Pool(jobs) if jobs > 1 else None
+    map_ = pool.map if pool is not None else map
+    try:
+        while any(len(level) > 1 for level in levels):
+            tasks, slots = [], []
+            for idx, level in enumerate(levels):
+                for pos in xrange(0, len(level) - 1, 2):
+                    tasks.append(level[pos:pos+2])
+                    slots.append((idx, pos // 2))
+                levels[idx] = level[::2]
+            results = map_(_union_wkb, tasks)
+            for (idx, pos), wkb in zip(slots, results):
+                levels[idx][pos] = wkb
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    results = [ogr.CreateGeometryFromWkb(level[0]) for level in levels]
+    if not results:
+        return ogr.Geometry(ogr.wkbPolygon)
+    if len(results) == 1:
+        return results[0]
+    if all(geom.GetGeometryName() in ("POLYGON", "MULTIPOLYGON")
+           for geom in results):
+        return ig.groupPolygons([
+            polygon.Clone() for geom in results
+            for polygon in ig.extractPolygons(geom)
+        ])
+    geom = results[0]
+    for item in results[1:]:
+        geom = geom.Union(item)
+    return geom
+
+
 if __name__ == "__main__":
     # TODO: to improve CLI
     EXENAME = os.path.basename(sys.argv[0])
     DEBUG = False
     FORMAT = "WKB"
     HELP = False
+    JOBS = 1
     INPUTS = []
 
     for arg in sys.argv[1:]:
         # reserved keywords
-        if arg in ("WKT", "WKB", "JSON", "KML", "DEBUG", "HELP"):
+        if arg in ("WKT", "WKB", "TWKB", "JSON", "KML", "DEBUG", "HELP"):
             if arg in ig.OUTPUT_FORMATS:
                 FORMAT = arg # output format
             elif arg == "DEBUG":
@@ -52,17 +115,28 @@ if __name__ == "__main__":
             elif arg == "HELP":
                 HELP = True # print help on useage and exit
             continue
+        elif arg.startswith("JOBS="):
+            try:
+                JOBS = int(arg.partition("=")[2])
+            except ValueError:
+                print >>sys.stderr, "ERROR: %s: Invalid option %r!" % (
+                    EXENAME, arg
+                )
+                sys.exit(1)
+            continue
 
         INPUTS.append(arg)
 
     if HELP or (len(sys.argv) == 1):
         print >>sys.stderr, "\nUnite muptiple geometries and dump new geometry to stdout"
         print >>sys.stderr, "by default in WKB format.\n"
-        print >>sys.stderr, "USAGE: %s <WKB|WKB> ... [WKT|WKB] [HELP] [DEBUG]" % EXENAME
+        print >>sys.stderr, (
+            "USAGE: %s <WKB|WKB> ... [WKT|WKB] [JOBS=<n>] [HELP] [DEBUG]"
+            % EXENAME
+        )
         sys.exit(1)
 
-    # start with an empty polygon
-    geom = ogr.Geometry(ogr.wkbPolygon)
+    geoms = []
     sref = None
 
     for idx, input_ in enumerate(INPUTS):
@@ -81,8 +155,10 @@ if __name__ == "__main__":
         if (sref is None) and (gsrc.GetSpatialReference() is not None):
             sref = gsrc.GetSpatialReference().Clone()
 
-        # unite geometries
-        geom = geom.Union(gsrc)
+        geoms.append(gsrc)
+
+    # unite geometries
+    geom = cascaded_union(geoms, JOBS)
 
     # assign spatial reference
     geom.AssignSpatialReference(sref)
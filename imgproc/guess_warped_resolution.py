@@ -2,7 +2,8 @@
 #------------------------------------------------------------------------------
 #
 #  Guess resolution of the warped image using the same method
-#  as the one used by GDAL warp (length from the top-left to bottom-right edge).
+#  as the one used by GDAL warp (length from the top-left to bottom-right edge)
+#  applied locally to the cells of a dense grid sampling the image.
 #
 # Author: Martin Paces <martin.paces@eox.at>
 #
@@ -29,42 +30,98 @@
 #-------------------------------------------------------------------------------
 
 import sys
+from time import time
 from os.path import basename
-from img_geom  import GTMTransform, CTransform, parseSR
-from img import Point2, ImageFileReader
+import numpy as np
+from img_geom  import GTMTransform, GCPTransform, CTransform, parseSR
+from img import ImageFileReader, GCPGrid
 from img.cli import error
 
+# default number of the grid cells per image dimension
+DEFAULT_SAMPLES = 32
+
+
 def usage():
     """ Print simple usage help. """
     exename = basename(sys.argv[0])
-    print >>sys.stderr, "USAGE: %s <img> <target-srs>\n" % exename
+    print >>sys.stderr, (
+        "USAGE: %s <img> <target-srs> [STATS] [SAMPLES=<n>] [ORDER=<n>] "
+        "[DEBUG]\n" % exename
+    )
+
+
+def get_pixel_transform(geocoding, order=None):
+    """ Get pixel to the source coordinates transformation of the given
+    image geo-coding. Regular GCP grids are interpolated bilinearly,
+    other GCPs are fitted by a polynomial.
+    """
+    if 'geotrn' in geocoding:
+        return GTMTransform(geocoding['geotrn'])
+    if order is None:
+        try:
+            return GCPGrid.from_gcps(geocoding['gcps']).interpolate
+        except ValueError:
+            pass # not a regular grid
+    return GCPTransform(geocoding['gcps'], order)
 
 
-def get_resolution_rectified(size, geotrn, sr_in, sr_out):
-    """ Calculate the output resolution. """
-    # prepare transformations objects
-    pixel2sr_in = GTMTransform(geotrn)
-    sr_in2sr_out = CTransform(sr_in, sr_out)
+def _diagonals(x, y):
+    """ Get lengths of the diagonals of the grid cells. """
+    return np.hypot(x[1:, 1:] - x[:-1, :-1], y[1:, 1:] - y[:-1, :-1])
+
+
+def get_local_resolutions(size, pixel2sr_in, sr_in, sr_out, samples):
+    """ Calculate the output resolutions of the cells of a regular grid
+    sampling the image. The resolution of a cell is the length of its
+    diagonal in the output map coordinates divided by its length in pixels.
+    """
+    x_pix, y_pix = np.meshgrid(
+        np.linspace(0, size.x, samples + 1),
+        np.linspace(0, size.y, samples + 1),
+    )
     # transform coordinates
-    x_pix, y_pix = [0, size.x], [0, size.y]
     x_src, y_src = pixel2sr_in(x_pix, y_pix)
-    x_dst, y_dst = sr_in2sr_out(x_src, y_src)
-    # evaluate distances between the corners in the pixels and output map
+    x_dst, y_dst = CTransform(sr_in, sr_out)(x_src, y_src)
+    # evaluate lengths of the cell diagonals in the pixels and output map
     # coordinate systems
-    l_pix = (Point2(x_pix[1], y_pix[1]) - Point2(x_pix[0], y_pix[0])).length()
-    l_dst = (Point2(x_dst[1], y_dst[1]) - Point2(x_dst[0], y_dst[0])).length()
-    # target resolution
-    return l_dst / l_pix
+    l_pix = _diagonals(x_pix, y_pix)
+    l_dst = _diagonals(x_dst, y_dst)
+    # target resolutions
+    resolutions = (l_dst / l_pix).ravel()
+    return resolutions[np.isfinite(resolutions)]
 
 
 if __name__ == "__main__":
+    DEBUG = False
+    STATS = False
+    SAMPLES = DEFAULT_SAMPLES
+    ORDER = None
     try:
         INPUT = sys.argv[1]
         PROJECTION = sys.argv[2]
+        for arg in sys.argv[3:]:
+            if arg == "DEBUG":
+                DEBUG = True # dump debuging output
+            elif arg == "STATS":
+                STATS = True # print minimum, median and maximum
+            elif arg.startswith("SAMPLES=") or arg.startswith("SAMPLES:"):
+                SAMPLES = int(arg[8:]) # grid cells per image dimension
+                if SAMPLES < 1:
+                    raise ValueError("Invalid number of samples %s!" % SAMPLES)
+            elif arg.startswith("ORDER=") or arg.startswith("ORDER:"):
+                ORDER = int(arg[6:]) # GCP polynomial order
+                if ORDER < 1:
+                    raise ValueError("Invalid polynomial order %s!" % ORDER)
+            else:
+                raise ValueError("Invalid parameter %r!" % arg)
     except IndexError:
         error("Not enough input arguments!\n")
         usage()
         sys.exit(1)
+    except ValueError as exc:
+        error("%s\n", exc)
+        usage()
+        sys.exit(1)
 
     # open input image
     IMG_IN = ImageFileReader(INPUT)
@@ -72,14 +129,32 @@ if __name__ == "__main__":
     SR_OUT = parseSR(PROJECTION)
     GEO_PRM = IMG_IN.geocoding
 
-    if SR_IN:
-        if 'geotrn' in GEO_PRM:
-            print get_resolution_rectified(
-                IMG_IN.size, GEO_PRM['geotrn'], SR_IN, SR_OUT
-            )
-        else:
-            error("The GCP geocoded imagery is not supported!")
-            sys.exit(1)
-    else:
+    if not SR_IN:
         error("The image is not geocoded!")
         sys.exit(1)
+
+    START = time()
+    try:
+        RESOLUTIONS = get_local_resolutions(
+            IMG_IN.size, get_pixel_transform(GEO_PRM, ORDER),
+            SR_IN, SR_OUT, SAMPLES
+        )
+        if RESOLUTIONS.size == 0:
+            raise ValueError("Failed to transform the image coordinates!")
+    except ValueError as exc:
+        error("%s", exc)
+        sys.exit(1)
+
+    if DEBUG:
+        print >>sys.stderr, "GEOCODING: %s" % (
+            "geotrn" if 'geotrn' in GEO_PRM else "gcps"
+        )
+        print >>sys.stderr, "SAMPLES: %dx%d" % (SAMPLES, SAMPLES)
+        print >>sys.stderr, "TIME: %.3fms" % (1e3 * (time() - START))
+
+    if STATS:
+        print "%.16g %.16g %.16g" % (
+            RESOLUTIONS.min(), np.median(RESOLUTIONS), RESOLUTIONS.max()
+        )
+    else:
+        print np.median(RESOLUTIONS)
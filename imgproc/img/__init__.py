@@ -33,4 +33,7 @@ from .extent import Size, Offset, Extent
 from .block import Block, BaseBlock
 from .file_io import ImageFileReader, ImageFileWriter, DT2GDT, pixel_offset
 from .geotiff import create_geotiff, DEF_GEOTIFF_FOPT, make_gcp, clone_gcp
+from .gcp_grid import GCPGrid, load_gcp_grid
+from .memory import create_memory_image
 from .processing import execute, aggregate
+from .routing import route_tiles, copy_subsets
@@ -33,3 +33,7 @@ from os.path import basename
 def error(message, *args):
     """ Print error message. """
     print >>sys.stderr, "ERROR: %s: %s" %(basename(sys.argv[0]), message % args)
+
+def warning(message, *args):
+    """ Print warning message. """
+    print >>sys.stderr, "WARNING: %s: %s" %(basename(sys.argv[0]), message % args)
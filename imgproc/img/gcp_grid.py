@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+#  Regular grid of ground control points (GCPs)
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+from numpy import array, asarray, arange, diff, lexsort, searchsorted, vstack
+from osgeo import gdal; gdal.UseExceptions() #pylint: disable=multiple-statements
+
+
+class GCPGrid(object):
+    """ Regular grid of ground control points (e.g., the geolocation grid
+    of the Envisat products). The GCPs are held as a (rows, cols, 4) array
+    of the (line, pixel, x, y) tuples.
+    """
+
+    def __init__(self, grid):
+        grid = asarray(grid, dtype='float64')
+        if grid.ndim != 3 or grid.shape[2] != 4:
+            raise ValueError("Invalid GCP grid shape %s!" % (grid.shape,))
+        if grid.shape[0] < 2 or grid.shape[1] < 2:
+            raise ValueError("The GCP grid must be at least 2x2!")
+        self.grid = grid
+
+    @classmethod
+    def from_gcps(cls, gcps):
+        """ Create grid from a sequence of GDAL GCPs. The GCPs are sorted
+        by line and pixel and the grid shape is given by the number of GCPs
+        sharing the line of the first one. ValueError is raised unless
+        all GCPs of a row share the same line and all GCPs of a column
+        share the same pixel.
+        """
+        points = array([
+            (p.GCPLine, p.GCPPixel, p.GCPX, p.GCPY) for p in gcps
+        ], dtype='float64').reshape((-1, 4))
+        if points.shape[0] == 0:
+            raise ValueError("Source image has not GCP!")
+        points = points[lexsort((points[:, 1], points[:, 0]))]
+        ncol = (points[:, 0] == points[0, 0]).sum()
+        if points.shape[0] % ncol:
+            raise ValueError("The GCPs do not form a regular grid!")
+        grid = points.reshape((-1, ncol, 4))
+        lines, pixels = grid[:, :1, 0], grid[:1, :, 1]
+        if (
+                (grid[..., 0] != lines).any() or (grid[..., 1] != pixels).any()
+                or (diff(lines.ravel()) <= 0).any()
+                or (diff(pixels.ravel()) <= 0).any()
+            ):
+            raise ValueError("The GCPs do not form a regular grid!")
+        return cls(grid)
+
+    @classmethod
+    def from_dataset(cls, dataset):
+        """ Create grid from the GCPs of a GDAL dataset. """
+        return cls.from_gcps(dataset.GetGCPs())
+
+    @property
+    def shape(self):
+        """ Get grid shape (rows, cols). """
+        return self.grid.shape[:2]
+
+    @property
+    def lines(self):
+        """ Get image lines of the grid rows. """
+        return self.grid[:, 0, 0]
+
+    @property
+    def pixels(self):
+        """ Get image pixels of the grid columns. """
+        return self.grid[0, :, 1]
+
+    def boundary(self, densify=1):
+        """ Get closed (n, 2) array of the (x, y) coordinates of the grid
+        boundary. The boundary starts at the first GCP and follows the first
+        column, the last row, the last column and the first row. Each
+        segment is optionally split into `densify` linear segments.
+        """
+        xy = self.grid[..., 2:]
+        ring = vstack((
+            xy[:-1, 0], xy[-1, :-1], xy[:0:-1, -1], xy[0, :0:-1], xy[:1, 0]
+        ))
+        if densify > 1:
+            step = (arange(densify, dtype='float64') / densify)[None, :, None]
+            delta = (ring[1:] - ring[:-1])[:, None, :]
+            ring = vstack((
+                (ring[:-1, None, :] + step * delta).reshape((-1, 2)), ring[-1:]
+            ))
+        return ring
+
+    def interpolate(self, pixels, lines):
+        """ Bilinear interpolation of the (x, y) coordinates of the given
+        image pixel coordinates. The values outside of the grid are
+        extrapolated from the border cells.
+        """
+        pixels = asarray(pixels, dtype='float64')
+        lines = asarray(lines, dtype='float64')
+        irow = searchsorted(self.lines[1:-1], lines, side='right')
+        icol = searchsorted(self.pixels[1:-1], pixels, side='right')
+        line0, line1 = self.lines[irow], self.lines[irow + 1]
+        pixel0, pixel1 = self.pixels[icol], self.pixels[icol + 1]
+        arow = ((lines - line0) / (line1 - line0))[..., None]
+        acol = ((pixels - pixel0) / (pixel1 - pixel0))[..., None]
+        xy = self.grid[..., 2:]
+        xy0 = (1 - acol) * xy[irow, icol] + acol * xy[irow, icol + 1]
+        xy1 = (1 - acol) * xy[irow + 1, icol] + acol * xy[irow + 1, icol + 1]
+        result = (1 - arow) * xy0 + arow * xy1
+        return result[..., 0], result[..., 1]
+
+    def center(self, size):
+        """ Get (x, y) coordinates of the centre of an image of the given
+        (x, y) pixel size.
+        """
+        x, y = self.interpolate(0.5 * size[0], 0.5 * size[1])
+        return float(x), float(y)
+
+    def extract(self, size, densify=1):
+        """ Get the footprint boundary and the centre of an image of the
+        given (x, y) pixel size.
+        """
+        return self.boundary(densify), self.center(size)
+
+
+def load_gcp_grid(input_):
+    """ Load GCP grid and (x, y) image size of an image path or GDAL
+    dataset.
+    """
+    if isinstance(input_, basestring):
+        dataset = gdal.Open(input_)
+    else:
+        dataset = input_
+    return (
+        GCPGrid.from_dataset(dataset),
+        (dataset.RasterXSize, dataset.RasterYSize),
+    )
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+# In-memory image creation subroutine
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+from osgeo import gdal; gdal.UseExceptions() #pylint: disable=multiple-statements
+from .file_io import ImageFileWriter, DT2GDT
+from .geotiff import clone_gcp
+
+
+def create_memory_image(dtype, nrow, ncol, nband=1, proj=None,
+                        geotrn=None, gcps=None, nodata=None):
+    """ Create an in-memory (GDAL MEM) image and return an instance of
+    the ImageFileWriter class to access it. The image is discarded as soon
+    as the returned object is released.
+    """
+    #pylint: disable=too-many-arguments
+
+    # sanitize the inputs
+    nrow = max(0, int(nrow))
+    ncol = max(0, int(ncol))
+    nband = max(1, int(nband))
+
+    # convert type to gdal type
+    try:
+        gdal_dtype = DT2GDT[dtype]
+    except KeyError:
+        raise ValueError("Unsupported data type! %r" % dtype)
+
+    # create in-memory image
+    driver = gdal.GetDriverByName("MEM")
+    dataset = driver.Create("", ncol, nrow, nband, gdal_dtype)
+
+    if proj and geotrn:
+        # set geo-transformation
+        dataset.SetProjection(proj)
+        dataset.SetGeoTransform(geotrn)
+
+    elif proj and gcps:
+        # copy ground control points (a.k.a. tie-points)
+        dataset.SetGCPs([clone_gcp(gcp) for gcp in gcps], proj)
+
+    # create image object
+    writer = ImageFileWriter(dataset)
+
+    #copy no-data value(s)
+    if nodata is not None:
+        writer.nodata = nodata
+
+    return writer
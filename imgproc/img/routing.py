@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+# Routing of the image tiles to multiple output windows
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+from multiprocessing.pool import ThreadPool
+from numpy import array, nonzero
+from .block import Block, BaseBlock
+
+
+def union_extent(extents):
+    """ Get the minimum extent containing all given extents. """
+    return reduce(lambda ext0, ext1: ext0 | ext1, extents)
+
+
+def route_tiles(extent, windows, tile_size):
+    """ Generate (tile, window indices) pairs of the tiles of the given extent
+    overlapping at least one of the windows. The tiles not overlapping any
+    window are skipped.
+    """
+    if not windows:
+        return
+    bounds = array([
+        (win.offset.x, win.offset.y, win.offset.x + win.size.x,
+         win.offset.y + win.size.y) for win in windows
+    ]).reshape((-1, 4))
+    wx0, wy0, wx1, wy1 = bounds.T
+    not_empty = (wx1 > wx0) & (wy1 > wy0)
+    for tile in (extent & union_extent(windows)).tiles(tile_size):
+        tile = tile & extent
+        tx0, ty0 = tile.offset.x, tile.offset.y
+        tx1, ty1 = tx0 + tile.size.x, ty0 + tile.size.y
+        indices = nonzero(not_empty & (
+            (wx0 < tx1) & (wx1 > tx0) & (wy0 < ty1) & (wy1 > ty0)
+        ))[0]
+        if indices.size > 0:
+            yield tile, indices
+
+
+def _write_block(args):
+    """ Write block to the output image. """
+    img_out, block = args
+    img_out.write(block)
+
+
+def copy_subsets(img_in, outputs, tile_size, nthreads=4, progress=None):
+    """ Copy multiple subsets of the input image to the output images
+    in a single tiled read pass. Each source tile is read once and routed
+    to all overlapping outputs. The writes to different outputs are performed
+    in parallel while the next tile is read.
+
+    The outputs are given as a list of (subset, writer) pairs where the subset
+    is the extent of the output in the input pixel coordinates.
+    The progress is updated once per tile (see tile_count()).
+    """
+    windows = [subset & img_in for subset, _ in outputs]
+    pool = ThreadPool(max(1, nthreads))
+    pending = None
+    try:
+        for tile, indices in route_tiles(img_in, windows, tile_size):
+            b_in = img_in.read(Block(img_in.dtype, tile.set_z(img_in)))
+            if pending is not None:
+                pending.get() # wait for the previous writes
+            pending = pool.map_async(_write_block, [
+                (outputs[idx][1], BaseBlock(
+                    b_in.data, b_in.size, b_in.offset - outputs[idx][0].offset
+                )) for idx in indices
+            ])
+            if progress:
+                progress.update()
+        if pending is not None:
+            pending.get()
+    finally:
+        pool.close()
+        pool.join()
+
+
+def tile_count(img_in, subsets, tile_size):
+    """ Count the input tiles routed to at least one of the subsets. """
+    windows = [subset & img_in for subset in subsets]
+    return sum(1 for _ in route_tiles(img_in, windows, tile_size))
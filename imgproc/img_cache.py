@@ -0,0 +1,167 @@
+#-------------------------------------------------------------------------------
+#
+#  Geometry operation cache
+#
+#    Optional content-addressed on-disk cache of the results of the geometry
+#    operations with size-bounded least-recently-used eviction.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import os
+import errno
+import hashlib
+from os.path import join, isdir
+from tempfile import mkstemp
+
+# environment variables enabling and configuring the cache
+CACHE_DIR_ENV = "IMG_GEOM_CACHE"
+CACHE_SIZE_ENV = "IMG_GEOM_CACHE_SIZE"
+
+# default cache size limit in bytes
+DEFAULT_CACHE_SIZE = 256 * 1024 * 1024
+
+# fraction of the size limit retained by the eviction
+EVICTION_RATIO = 0.8
+
+# prefix of the temporary files of the entries being written
+TMP_PREFIX = ".tmp"
+
+
+class DiskCache(object):
+    """ Content-addressed cache of binary blobs stored as files in the cache
+    directory. The entries are keyed by a SHA-1 hash of the key parts.
+    The access time of an entry is recorded by its modification time and
+    when the cache size exceeds the limit the least recently used entries
+    are removed. The entries are written atomically so the cache can be
+    shared by concurrent processes.
+    """
+
+    def __init__(self, path, max_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._size = None # lazily evaluated
+
+    @staticmethod
+    def key(*parts):
+        """ Get cache key for the given string parts. """
+        digest = hashlib.sha1()
+        for part in parts:
+            digest.update("%d:" % len(part))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def _entry_path(self, key):
+        return join(self.path, key[:2], key[2:])
+
+    def get(self, key):
+        """ Get cached data or None if not found. """
+        path = self._entry_path(key)
+        try:
+            with open(path, "rb") as fobj:
+                data = fobj.read()
+            os.utime(path, None) # mark as recently used
+        except (IOError, OSError):
+            return None
+        return data
+
+    def put(self, key, data):
+        """ Store data in the cache. """
+        path = self._entry_path(key)
+        dirname = os.path.dirname(path)
+        try:
+            os.makedirs(dirname)
+        except OSError as exc:
+            if exc.errno != errno.EEXIST or not isdir(dirname):
+                raise
+        handle, tmp_path = mkstemp(dir=dirname, prefix=TMP_PREFIX)
+        try:
+            with os.fdopen(handle, "wb") as fobj:
+                fobj.write(data)
+            os.rename(tmp_path, path)
+        except Exception:
+            os.remove(tmp_path)
+            raise
+        if self._size is None:
+            self._size = self.size()
+        else:
+            self._size += len(data)
+        if self._size > self.max_size:
+            self.evict()
+
+    def _entries(self):
+        """ Get list of the (mtime, size, path) tuples of the entries. """
+        entries = []
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                if filename.startswith(TMP_PREFIX):
+                    continue # entry being written
+                path = join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue # removed by another process
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        """ Get total size of the cached entries. """
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self, target_size=None):
+        """ Remove the least recently used entries until the cache size drops
+        below the target size (by default a fraction of the size limit).
+        """
+        if target_size is None:
+            target_size = int(EVICTION_RATIO * self.max_size)
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= target_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass # removed by another process
+            total -= size
+        self._size = total
+
+
+_CACHE = {}
+
+
+def get_cache():
+    """ Get the shared cache configured by the IMG_GEOM_CACHE (directory)
+    and IMG_GEOM_CACHE_SIZE (size limit in bytes) environment variables.
+    None is returned if the cache is not enabled.
+    """
+    path = os.environ.get(CACHE_DIR_ENV)
+    if not path:
+        return None
+    max_size = int(os.environ.get(CACHE_SIZE_ENV) or DEFAULT_CACHE_SIZE)
+    try:
+        return _CACHE[(path, max_size)]
+    except KeyError:
+        cache = _CACHE[(path, max_size)] = DiskCache(path, max_size)
+        return cache
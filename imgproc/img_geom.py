@@ -28,11 +28,24 @@
 
 import re
 import sys
+import json
+import binascii
 import math as m
 import numpy as np
-from collections import Iterable
+from collections import Iterable, OrderedDict
+from functools import wraps
+from inspect import getargspec, getcallargs
 from osgeo import ogr ; ogr.UseExceptions()
 from osgeo import osr ; osr.UseExceptions()
+from img_srs import ( # pylint: disable=unused-import
+    createSRFromEPSG, getSRFromEPSG, SRSequence, OSR_WGS84, OSR_UTM_N,
+    OSR_UTM_S, CT_CACHE_SIZE, getCTransformation, transformTo,
+)
+import img_wkb
+import img_twkb
+import img_rings
+import img_simplify
+import img_cache
 
 _gerexURL = re.compile(r"^http://www.opengis.net/def/crs/epsg/\d+\.?\d*/(\d+)$", re.IGNORECASE)
 _gerexURN = re.compile(r"^urn:ogc:def:crs:epsg:\d*\.?\d*:(\d+)$", re.IGNORECASE)
@@ -40,32 +53,46 @@ _gerexShortCode = re.compile(r"^epsg:(\d+)$", re.IGNORECASE)
 
 #-------------------------------------------------------------------------------
 # coordinate transformation
-RO = ['readonly']
-WO = ['writeonly', 'allocate']
+
+# maximum number of points passed to one OSR TransformPoints() call
+CT_CHUNK_SIZE = 65536
+
+def _asCoordArrays(xarr, yarr):
+    """ Convert the coordinates to float64 arrays of the same shape. """
+    xarr = np.asarray(xarr, dtype='float64')
+    yarr = np.asarray(yarr, dtype='float64')
+    if xarr.shape != yarr.shape:
+        raise ValueError("Array shape mismatch!")
+    return xarr, yarr
 
 class CTransform(object):
     """GDAL/SRS coordinate transformation."""
 
     def __init__(self, sr_src, sr_dst):
-        self._ct = osr.CoordinateTransformation(sr_src, sr_dst)
+        self._ct = getCTransformation(sr_src, sr_dst)
+
+    def transform(self, xarr, yarr):
+        """ Transform NumPy arrays of coordinates in bulk. """
+        xarr, yarr = _asCoordArrays(xarr, yarr)
+        xsrc, ysrc = xarr.ravel(), yarr.ravel()
+        xdst = np.empty(xsrc.shape, 'float64')
+        ydst = np.empty(ysrc.shape, 'float64')
+        for idx in xrange(0, xsrc.size, CT_CHUNK_SIZE):
+            chunk = slice(idx, idx + CT_CHUNK_SIZE)
+            points = np.asarray(self._ct.TransformPoints(
+                np.column_stack((xsrc[chunk], ysrc[chunk])).tolist()
+            ), 'float64')
+            xdst[chunk], ydst[chunk] = points[:, 0], points[:, 1]
+        return xdst.reshape(xarr.shape), ydst.reshape(yarr.shape)
 
     def __call__(self, xarr, yarr):
-        if hasattr(np, 'nditer') and isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
+        if isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
             # NumPy array
-            if xarr.shape != yarr.shape:
-                raise ValueError("Array shape mismatch!")
-            itr = np.nditer([xarr, yarr, None, None], [], [RO, RO, WO, WO])
-            for x, y, u, v in itr:
-                u[...], v[...], _ = self._ct.TransformPoint(float(x), float(y))
-            return itr.operands[2], itr.operands[3]
-        elif isinstance(xarr, Iterable) and isinstance(xarr, Iterable):
-            # generic iterables + NumPy prior 'np.nditer'
-            u, v = [], []
-            for x, y in zip(xarr, yarr):
-                _u, _v, _ = self._ct.TransformPoint(float(x), float(y))
-                u.append(_u)
-                v.append(_v)
-            return u, v
+            return self.transform(xarr, yarr)
+        elif isinstance(xarr, Iterable) and isinstance(yarr, Iterable):
+            # generic iterables
+            u, v = self.transform(list(xarr), list(yarr))
+            return u.tolist(), v.tolist()
         else: # assuming scalar values
             return self._ct.TransformPoint(float(xarr), float(yarr))[0:2]
 
@@ -82,45 +109,80 @@ class GTMTransform(object):
         y = gtm[3] + gtm[4]*col + gtm[5]*row
         return x, y
 
+    def transform(self, xarr, yarr):
+        """ Transform NumPy arrays of coordinates in bulk. """
+        return self.__transform(*_asCoordArrays(xarr, yarr))
+
     def __call__(self, xarr, yarr):
-        if hasattr(np, 'nditer') and isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
+        if isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
             # NumPy array
-            if xarr.shape != yarr.shape:
-                raise ValueError("Array shape mismatch!")
-            itr = np.nditer([xarr, yarr, None, None], [], [RO, RO, WO, WO])
-            for x, y, u, v in itr:
-                u[...], v[...] = self.__transform(float(x), float(y))
-            return itr.operands[2], itr.operands[3]
-        elif isinstance(xarr, Iterable) and isinstance(xarr, Iterable):
-            # generic iterables + NumPy prior 'np.nditer'
-            u, v = [], []
-            for x, y in zip(xarr, yarr):
-                _u, _v = self.__transform(float(x), float(y))
-                u.append(_u)
-                v.append(_v)
-            return u, v
+            return self.transform(xarr, yarr)
+        elif isinstance(xarr, Iterable) and isinstance(yarr, Iterable):
+            # generic iterables
+            u, v = self.transform(list(xarr), list(yarr))
+            return u.tolist(), v.tolist()
         else: # assuming scalar values
             return self.__transform(float(xarr), float(yarr))
 
 
-#-------------------------------------------------------------------------------
-# spatial references
+class GCPTransform(object):
+    """GDAL GCPs based (polynomial) transformation. The pixel/line to x/y
+    polynomial of the requested order is fitted to the GCPs by the least
+    squares. By default, the 2nd order is used for 10 and more GCPs and the
+    1st order otherwise.
+    """
 
-# the most common spatial references
+    def __init__(self, gcps, order=None):
+        gcps = np.array([
+            (p.GCPPixel, p.GCPLine, p.GCPX, p.GCPY) for p in gcps
+        ], dtype='float64').reshape((-1, 4))
+        if order is None:
+            order = 2 if gcps.shape[0] >= 10 else 1
+        self._powers = [
+            (i - j, j) for i in xrange(order + 1) for j in xrange(i + 1)
+        ]
+        if gcps.shape[0] < len(self._powers):
+            raise ValueError(
+                "Not enough GCPs for a polynomial of order %d!" % order
+            )
+        # normalised pixel coordinates to improve the fit conditioning
+        self._offset = gcps[:, :2].mean(axis=0)
+        self._scale = np.maximum(np.abs(gcps[:, :2] - self._offset).max(), 1.0)
+        self._coef = np.linalg.lstsq(
+            self.__terms(gcps[:, 0], gcps[:, 1]), gcps[:, 2:], rcond=-1
+        )[0]
+
+    def __terms(self, col, row):
+        col = (col - self._offset[0]) / self._scale
+        row = (row - self._offset[1]) / self._scale
+        return np.column_stack([col**i * row**j for i, j in self._powers])
 
-def createSRFromEPSG(epsg):
-    """ Create OSR Spatial Reference from EPSG number code"""
-    sr = osr.SpatialReference()
-    sr.ImportFromEPSG(epsg)
-    return sr
+    def __transform(self, col, row):
+        xy = np.dot(self.__terms(col.ravel(), row.ravel()), self._coef)
+        return xy[:, 0].reshape(col.shape), xy[:, 1].reshape(row.shape)
 
-OSR_WGS84 = createSRFromEPSG(4326)
-OSR_USP_N = createSRFromEPSG(32661)
-OSR_USP_N = createSRFromEPSG(32761)
+    def transform(self, xarr, yarr):
+        """ Transform NumPy arrays of coordinates in bulk. """
+        return self.__transform(*_asCoordArrays(xarr, yarr))
 
-OSR_UTM_N = tuple(createSRFromEPSG(32601+i) for i in xrange(60))
-OSR_UTM_S = tuple(createSRFromEPSG(32701+i) for i in xrange(60))
+    def __call__(self, xarr, yarr):
+        if isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
+            # NumPy array
+            return self.transform(xarr, yarr)
+        elif isinstance(xarr, Iterable) and isinstance(yarr, Iterable):
+            # generic iterables
+            u, v = self.transform(list(xarr), list(yarr))
+            return u.tolist(), v.tolist()
+        else: # assuming scalar values
+            u, v = self.transform(float(xarr), float(yarr))
+            return float(u), float(v)
+
+
+#-------------------------------------------------------------------------------
+# spatial references
 
+# the shared spatial references and the cached coordinate transformations
+# are defined in img_srs
 
 def setSR(geom, sr):
     """Assing spatial reference to a geometry and return it."""
@@ -133,7 +195,7 @@ def parseSR(srs, debug=False):
     for regex in (_gerexShortCode, _gerexURN, _gerexURL):
         match = regex.match(srs)
         if match is not None:
-            return createSRFromEPSG(int(match.group(1)))
+            return getSRFromEPSG(int(match.group(1)))
     if srs[:7] in ("PROJCS[", "GEOGCS["):
         return osr.SpatialReference(srs)
     if srs in (None, "", "NONE"):
@@ -156,34 +218,70 @@ def dumpSR(sr, delimiter="", debug=False):
 #-------------------------------------------------------------------------------
 # File I/O subroutines
 
+_gerexHexWKB = re.compile(r"^(?:00|01)[0-9A-Fa-f]{8}")
+_gerexWKT = re.compile(r"^[A-Za-z]+\s*(?:Z|M|ZM)?\s*(?:\(|EMPTY)", re.IGNORECASE)
+
+GEOM_LOADERS = {
+    "WKB": ogr.CreateGeometryFromWkb,
+    "HEXWKB": lambda buf: ogr.CreateGeometryFromWkb(
+        binascii.unhexlify(buf.strip())
+    ),
+    "WKT": ogr.CreateGeometryFromWkt,
+    "GML": ogr.CreateGeometryFromGML,
+    "JSON": ogr.CreateGeometryFromJson,
+    "TWKB": lambda buf: flatToGeom(img_twkb.loads(buf)),
+}
+
+def sniffGeomFormat(buf):
+    """ Guess format of the geometry source buffer from its leading bytes.
+        Returns one of WKB, HEXWKB, WKT, GML, JSON or TWKB or None if
+        the format is not recognized.
+    """
+    if buf[:1] in ("\x00", "\x01"):
+        try:
+            img_wkb.geometry_type(buf)
+        except ValueError:
+            # e.g., TWKB point or line-string of zero precision
+            return "TWKB" if img_twkb.is_twkb(buf) else None
+        return "WKB"
+    head = buf[:256].lstrip()
+    if head[:1] == "{":
+        return "JSON"
+    if head[:1] == "<":
+        return "GML"
+    if _gerexHexWKB.match(head):
+        return "HEXWKB"
+    if _gerexWKT.match(head):
+        return "WKT"
+    if img_twkb.is_twkb(buf):
+        return "TWKB"
+    return None
+
+
+def _parseSRPrefix(buf):
+    """ Split the optional SRS prefix from the geometry buffer. """
+    if buf[:5] == "EPSG:" or buf[:7] in ("PROJCS[", "GEOGCS["):
+        srs, _, buf = buf.partition(';')
+        return parseSR(srs), buf
+    return None, buf
+
+
 def parseGeom(buf, debug=False):
     """ parse geometry from a source buffer """
     # parse prefix
-    if buf.startswith("EPSG:") or buf.startswith("PROJCS["):
-        srs, _, buf = buf.partition(';')
-        sr = parseSR(srs)
-    else:
-        sr = None
-
-    # create the geometry
-    for loader in (ogr.CreateGeometryFromWkb,
-                    ogr.CreateGeometryFromWkt,
-                    ogr.CreateGeometryFromGML,
-                    ogr.CreateGeometryFromJson):
-        try:
-            if debug:
-                print >>sys.stderr, "LOADER: ", loader,
-            geom = loader(buf)
-        except Exception as e:
-            if debug:
-                print >>sys.stderr, e
-            continue
+    sr, buf = _parseSRPrefix(buf)
 
+    # detect the format and create the geometry
+    format_ = sniffGeomFormat(buf)
+    if debug:
+        print >>sys.stderr, "FORMAT: ", format_
+    if format_ is None:
+        raise ValueError("ERROR: Failed to parse the source geometry!")
+    try:
+        geom = GEOM_LOADERS[format_](buf)
+    except Exception as e:
         if debug:
-            print >>sys.stderr, "OK"
-        break
-
-    else:
+            print >>sys.stderr, e
         raise ValueError("ERROR: Failed to parse the source geometry!")
 
     if sr is not None:
@@ -192,18 +290,82 @@ def parseGeom(buf, debug=False):
     return geom
 
 
+def iterParseGeom(buf, debug=False):
+    """ Iterate geometries parsed from a source buffer holding a sequence
+        of geometries, i.e., either concatenated WKB or TWKB geometries (each
+        optionally preceded by the SRS prefix), concatenated JSON objects,
+        or line-separated WKT or HEX-WKB geometries.
+    """
+    def _skip_space(offset):
+        while offset < len(buf) and buf[offset:offset+1].isspace():
+            offset += 1
+        return offset
+
+    offset = _skip_space(0)
+    decoder = json.JSONDecoder()
+    while offset < len(buf):
+        sr, _ = _parseSRPrefix(buf[offset:offset+4096])
+        if sr is not None: # skip the prefix
+            offset = buf.index(';', offset) + 1
+        format_ = sniffGeomFormat(buf[offset:offset+256])
+        if debug:
+            print >>sys.stderr, "FORMAT: ", format_
+        if format_ == "WKB":
+            size = img_wkb.size(buf, offset)
+            geom = ogr.CreateGeometryFromWkb(buf[offset:offset+size])
+            offset += size
+        elif format_ == "TWKB":
+            flat, offset = img_twkb.load(buf, offset)
+            geom = flatToGeom(flat)
+        elif format_ == "JSON":
+            obj, end = decoder.raw_decode(buf, offset)
+            geom = ogr.CreateGeometryFromJson(json.dumps(obj))
+            offset = end
+        elif format_ in ("WKT", "HEXWKB"):
+            end = buf.find("\n", offset)
+            end = len(buf) if end < 0 else end
+            geom = GEOM_LOADERS[format_](buf[offset:end])
+            offset = end
+        elif format_ == "GML": # no item separator, whole buffer parsed
+            geom = ogr.CreateGeometryFromGML(buf[offset:])
+            offset = len(buf)
+        else:
+            raise ValueError("ERROR: Failed to parse the source geometry!")
+
+        if sr is not None:
+            geom.AssignSpatialReference(sr)
+        yield geom
+        offset = _skip_space(offset)
+
+
 #OUTPUT_FORMATS = ("WKB", "WKT", "JSON", "GML", "KML")
-OUTPUT_FORMATS = ("WKB", "WKT", "JSON", "KML")
+OUTPUT_FORMATS = ("WKB", "WKT", "JSON", "KML", "TWKB")
+
+# default TWKB precisions (number of decimal digits) of the geographic
+# (~1cm) and projected (1mm) coordinates
+TWKB_PRECISION_GEOGRAPHIC = 7
+TWKB_PRECISION_PROJECTED = 3
 
-def dumpGeom(geom, format="WKB", debug=False):
-    """ dump geometry to a buffer possible formats are: WKB(*)|WKT|JSON|GML|KML """
+def dumpGeom(geom, format="WKB", debug=False, precision=None):
+    """ dump geometry to a buffer possible formats are: WKB(*)|WKT|JSON|GML|KML|TWKB
+        The TWKB coordinates are rounded to the given number of decimal
+        digits (by default selected by the type of the spatial reference).
+    """
     # dump SRS prefix
-    prefix = dumpSR(geom.GetSpatialReference(), ";", debug)
+    sr = geom.GetSpatialReference()
+    prefix = dumpSR(sr, ";", debug)
 
     if format == "WKB":
         data = geom.ExportToWkb()
         if prefix:
             data = "%s%s"%(prefix, data)
+    elif format == "TWKB":
+        if precision is None:
+            precision = (
+                TWKB_PRECISION_PROJECTED if sr is not None and sr.IsProjected()
+                else TWKB_PRECISION_GEOGRAPHIC
+            )
+        data = "%s%s"%(prefix, img_twkb.dumps(geomToFlat(geom), precision))
     elif format == "WKT":
         data = "%s%s\n"%(prefix, geom.ExportToWkt())
     elif format == "JSON":
@@ -218,13 +380,84 @@ def dumpGeom(geom, format="WKB", debug=False):
 
     return data
 
+#-------------------------------------------------------------------------------
+# cached geometry operations
+
+def cachedOperation(name):
+    """ Decorator caching results of a geometry operation in the optional
+        disk cache (see img_cache). The results are keyed by the operation
+        name, input WKB, spatial reference and the operation parameters.
+        The parameters are normalised (defaults applied, keyword and
+        positional arguments unified) so that equivalent calls share
+        the cached result. The cached operation must not modify its input.
+    """
+    def _decorator(function):
+        geom_arg = getargspec(function).args[0]
+
+        @wraps(function)
+        def _wrapper(geom, *args, **kwargs):
+            cache = img_cache.get_cache()
+            if cache is None:
+                return function(geom, *args, **kwargs)
+            params = getcallargs(function, geom, *args, **kwargs)
+            del params[geom_arg]
+            key = cache.key(
+                name, geom.ExportToWkb(), dumpSR(geom.GetSpatialReference()),
+                repr(sorted(params.items())),
+            )
+            data = cache.get(key)
+            if data is not None:
+                try:
+                    return parseGeom(data)
+                except Exception: # pylint: disable=broad-except
+                    pass # invalid entry - recalculated
+            result = function(geom, *args, **kwargs)
+            cache.put(key, dumpGeom(result, "WKB"))
+            return result
+        return _wrapper
+    return _decorator
+
+
+@cachedOperation("bufferGeom")
+def bufferGeom(geom, distance):
+    """ Buffer geometry by the given distance. """
+    return setSR(geom.Buffer(distance), geom.GetSpatialReference())
+
+
+@cachedOperation("simplifyGeom")
+def simplifyGeom(geom, tolerance, preserve_topology=False):
+    """ Simplify polygon or multi-polygon by the vectorised Douglas-Peucker
+        algorithm (see img_simplify). Other geometries are returned
+        unchanged.
+        Unless the topology is preserved, the simplified polygons
+        are repaired by a zero buffer (as the OGR/GEOS Simplify() does)
+        so that the result is always a valid (multi-)polygon.
+    """
+    if geom.GetGeometryName() not in ("POLYGON", "MULTIPOLYGON"):
+        return geom
+    sr = geom.GetSpatialReference()
+    result = flatToGeom(
+        img_simplify.simplify(geomToFlat(geom), tolerance, preserve_topology),
+        sr
+    )
+    if not preserve_topology and not result.IsEmpty():
+        # repair self-intersecting rings and escaped holes
+        result = setSR(result.Buffer(0), sr)
+    return result
+
 #-------------------------------------------------------------------------------
 
 def wrapArroundDateLine(geom, (xmin, ymin, xmax, ymax), nstep=200):
     """
         wrap (split) geometry arround the date-line
 
+        The polygons are split exactly at the date-line(s) by walking
+        the ring coordinates (see img_rings). Any other geometry (or
+        a polygon which cannot be split this way) is clipped by OGR
+        intersections with the segmentized wrap-around rectangles.
+
         nstep controls the split border segmentation (dy = (ymax-ymin)/nstep)
+        of the OGR fallback.
     """
     xdif = xmax - xmin
     step = (ymax - ymin) / nstep
@@ -238,6 +471,12 @@ def wrapArroundDateLine(geom, (xmin, ymin, xmax, ymax), nstep=200):
     if (p_start == 0) and (p_stop == 1):
         return geom
 
+    # exact wrap-arround of the polygons
+    try:
+        return _wrapPolygons(geom, xmin, xmax, p_start, p_stop)
+    except ValueError:
+        pass
+
     # wrap-arround
     lgeom = []
     for p in xrange(p_start, p_stop):
@@ -250,6 +489,28 @@ def wrapArroundDateLine(geom, (xmin, ymin, xmax, ymax), nstep=200):
     return groupPolygons(lgeom)
 
 
+def _wrapPolygons(geom, xmin, xmax, p_start, p_stop):
+    """ Split polygons at the date-lines and shift the parts to the regular
+        domain. ValueError is raised for non-polygon geometries.
+    """
+    flat = geomToFlat(geom)
+    if flat.type not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError("Not a polygon!")
+    xdif = xmax - xmin
+    cuts = xmin + xdif * np.arange(p_start + 1, p_stop)
+    strips = img_rings.split_polygons(flat.parts(), cuts)
+    parts = []
+    for offset, polygons in zip(xdif*np.arange(p_start, p_stop), strips):
+        for rings in polygons:
+            parts.append([
+                np.column_stack((
+                    np.clip(ring[:, 0] - offset, xmin, xmax), ring[:, 1]
+                )) for ring in rings
+            ])
+    return flatToGeom(img_wkb.FlatGeometry.from_parts("MULTIPOLYGON", parts))
+
+
+@cachedOperation("wrapArroundWGS84")
 def wrapArroundWGS84(geom, nstep=200):
     """
         logitude wrap-arround of geometry in WGS84
@@ -263,19 +524,36 @@ def wrapArroundWGS84(geom, nstep=200):
 
 #-------------------------------------------------------------------------------
 
-def mapToWGS84(geom):
+class WGS84Mapper(object):
+    """ Mapping of geometries from one source spatial reference to WGS84
+        including the north/south pole handling for polar projections and
+        the date-line wrap-arround.
 
-    def between(v, (v0, v1)):
-        if v0 <= v1:
-            return (v0 <= v)and(v1 >= v)
-        else: #v1 > v0
-            return (v1 <= v)and(v0 >= v)
+        The per-CRS setup (coordinate transformations, location of the poles
+        and the polar section polygons) is evaluated once and re-used
+        for all mapped geometries.
+    """
 
-    def extent_contains(x0, y0):
-        return ((x0_min <= x0)and(x0_max >= x0)
-             and(y0_min <= y0)and(y0_max >= y0))
+    def __init__(self, sr_src):
+        self.sr_src = sr_src
+        # coordinate transformation objects
+        self.ct_fwd = getCTransformation(sr_src, OSR_WGS84)
+        self.ct_rev = getCTransformation(OSR_WGS84, sr_src)
+        # try to get coordinates of the north and south pole in the source CRS
+        self.poles = {
+            True: self._locate_pole(90.0),
+            False: self._locate_pole(-90.0),
+        }
+        self._sections = {}
+
+    def _locate_pole(self, latitude):
+        try:
+            return self.ct_rev.TransformPoint(0.0, latitude)[:2]
+        except RuntimeError:
+            return None
 
-    def generate_polar_section(north, east):
+    @staticmethod
+    def _generate_polar_section(north, east):
         eps = 1e-9
         y00 = 89 # max. opposite pole lat.distnace from the equator
         x0 = 0 if east else -180
@@ -293,102 +571,216 @@ def mapToWGS84(geom):
         p.AssignSpatialReference(OSR_WGS84)
         return p
 
-    def fix_dateline(geom, east):
+    def polar_sections(self, north):
+        """ Get the (east, west) polygons splitting the polar geometry
+            to halves in the source coordinates.
+        """
+        if north not in self._sections:
+            sections = []
+            for east in (True, False):
+                section = self._generate_polar_section(north, east)
+                section.Transform(self.ct_rev)
+                sections.append(section)
+            self._sections[north] = tuple(sections)
+        return self._sections[north]
+
+    @staticmethod
+    def _fix_dateline(geom, east):
         """fix the +/-180dg ambiguity of the date-line nodes"""
-        def _dlflip_east((x, y, _)): # date-line point flipper
-            return (x+360.0 if x < -179.0 else x, y)
-        def _dlflip_west((x, y, _)): # date-line point flipper
-            return (x-360.0 if x > (+179.0) else x, y)
-        return Transfomer(_dlflip_east if east else _dlflip_west)(geom)
-
-    def transform_polar(north):
-        # generate polygon spliting the polar geometry to halves
-        s1 = generate_polar_section(north, east=True)
-        s2 = generate_polar_section(north, east=False)
+        def _dlflip_east(x, y): # date-line point flipper
+            return (x + 360.0*(x < -179.0), y)
+        def _dlflip_west(x, y): # date-line point flipper
+            return (x - 360.0*(x > +179.0), y)
+        return ArrayTransformer(_dlflip_east if east else _dlflip_west)(geom)
 
-        # transform coordinates
-        s1.Transform(ct_rev)
-        s2.Transform(ct_rev)
+    def _transform_polar(self, geom, north):
+        s1, s2 = self.polar_sections(north)
 
         # split the polar geometry to halves
         g1 = geom.Intersection(s1)
         g2 = geom.Intersection(s2)
 
         # transform halves to the target projection
-        g1.Transform(ct_fwd)
-        g2.Transform(ct_fwd)
+        g1.Transform(self.ct_fwd)
+        g2.Transform(self.ct_fwd)
 
         # fix the dateline ambiguity
-        g1 = fix_dateline(g1, east=True)
-        g2 = fix_dateline(g2, east=False)
+        g1 = self._fix_dateline(g1, east=True)
+        g2 = self._fix_dateline(g2, east=False)
 
         # return the unified geometry
         return g1.Union(g2)
 
-    #--------------------------------------------------------------------------
-
-    sr_src = geom.GetSpatialReference()
-    sr_dst = OSR_WGS84
-
-    # coordinate transformation objects
-    ct_fwd = osr.CoordinateTransformation(sr_src, sr_dst)
-    ct_rev = osr.CoordinateTransformation(sr_dst, sr_src)
-
-    # envelope and centroid in the source coordinates
-    x0_min, x0_max, y0_min, y0_max = geom.GetEnvelope()
-
-    # centroid
-    x0_cnt, y0_cnt = 0.5*(x0_min+x0_max), 0.5*(y0_min+y0_max)
-
-    # try to get coordinates of the north and south pole in the source CRS
+    def __call__(self, geom):
+        """ Map geometry to WGS84. Note that the input geometry
+            may be modified.
+        """
+        def between(v, (v0, v1)):
+            if v0 <= v1:
+                return (v0 <= v)and(v1 >= v)
+            else: #v1 > v0
+                return (v1 <= v)and(v0 >= v)
+
+        def extent_contains(x0, y0):
+            return ((x0_min <= x0)and(x0_max >= x0)
+                 and(y0_min <= y0)and(y0_max >= y0))
+
+        # envelope and centroid in the source coordinates
+        x0_min, x0_max, y0_min, y0_max = geom.GetEnvelope()
+
+        # centroid
+        x0_cnt, y0_cnt = 0.5*(x0_min+x0_max), 0.5*(y0_min+y0_max)
+
+        # case #1 - extent contains the north pole
+        # case #2 - extent contains the south pole
+        for north in (True, False):
+            if self.poles[north] and extent_contains(*self.poles[north]):
+                return setSR(self._transform_polar(geom, north), OSR_WGS84)
+
+        # case #3 proceed with the date-line handling
+
+        # perform transformation
+        geom.Transform(self.ct_fwd)
+
+        # get extent and centroid in the target coordinates
+        (x1_min, _, _), (x1_max, _, _), (x1_cnt, _, _) = (
+            self.ct_fwd.TransformPoints([
+                (x0_min, y0_cnt), (x0_max, y0_cnt), (x0_cnt, y0_cnt),
+            ])
+        )
+
+        # fix the wild easting wrap-arround
+        if not between(x1_cnt, (x1_min, x1_max)):
+            if x1_max < x1_min: # axis orientation preserved
+                x_cnt, x_min, x_max = x1_cnt, x1_min, x1_max
+            else: # (x1_min < x1_max) # flipped axis orientation
+                x_cnt, x_min, x_max = x1_cnt, x1_max, x1_min
+
+            # point unwrapping fuctions
+            if x_cnt < x_max: # EAST to WEST
+                def _dlflip(x, y):
+                    return (x - 360.0*(x > x_max), y)
+            elif x_cnt > x_min: # WEST to EAST
+                def _dlflip(x, y):
+                    return (x + 360.0*(x < x_min), y)
+
+            geom = setSR(ArrayTransformer(_dlflip)(geom), OSR_WGS84)
+
+        # perform proper wrapparround
+        return setSR(wrapArroundDateLine(geom, (-180, -90, 180, 90), 1), OSR_WGS84)
+
+
+# cache of the WGS84 mappers
+WGS84_MAPPER_CACHE_SIZE = 16
+_WGS84_MAPPER_CACHE = OrderedDict()
+
+def getWGS84Mapper(sr_src):
+    """ Get cached WGS84 mapper for the given source spatial reference. """
+    key = sr_src.ExportToWkt()
     try:
-        xy0_np = ct_rev.TransformPoint(0.0, 90.0)[:2]
-    except RuntimeError:
-        xy0_np = None
+        mapper = _WGS84_MAPPER_CACHE.pop(key)
+    except KeyError:
+        mapper = WGS84Mapper(sr_src)
+        while len(_WGS84_MAPPER_CACHE) >= WGS84_MAPPER_CACHE_SIZE:
+            _WGS84_MAPPER_CACHE.popitem(last=False)
+    _WGS84_MAPPER_CACHE[key] = mapper
+    return mapper
 
-    try:
-        xy0_sp = ct_rev.TransformPoint(0.0, -90.0)[:2]
-    except RuntimeError:
-        xy0_sp = None
 
-    # case #1 - extent contains the north pole
-    if xy0_np and extent_contains(*xy0_np):
-        return setSR(transform_polar(north=True), OSR_WGS84)
+@cachedOperation("mapToWGS84")
+def mapToWGS84(geom):
+    """ Map geometry to WGS84 including the north/south pole handling
+        and the date-line wrap-arround. The input geometry is not modified.
+    """
+    # the mapper modifies its input -> a copy is passed
+    return getWGS84Mapper(geom.GetSpatialReference())(geom.Clone())
 
-    # case #2 - extent contains the south pole
-    # check whether the extent contains the south pole
-    elif xy0_sp and extent_contains(*xy0_sp):
-        return setSR(transform_polar(north=False), OSR_WGS84)
 
-    # case #3 proceed with the date-line handling
+def iterMapToWGS84(geoms, sr_default=None):
+    """ Map a sequence of geometries to WGS84. The per-CRS setup
+        is shared by the geometries with the same spatial reference.
+        The optional default spatial reference is assigned to geometries
+        without any.
+    """
+    for geom in geoms:
+        if sr_default is not None and geom.GetSpatialReference() is None:
+            geom.AssignSpatialReference(sr_default)
+        yield mapToWGS84(geom)
 
-    # perform transformation
-    geom.Transform(ct_fwd)
+#-------------------------------------------------------------------------------
 
-    # get extent and centroid in the target coordinates
-    x1_min, _, _ = ct_fwd.TransformPoint(x0_min, y0_cnt)
-    x1_max, _, _ = ct_fwd.TransformPoint(x0_max, y0_cnt)
-    x1_cnt, _, _ = ct_fwd.TransformPoint(x0_cnt, y0_cnt)
+# maximum number of geometries oriented by one kernel call
+WINDING_BATCH_SIZE = 1024
 
-    # fix the wild easting wrap-arround
-    if not between(x1_cnt, (x1_min, x1_max)):
-        if x1_max < x1_min: # axis orientation preserved
-            x_cnt, x_min, x_max = x1_cnt, x1_min, x1_max
-        else: # (x1_min < x1_max) # flipped axis orientation
-            x_cnt, x_min, x_max = x1_cnt, x1_max, x1_min
 
-        # point unwrapping fuctions
-        if x_cnt < x_max: # EAST to WEST
-            def _dlflip(p):
-                return (p[0]-360*(p[0] > x_max), p[1])
-        elif x_cnt > x_min: # WEST to EAST
-            def _dlflip(p):
-                return (p[0]+360*(p[0] < x_min), p[1])
+def _forceWindingBatch(geoms, is_cw):
+    """ Force winding of a list of geometries. Rings of all (multi-)polygons
+        of the same coordinate dimension are oriented by one call of
+        the vectorised orientation kernel.
+    """
+    results = list(geoms)
+    flats = {}
+    for idx, geom in enumerate(geoms):
+        name = geom.GetGeometryName()
+        if name in ("POLYGON", "MULTIPOLYGON"):
+            flats[idx] = geomToFlat(geom)
+        elif name == "GEOMETRYCOLLECTION":
+            items = [
+                geom.GetGeometryRef(i) for i in xrange(geom.GetGeometryCount())
+            ]
+            collection = ogr.Geometry(ogr.wkbGeometryCollection)
+            for item in _forceWindingBatch(items, is_cw):
+                collection.AddGeometry(item)
+            results[idx] = setSR(collection, geom.GetSpatialReference())
+        else:
+            results[idx] = geom.Clone()
+
+    batches = {}
+    for idx in sorted(flats):
+        batches.setdefault(flats[idx].ndim, []).append(idx)
+
+    for indices in batches.itervalues():
+        items = [flats[idx] for idx in indices]
+        sizes = [len(flat.coords) for flat in items]
+        shifts = np.cumsum([0] + sizes[:-1])
+        coords = img_rings.orient_rings(
+            np.concatenate([flat.coords for flat in items]),
+            np.concatenate([
+                flat.ring_offsets[:-1] + shift
+                for flat, shift in zip(items, shifts)
+            ] + [[sum(sizes)]]),
+            np.concatenate([flat.exterior_mask() for flat in items]),
+            ccw=not is_cw,
+        )
+        for idx, flat, shift, size in zip(indices, items, shifts, sizes):
+            results[idx] = flatToGeom(
+                flat.copy(coords[shift:shift+size]),
+                geoms[idx].GetSpatialReference()
+            )
+
+    return results
+
+
+def forceWinding(geom, is_cw=False):
+    """ Force counter-clockwise (default) or clockwise winding of the polygon
+        exterior rings and the opposite winding of the interior rings.
+    """
+    return _forceWindingBatch([geom], is_cw)[0]
 
-        geom = setSR(Transfomer(_dlflip)(geom), OSR_WGS84)
 
-    # perform proper wrapparround
-    return setSR(wrapArroundDateLine(geom, (-180, -90, 180, 90), 1), OSR_WGS84)
+def iterForceWinding(geoms, is_cw=False, batch_size=WINDING_BATCH_SIZE):
+    """ Force winding of a sequence of geometries (see forceWinding).
+        The geometries are oriented in batches of the given size.
+    """
+    batch = []
+    for geom in geoms:
+        batch.append(geom)
+        if len(batch) >= batch_size:
+            for item in _forceWindingBatch(batch, is_cw):
+                yield item
+            batch = []
+    for item in _forceWindingBatch(batch, is_cw):
+        yield item
 
 #-------------------------------------------------------------------------------
 
@@ -405,6 +797,50 @@ def ungroupMultiPolygon(mpol):
     return [mpol.GetGeometryRef(i) for i in xrange(mpol.GetGeometryCount())]
 
 
+def _envelopePairs(envelopes):
+    """ Sort-and-sweep over the (xmin, xmax, ymin, ymax) envelopes yielding
+        the index pairs of the mutually overlapping envelopes.
+    """
+    order = np.argsort(envelopes[:, 0], kind='mergesort')
+    xmin, xmax, ymin, ymax = envelopes[order].T
+    # the sweep range of each envelope is the run of the following envelopes
+    # starting before its right edge
+    stop = np.searchsorted(xmin, xmax, side='right')
+    for idx in xrange(len(order) - 1):
+        sel = slice(idx + 1, stop[idx])
+        hits = (ymin[sel] <= ymax[idx]) & (ymax[sel] >= ymin[idx])
+        for idy in np.flatnonzero(hits) + (idx + 1):
+            yield order[idx], order[idy]
+
+
+def groupEnvelopes(envelopes):
+    """ Group envelopes to clusters connected by the envelope overlaps.
+        The envelopes are passed as a sequence of the OGR (xmin, xmax, ymin,
+        ymax) tuples. The overlaps are found by a sort-and-sweep and merged
+        by a union-find so that the grouping is transitive, i.e., envelopes
+        touching the same third envelope end up in the same group.
+        Returns a list of lists of indices, ordered by the lowest index.
+    """
+    envelopes = np.asarray(envelopes, dtype='float64').reshape((-1, 4))
+    parent = range(len(envelopes))
+
+    def _root(idx):
+        while parent[idx] != idx:
+            parent[idx] = parent[parent[idx]]
+            idx = parent[idx]
+        return idx
+
+    for idx, idy in _envelopePairs(envelopes):
+        idx, idy = _root(idx), _root(idy)
+        if idx != idy:
+            parent[max(idx, idy)] = min(idx, idy)
+
+    groups = OrderedDict()
+    for idx in xrange(len(envelopes)):
+        groups.setdefault(_root(idx), []).append(idx)
+    return groups.values()
+
+
 def extractPolygons(geom):
     if geom.GetGeometryName() == "GEOMETRYCOLLECTION":
         l = []
@@ -461,10 +897,45 @@ def getRectangle((x_min, y_min, x_max, y_max), step=1.0):
 
 def shiftGeom(g, (dx, dy)):
     """ shift geometry by a given offset """
-    def _shift(p, (dx, dy)):
-        return (p[0]+dx, p[1]+dy)
-    t = Transfomer(_shift)
-    return t(g, (dx, dy))
+    return ArrayTransformer(lambda x, y: (x + dx, y + dy))(g)
+
+
+def envelopeIntersection(envelope0, envelope1):
+    """ Intersect two OGR (xmin, xmax, ymin, ymax) envelopes. Returns None
+        if the envelopes do not overlap.
+    """
+    xmin = max(envelope0[0], envelope1[0])
+    xmax = min(envelope0[1], envelope1[1])
+    ymin = max(envelope0[2], envelope1[2])
+    ymax = min(envelope0[3], envelope1[3])
+    if xmin > xmax or ymin > ymax:
+        return None
+    return (xmin, xmax, ymin, ymax)
+
+
+def clipToEnvelope(geom, (xmin, xmax, ymin, ymax)):
+    """ Clip polygons to the OGR (xmin, xmax, ymin, ymax) envelope by
+        the exact ring clipping, i.e., without the OGR boolean operations.
+        The geometry is returned unchanged if it cannot be clipped
+        (non-polygon geometry, degenerate envelope of zero width or height
+        or a clipping failure).
+    """
+    if geom.GetGeometryName() not in ("POLYGON", "MULTIPOLYGON"):
+        return geom
+    if xmin >= xmax or ymin >= ymax: # the clipped polygons would collapse
+        return geom
+    try:
+        flat = geomToFlat(geom)
+        parts = [
+            polygon for rings in flat.parts() for polygon
+            in img_rings.clip_polygon(rings, (xmin, ymin, xmax, ymax))
+        ]
+    except ValueError:
+        return geom
+    return flatToGeom(
+        img_wkb.FlatGeometry.from_parts("MULTIPOLYGON", parts),
+        geom.GetSpatialReference()
+    )
 
 #------------------------------------------------------------------------------
 
@@ -523,3 +994,61 @@ class Transfomer(object):
                 m1.AddGeometry(rv)
         return m1
 
+
+class ArrayTransformer(object):
+    """ Vectorised geometry transformer.
+
+        The transformation function receives NumPy arrays of the x and y
+        coordinates of all vertices of the geometry and returns
+        the transformed coordinate arrays:
+
+            f(x, y, *prm, **kw) -> (x, y)
+
+        The geometry is decoded and rebuilt in bulk via the native WKB codec,
+        i.e., the function is called once per geometry (once per member
+        of a geometry collection). The output geometry is always 2D
+        and it has no spatial reference.
+    """
+
+    def __init__(self, f):
+        self.__f = f
+
+    def __call__(self, g0, *prm, **kw):
+        name = g0.GetGeometryName()
+        if name == "LINEARRING":
+            # linear ring has no WKB representation -> wrap it in a polygon
+            poly = ogr.Geometry(ogr.wkbPolygon)
+            poly.AddGeometry(g0)
+            return self(poly, *prm, **kw).GetGeometryRef(0).Clone()
+        elif name == "GEOMETRYCOLLECTION":
+            geom = ogr.Geometry(ogr.wkbGeometryCollection)
+            for i in xrange(g0.GetGeometryCount()):
+                geom.AddGeometry(self(g0.GetGeometryRef(i), *prm, **kw))
+            return geom
+        flat = geomToFlat(g0)
+        coords = np.empty((len(flat.coords), 2))
+        if len(coords) > 0:
+            coords[:, 0], coords[:, 1] = (self.__f)(
+                flat.coords[:, 0], flat.coords[:, 1], *prm, **kw
+            )
+        return flatToGeom(img_wkb.FlatGeometry(
+            flat.type, coords, flat.ring_offsets, flat.part_offsets
+        ))
+
+#------------------------------------------------------------------------------
+
+def geomToFlat(geom):
+    """ Convert OGR geometry to a flat geometry (see img_wkb.FlatGeometry)
+        holding the coordinates in NumPy arrays.
+    """
+    return img_wkb.loads(geom.ExportToWkb(ogr.wkbNDR))
+
+
+def flatToGeom(flat, sr=None):
+    """ Convert flat geometry (see img_wkb.FlatGeometry) to OGR geometry
+        optionally with the given spatial reference.
+    """
+    geom = ogr.CreateGeometryFromWkb(img_wkb.dumps(flat))
+    if sr is not None:
+        geom.AssignSpatialReference(sr)
+    return geom
@@ -0,0 +1,375 @@
+#-------------------------------------------------------------------------------
+#
+#  Polygon ring operations
+#
+#    Pure NumPy polygon ring operations (orientation, point-in-polygon tests
+#    and exact splitting of polygons at axis-aligned lines) working on ring
+#    coordinate arrays, i.e., without the OGR boolean geometry operations.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import numpy as np
+
+# Rotations mapping the lower (x < c) or upper (x > c) side of a vertical
+# (axis=0) or horizontal (axis=1) cut to the lower side of a vertical cut.
+# The rotations preserve the ring orientation.
+#   (axis, upper) -> (forward rotation, inverse rotation, cut sign)
+_ROTATIONS = {
+    (0, False): (lambda x, y: (x, y), lambda x, y: (x, y), +1),
+    (0, True): (lambda x, y: (-x, -y), lambda x, y: (-x, -y), -1),
+    (1, False): (lambda x, y: (y, -x), lambda x, y: (-y, x), +1),
+    (1, True): (lambda x, y: (-y, x), lambda x, y: (y, -x), -1),
+}
+
+
+def signed_area(ring):
+    """ Get signed area of a ring (positive for the counter-clockwise
+    orientation). The ring may be either open or closed.
+    """
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * (
+        np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y)
+    )
+
+
+def signed_areas(coords, ring_offsets):
+    """ Get signed areas of multiple rings stored in one coordinate array
+    (positive for the counter-clockwise orientation). The coordinates of
+    the i-th ring are coords[ring_offsets[i]:ring_offsets[i+1]].
+    The rings may be either open or closed.
+    """
+    ring_offsets = np.asarray(ring_offsets)
+    sizes = np.diff(ring_offsets)
+    ring_ids = np.repeat(np.arange(len(sizes)), sizes)
+    following = np.arange(1, len(coords) + 1)
+    following[ring_offsets[1:][sizes > 0] - 1] = ring_offsets[:-1][sizes > 0]
+    x, y = coords[:, 0], coords[:, 1]
+    return 0.5 * np.bincount(
+        ring_ids, x * y[following] - x[following] * y, minlength=len(sizes)
+    )
+
+
+def reverse_rings(coords, ring_offsets, selection):
+    """ Reverse vertex order of the selected rings stored in one coordinate
+    array. Returns new coordinate array.
+    """
+    ring_offsets = np.asarray(ring_offsets)
+    sizes = np.diff(ring_offsets)
+    ring_ids = np.repeat(np.arange(len(sizes)), sizes)
+    index = np.arange(len(coords))
+    mask = np.asarray(selection, 'bool')[ring_ids]
+    index[mask] = (
+        ring_offsets[:-1] + ring_offsets[1:] - 1
+    )[ring_ids[mask]] - index[mask]
+    return coords[index]
+
+
+def orient_rings(coords, ring_offsets, exterior, ccw=True):
+    """ Force counter-clockwise (ccw=True) or clockwise (ccw=False)
+    orientation of the exterior rings and the opposite orientation of
+    the interior rings stored in one coordinate array. The exterior rings
+    are flagged by the boolean exterior mask. Degenerate rings of zero
+    area are left untouched. Returns new coordinate array.
+    """
+    areas = signed_areas(coords, ring_offsets)
+    positive = np.asarray(exterior, 'bool') == ccw
+    return reverse_rings(
+        coords, ring_offsets, np.where(positive, areas < 0, areas > 0)
+    )
+
+
+def point_in_ring(point, ring):
+    """ Test whether the point is inside the ring (crossing number test).
+    The ring may be either open or closed.
+    """
+    x0, y0 = point
+    x1, y1 = ring[:, 0], ring[:, 1]
+    x2, y2 = np.roll(x1, 1), np.roll(y1, 1)
+    mask = (y1 > y0) != (y2 > y0)
+    x1, y1, x2, y2 = x1[mask], y1[mask], x2[mask], y2[mask]
+    xc = x1 + (x2 - x1) * (y0 - y1) / (y2 - y1)
+    return bool(np.count_nonzero(x0 < xc) % 2)
+
+
+def _open_ring(ring):
+    """ Drop the closing point and the consecutive duplicate points. """
+    if len(ring) == 0:
+        return ring
+    mask = np.any(ring != np.roll(ring, -1, axis=0), axis=1)
+    return ring[mask]
+
+
+def _close_ring(ring):
+    """ Append the closing point. """
+    return np.vstack((ring, ring[:1]))
+
+
+def _normalize(rings):
+    """ Open the rings and force the counter-clockwise orientation of the
+    exterior and the clockwise orientation of the interior rings.
+    Degenerate rings are dropped. Returns None for a degenerate or empty
+    polygon.
+    """
+    if len(rings) == 0:
+        return None
+    result = []
+    for idx, ring in enumerate(rings):
+        ring = _open_ring(np.asarray(ring, 'float64')[:, :2])
+        if len(ring) < 3:
+            if idx == 0:
+                return None
+            continue
+        area = signed_area(ring)
+        if area == 0:
+            if idx == 0:
+                return None
+            continue
+        if (area > 0) != (idx == 0):
+            ring = ring[::-1]
+        result.append(ring)
+    return result
+
+
+def _ring_chains(ring, inside, cut):
+    """ Split the ring crossing the cut x = c line to the chains lying on
+    the x < c side. Each chain starts and ends with the interpolated
+    crossing points.
+    """
+    size = len(ring)
+    inside_next = np.roll(inside, -1)
+    entries = np.nonzero(~inside & inside_next)[0]
+    exits = np.nonzero(inside & ~inside_next)[0]
+    if exits[0] < entries[0]:
+        exits = np.roll(exits, -1)
+
+    def _crossing(idx):
+        (x0, y0), (x1, y1) = ring[idx].T, ring[(idx + 1) % size].T
+        yc = y0 + (y1 - y0) * ((cut - x0) / (x1 - x0))
+        # exact coordinates of the vertices lying on the cut line
+        yc = np.where(x0 == cut, y0, np.where(x1 == cut, y1, yc))
+        return np.column_stack((np.repeat(cut, len(yc)), yc))
+
+    entry_points = _crossing(entries)
+    exit_points = _crossing(exits)
+
+    chains = []
+    for idx in xrange(len(entries)):
+        start, stop = entries[idx] + 1, exits[idx] + 1
+        if stop < start:
+            stop += size
+        chains.append(np.vstack((
+            entry_points[idx:idx+1],
+            ring[np.arange(start, stop) % size],
+            exit_points[idx:idx+1],
+        )))
+    return chains
+
+
+def _pair_crossings(exit_ys, entry_ys):
+    """ Pair the chain exits with the chain entries following them
+    up the cut line. The crossings sharing the same point (vertices lying
+    on the cut line) are resolved by a sweep keeping track of the open
+    line segments. Returns array of the chain indices following each chain.
+    """
+    nchain = len(exit_ys)
+    ys = np.concatenate((exit_ys, entry_ys))
+    order = np.argsort(ys, kind='mergesort')
+    bounds = np.nonzero(np.diff(ys[order]))[0] + 1
+    next_chain = np.empty(nchain, 'int')
+    pending = None
+    for group in np.split(order, bounds):
+        exits = list(group[group < nchain])
+        entries = list(group[group >= nchain] - nchain)
+        if pending is not None:
+            if not entries:
+                raise ValueError("Failed to pair the ring crossings!")
+            next_chain[pending] = entries.pop(0)
+            pending = None
+        while exits and entries:
+            next_chain[exits.pop(0)] = entries.pop(0)
+        if entries or len(exits) > 1:
+            raise ValueError("Failed to pair the ring crossings!")
+        if exits:
+            pending = exits[0]
+    if pending is not None:
+        raise ValueError("Failed to pair the ring crossings!")
+    return next_chain
+
+
+def _clip_lower(rings, cut):
+    """ Clip normalized polygon to the x < c half-plane.
+    Returns list of the normalized polygons.
+    """
+    chains = []
+    holes = []
+    for idx, ring in enumerate(rings):
+        inside = ring[:, 0] < cut
+        if inside.all():
+            if idx == 0: # whole polygon inside
+                return [rings]
+            holes.append(ring)
+        elif inside.any():
+            chains.extend(_ring_chains(ring, inside, cut))
+        elif idx == 0: # whole polygon outside
+            return []
+
+    # Pair the chain ends along the cut line. The counter-clockwise boundary
+    # of the clipped part runs up the line, i.e., from the chain exits
+    # to the next chain entries.
+    next_chain = _pair_crossings(
+        np.array([chain[-1, 1] for chain in chains]),
+        np.array([chain[0, 1] for chain in chains]),
+    )
+    nchain = len(chains)
+
+    # walk the chains and assemble the new exterior rings
+    polygons = []
+    visited = np.zeros(nchain, 'bool')
+    for first in xrange(nchain):
+        if visited[first]:
+            continue
+        idx, cycle = first, []
+        while not visited[idx]:
+            visited[idx] = True
+            cycle.append(chains[idx])
+            idx = next_chain[idx]
+        if idx != first:
+            raise ValueError("Failed to assemble the clipped rings!")
+        ring = _open_ring(np.vstack(cycle))
+        if len(ring) >= 3 and signed_area(ring) > 0:
+            polygons.append([ring])
+
+    # assign the remaining interior rings
+    for hole in holes:
+        point = hole[np.argmin(hole[:, 0])]
+        for polygon in polygons:
+            if point_in_ring(point, polygon[0]):
+                polygon.append(hole)
+                break
+        else:
+            raise ValueError("Failed to assign the interior ring!")
+
+    return polygons
+
+
+def _clip(rings, cut, axis, upper):
+    """ Clip normalized polygon to one side of the cut line. """
+    forward, inverse, sign = _ROTATIONS[(axis, upper)]
+
+    def _rotate(rotation, ring):
+        # note that adding zero removes the negative zeros
+        return np.column_stack(rotation(ring[:, 0], ring[:, 1])) + 0.0
+
+    polygons = _clip_lower(
+        [_rotate(forward, ring) for ring in rings], sign * cut
+    )
+    return [
+        [_rotate(inverse, ring) for ring in polygon] for polygon in polygons
+    ]
+
+
+def split_polygon(rings, cut, axis=0):
+    """ Split polygon, given as a list of closed coordinate arrays (exterior
+    ring first), at the x = cut (axis=0) or y = cut (axis=1) line.
+    Returns pair of lists of the polygons lying on the lower and upper side
+    of the line. The output exterior rings are counter-clockwise, the
+    interior rings clockwise.
+
+    ValueError is raised if the polygon cannot be split (e.g., an invalid
+    self-intersecting polygon).
+    """
+    return tuple(
+        [[_close_ring(ring) for ring in polygon] for polygon in side]
+        for side in _split(_normalize(rings), cut, axis)
+    )
+
+
+def _split(rings, cut, axis):
+    """ Split normalized polygon. """
+    if rings is None:
+        return [], []
+    return _clip(rings, cut, axis, False), _clip(rings, cut, axis, True)
+
+
+def _strip_range(rings, cuts, axis):
+    """ Get range of the strips spanned by the normalized polygon. """
+    values = rings[0][:, axis]
+    return (
+        np.searchsorted(cuts, values.min(), 'right'),
+        np.searchsorted(cuts, values.max(), 'left'),
+    )
+
+
+def _bisect(rings, cuts, axis, result):
+    """ Split normalized polygon recursively at the middle of the cuts
+    crossing its envelope and sort the pieces to the strips.
+    """
+    first, last = _strip_range(rings, cuts, axis)
+    if first >= last:
+        result[min(first, last)].append(rings)
+        return
+    lower, upper = _split(rings, cuts[(first + last - 1) // 2], axis)
+    for piece in lower + upper:
+        _bisect(piece, cuts, axis, result)
+
+
+def split_polygons(polygons, cuts, axis=0):
+    """ Split list of polygons, each given as a list of closed coordinate
+    arrays, at a sequence of the x = cut (axis=0) or y = cut (axis=1) lines.
+    Returns list of len(cuts) + 1 lists of the polygons lying between
+    the consecutive cut lines.
+
+    The polygons are cut only by the lines crossing their envelopes
+    and bisected so that each vertex is visited O(log(len(cuts))) times.
+    """
+    cuts = np.sort(np.asarray(cuts, 'float64').ravel())
+    result = [[] for _ in xrange(len(cuts) + 1)]
+    for rings in (_normalize(rings) for rings in polygons):
+        if rings is not None:
+            _bisect(rings, cuts, axis, result)
+    return [
+        [[_close_ring(ring) for ring in polygon] for polygon in strip]
+        for strip in result
+    ]
+
+
+def clip_polygon(rings, (x_min, y_min, x_max, y_max)):
+    """ Clip polygon, given as a list of closed coordinate arrays,
+    by a rectangle. Returns list of the clipped polygons.
+    """
+    polygons = [_normalize(rings)]
+    if polygons[0] is None:
+        return []
+    for cut, axis, upper in (
+            (x_min, 0, True), (x_max, 0, False),
+            (y_min, 1, True), (y_max, 1, False),
+        ):
+        polygons = [
+            part for rings in polygons
+            for part in _clip(rings, cut, axis, upper)
+        ]
+    return [
+        [_close_ring(ring) for ring in polygon] for polygon in polygons
+    ]
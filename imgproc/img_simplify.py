@@ -0,0 +1,271 @@
+#-------------------------------------------------------------------------------
+#
+#  Geometry simplification
+#
+#    Vectorised Douglas-Peucker simplification of the polygon rings working
+#    on the flat coordinate arrays, optionally preserving the topology
+#    of the rings.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import numpy as np
+from img_wkb import FlatGeometry
+
+
+def _farthest(coords, starts, stops):
+    """ Find the inner vertices of the start-stop chains lying farthest from
+    the start-stop segments. All chains must have at least one inner vertex.
+    Returns the vertex indices and their squared distances.
+    """
+    counts = stops - starts - 1
+    offsets = np.cumsum(counts) - counts
+    chain = np.repeat(np.arange(len(counts)), counts)
+    index = starts[chain] + 1 + np.arange(counts.sum()) - offsets[chain]
+
+    point_a = coords[starts][chain]
+    vector = coords[stops][chain] - point_a
+    diff = coords[index] - point_a
+    length2 = (vector * vector).sum(axis=1)
+    param = (diff * vector).sum(axis=1) / np.where(length2 > 0, length2, 1.0)
+    diff -= vector * np.clip(param, 0.0, 1.0)[:, np.newaxis]
+    dist2 = (diff * diff).sum(axis=1)
+
+    dist2_max = np.maximum.reduceat(dist2, offsets)
+    first = np.flatnonzero(dist2 == dist2_max[chain])
+    first = first[np.concatenate(([True], np.diff(chain[first]) > 0))]
+    return index[first], dist2_max
+
+
+def _douglas_peucker(coords, starts, stops, tolerance, keep):
+    """ Douglas-Peucker simplification of the start-stop chains. All chains
+    of the explicit stack are processed in one batch per iteration.
+    The retained vertices are marked in the keep mask.
+    """
+    tolerance2 = tolerance * tolerance
+    while len(starts) > 0:
+        mask = stops - starts > 1
+        starts, stops = starts[mask], stops[mask]
+        if len(starts) == 0:
+            break
+        index, dist2 = _farthest(coords, starts, stops)
+        mask = dist2 > tolerance2
+        index = index[mask]
+        keep[index] = True
+        starts = np.concatenate((starts[mask], index))
+        stops = np.concatenate((index, stops[mask]))
+
+
+def _segments(keep, ring_ids):
+    """ Get start and stop vertex indices of the simplified segments. """
+    index = np.flatnonzero(keep)
+    mask = ring_ids[index[:-1]] == ring_ids[index[1:]]
+    return index[:-1][mask], index[1:][mask]
+
+
+def _crossing(coords, starts, stops):
+    """ Flag segments properly crossing any other segment. The candidate
+    pairs are found by a sort-and-sweep over the segment envelopes.
+    """
+    point_a, point_b = coords[starts], coords[stops]
+    xmin = np.minimum(point_a[:, 0], point_b[:, 0])
+    xmax = np.maximum(point_a[:, 0], point_b[:, 0])
+    ymin = np.minimum(point_a[:, 1], point_b[:, 1])
+    ymax = np.maximum(point_a[:, 1], point_b[:, 1])
+
+    order = np.argsort(xmin, kind='mergesort')
+    counts = np.searchsorted(xmin[order], xmax[order], 'right')
+    counts -= np.arange(1, len(order) + 1)
+    offsets = np.cumsum(counts) - counts
+    idx = np.repeat(np.arange(len(order)), counts)
+    idy = idx + 1 + np.arange(counts.sum()) - offsets[idx]
+    idx, idy = order[idx], order[idy]
+    mask = (ymin[idx] <= ymax[idy]) & (ymax[idx] >= ymin[idy])
+    idx, idy = idx[mask], idy[mask]
+
+    def _orient(p_0, p_1, p_2):
+        return np.sign(
+            (p_1[:, 0] - p_0[:, 0]) * (p_2[:, 1] - p_0[:, 1]) -
+            (p_1[:, 1] - p_0[:, 1]) * (p_2[:, 0] - p_0[:, 0])
+        )
+
+    a_0, a_1, b_0, b_1 = point_a[idx], point_b[idx], point_a[idy], point_b[idy]
+    mask = (
+        (_orient(a_0, a_1, b_0) * _orient(a_0, a_1, b_1) < 0) &
+        (_orient(b_0, b_1, a_0) * _orient(b_0, b_1, a_1) < 0)
+    )
+    crossing = np.zeros(len(starts), 'bool')
+    crossing[idx[mask]] = True
+    crossing[idy[mask]] = True
+    return crossing
+
+
+def _stab(lower, upper, values):
+    """ Find all (interval, value) index pairs of the values lying in
+    the closed [lower, upper] intervals. The values are sorted and the
+    ranges of the intervals found by a binary search.
+    """
+    order = np.argsort(values, kind='mergesort')
+    first = np.searchsorted(values[order], lower, 'left')
+    counts = np.searchsorted(values[order], upper, 'right') - first
+    counts = np.maximum(counts, 0)
+    offsets = np.cumsum(counts) - counts
+    idx = np.repeat(np.arange(len(lower)), counts)
+    idy = first[idx] + np.arange(counts.sum()) - offsets[idx]
+    return idx, order[idy]
+
+
+def _chain_envelopes(coords, starts, stops):
+    """ Get (xmin, xmax, ymin, ymax) envelopes of the start-stop chains
+    (stops included).
+    """
+    counts = stops - starts + 1
+    offsets = np.cumsum(counts) - counts
+    chain = np.repeat(np.arange(len(counts)), counts)
+    points = coords[starts[chain] + np.arange(counts.sum()) - offsets[chain]]
+    cmin = np.minimum.reduceat(points, offsets)
+    cmax = np.maximum.reduceat(points, offsets)
+    return cmin[:, 0], cmax[:, 0], cmin[:, 1], cmax[:, 1]
+
+
+def _escaped_holes(coords, starts, stops, seg_ring_ids, flat):
+    """ Flag segments of the exteriors no longer containing their holes.
+    Only the segments whose original chains envelope the escaped hole
+    are flagged. The containment of the first hole vertices is tested
+    by the crossing number test against the simplified exteriors.
+    """
+    flagged = np.zeros(len(starts), 'bool')
+    ring_parts = np.repeat(
+        np.arange(flat.part_count), np.diff(flat.part_offsets)
+    )
+    is_hole = ~flat.exterior_mask()
+    holes = np.flatnonzero(is_hole)
+    segments = np.flatnonzero(~is_hole[seg_ring_ids])
+    if len(holes) == 0 or len(segments) == 0:
+        return flagged
+    hole_parts = ring_parts[holes]
+    seg_parts = ring_parts[seg_ring_ids[segments]]
+    points = coords[flat.ring_offsets[holes]]
+    point_a, point_b = coords[starts[segments]], coords[stops[segments]]
+
+    # crossing number test of the holes' first vertices
+    iseg, ipnt = _stab(
+        np.minimum(point_a[:, 1], point_b[:, 1]),
+        np.maximum(point_a[:, 1], point_b[:, 1]),
+        points[:, 1],
+    )
+    x_0, y_0 = points[ipnt, 0], points[ipnt, 1]
+    x_1, y_1 = point_a[iseg, 0], point_a[iseg, 1]
+    x_2, y_2 = point_b[iseg, 0], point_b[iseg, 1]
+    mask = (hole_parts[ipnt] == seg_parts[iseg]) & ((y_1 > y_0) != (y_2 > y_0))
+    x_c = x_1[mask] + (x_2[mask] - x_1[mask]) * (
+        (y_0[mask] - y_1[mask]) / (y_2[mask] - y_1[mask])
+    )
+    inside = np.bincount(
+        ipnt[mask][x_0[mask] < x_c], minlength=len(holes)
+    ) % 2 == 1
+    escaped = np.flatnonzero(~inside)
+    if len(escaped) == 0:
+        return flagged
+
+    # segments of the exteriors whose chains envelope the escaped holes
+    xmin, xmax, ymin, ymax = _chain_envelopes(
+        coords, starts[segments], stops[segments]
+    )
+    points, hole_parts = points[escaped], hole_parts[escaped]
+    iseg, ipnt = _stab(xmin, xmax, points[:, 0])
+    mask = (
+        (hole_parts[ipnt] == seg_parts[iseg]) &
+        (ymin[iseg] <= points[ipnt, 1]) & (ymax[iseg] >= points[ipnt, 1])
+    )
+    flagged[segments[iseg[mask]]] = True
+    return flagged
+
+
+def simplify_rings(flat, tolerance, preserve_topology=False):
+    """ Simplify all rings of the flat polygon or multi-polygon geometry
+    in one batch. Returns the boolean mask of the retained vertices.
+
+    The rings are simplified by the Douglas-Peucker algorithm with the ring
+    first and last vertex anchored. If the topology is preserved
+    the simplified segments crossing other segments, the segments of the
+    collapsed rings (less than four vertices) and the segments of the
+    exteriors escaping their holes are refined until the topology is
+    restored.
+    """
+    coords = flat.coords[:, :2]
+    ring_ids = flat.ring_ids()
+    starts = flat.ring_offsets[:-1]
+    stops = flat.ring_offsets[1:] - 1
+    mask = stops > starts
+    starts, stops = starts[mask], stops[mask]
+
+    keep = np.zeros(len(coords), 'bool')
+    keep[starts] = True
+    keep[stops] = True
+    _douglas_peucker(coords, starts, stops, tolerance, keep)
+
+    while preserve_topology:
+        starts, stops = _segments(keep, ring_ids)
+        seg_ring_ids = ring_ids[starts]
+        ring_counts = np.bincount(ring_ids[keep], minlength=flat.ring_count)
+        flagged = ring_counts[seg_ring_ids] < 4
+        flagged |= _crossing(coords, starts, stops)
+        if not flagged.any() and flat.part_count < flat.ring_count:
+            flagged |= _escaped_holes(
+                coords, starts, stops, seg_ring_ids, flat
+            )
+        flagged &= stops - starts > 1
+        if not flagged.any():
+            break
+        index, _ = _farthest(coords, starts[flagged], stops[flagged])
+        keep[index] = True
+
+    return keep
+
+
+def simplify(flat, tolerance, preserve_topology=False):
+    """ Simplify flat polygon or multi-polygon geometry. The collapsed rings
+    (less than four vertices) are removed. Polygons with collapsed exterior
+    are removed completely. The simplified geometry may become empty.
+    Unless the topology is preserved the rings may self-intersect
+    or cross each other (see img_geom.simplifyGeom for the repaired
+    variant).
+    """
+    if flat.type not in ("POLYGON", "MULTIPOLYGON"):
+        raise ValueError("Not a polygon!")
+    keep = simplify_rings(flat, tolerance, preserve_topology)
+    parts = []
+    for part in xrange(flat.part_count):
+        rings = []
+        for ring in xrange(flat.part_offsets[part], flat.part_offsets[part+1]):
+            ring_keep = keep[flat.ring_offsets[ring]:flat.ring_offsets[ring+1]]
+            if ring_keep.sum() < 4:
+                if not rings: # collapsed exterior
+                    break
+                continue
+            rings.append(flat.ring(ring)[ring_keep])
+        if rings:
+            parts.append(rings)
+    return FlatGeometry.from_parts(flat.type, parts, flat.dims)
@@ -0,0 +1,118 @@
+#-------------------------------------------------------------------------------
+#
+#  Shared spatial references and coordinate transformations
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2013 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+from collections import OrderedDict
+from osgeo import osr ; osr.UseExceptions()
+
+#-------------------------------------------------------------------------------
+# spatial references
+
+def createSRFromEPSG(epsg):
+    """ Create OSR Spatial Reference from EPSG number code"""
+    sr = osr.SpatialReference()
+    sr.ImportFromEPSG(epsg)
+    return sr
+
+
+# registry of the shared spatial references (populated on demand)
+_SR_REGISTRY = {}
+
+def getSRFromEPSG(epsg):
+    """ Get shared OSR Spatial Reference from EPSG number code.
+        The spatial reference is created on the first request and re-used
+        by all the following ones. The returned object must not be modified.
+    """
+    epsg = int(epsg)
+    try:
+        return _SR_REGISTRY[epsg]
+    except KeyError:
+        sr = _SR_REGISTRY[epsg] = createSRFromEPSG(epsg)
+        return sr
+
+
+class SRSequence(object):
+    """ Lazily populated sequence of shared spatial references
+        of consecutive EPSG codes.
+    """
+
+    def __init__(self, epsg_first, size):
+        self._epsg_first = epsg_first
+        self._size = size
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += self._size
+        if idx < 0 or idx >= self._size:
+            raise IndexError("Spatial reference index out of range!")
+        return getSRFromEPSG(self._epsg_first + idx)
+
+    def __iter__(self):
+        for idx in xrange(self._size):
+            yield self[idx]
+
+
+OSR_WGS84 = getSRFromEPSG(4326)
+
+OSR_UTM_N = SRSequence(32601, 60)
+OSR_UTM_S = SRSequence(32701, 60)
+
+#-------------------------------------------------------------------------------
+# cache of the coordinate transformations
+
+# maximum number of the cached coordinate transformations
+CT_CACHE_SIZE = 64
+
+_CT_CACHE = OrderedDict()
+
+def getCTransformation(sr_src, sr_dst):
+    """ Get OSR coordinate transformation between the given spatial
+        references. The transformations are cached (least recently used
+        ones are discarded first) and shared. The spatial references are
+        compared by their WKT representation.
+    """
+    key = (sr_src.ExportToWkt(), sr_dst.ExportToWkt())
+    try:
+        ct = _CT_CACHE.pop(key)
+    except KeyError:
+        ct = osr.CoordinateTransformation(sr_src, sr_dst)
+        while len(_CT_CACHE) >= CT_CACHE_SIZE:
+            _CT_CACHE.popitem(last=False)
+    _CT_CACHE[key] = ct
+    return ct
+
+
+def transformTo(geom, sr):
+    """ Transform geometry to the given spatial reference using the cached
+        coordinate transformation and return it.
+    """
+    geom.Transform(getCTransformation(geom.GetSpatialReference(), sr))
+    geom.AssignSpatialReference(sr)
+    return geom
@@ -0,0 +1,166 @@
+#-------------------------------------------------------------------------------
+#
+#  Geometry stream processing
+#
+#    Shared front-end of the geom_* tools processing streams of geometries
+#    (line-separated WKT or HEX-WKB, concatenated WKB or JSON, or OGR vector
+#    layers) in a pool of worker processes.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import sys
+from multiprocessing import Pool
+from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
+import img_geom as ig
+
+# number of geometries passed to a worker process at once
+STREAM_CHUNK_SIZE = 64
+
+
+def iter_geometries(input_, debug=False):
+    """ Iterate geometries read from a file or the standard input ('-').
+    An OGR vector data source (e.g., Shapefile or GeoPackage) is read layer
+    by layer. Any other input is parsed as a stream of geometries
+    (see img_geom.iterParseGeom).
+    """
+    if input_ != "-":
+        try:
+            datasource = ogr.Open(input_)
+        except RuntimeError:
+            datasource = None
+        if datasource is not None and datasource.GetLayerCount() > 0:
+            for geom in _iter_layers(datasource):
+                yield geom
+            return
+    fin = sys.stdin if input_ == "-" else open(input_)
+    for geom in ig.iterParseGeom(fin.read(), debug):
+        yield geom
+
+
+def _iter_layers(datasource):
+    """ Iterate geometries of all features of all layers. """
+    for idx in xrange(datasource.GetLayerCount()):
+        layer = datasource.GetLayer(idx)
+        sr = layer.GetSpatialRef()
+        for feature in layer:
+            geom = feature.GetGeometryRef()
+            if geom is None:
+                continue
+            geom = geom.Clone() # clone to avoid segfaults
+            if geom.GetSpatialReference() is None and sr is not None:
+                geom.AssignSpatialReference(sr)
+            yield geom
+
+
+def dump_geometry(geom, format_="WKB"):
+    """ Dump geometry as an item of the output stream. The JSON and KML
+    items are line-separated.
+    """
+    data = ig.dumpGeom(geom, format_)
+    if format_ in ("JSON", "KML"):
+        data += "\n"
+    return data
+
+
+class _Worker(object):
+    """ Apply function to a geometry and dump the result. The function
+    returns either a new geometry or the output string.
+    """
+
+    def __init__(self, function, format_):
+        self.function = function
+        self.format_ = format_
+
+    def __call__(self, geom):
+        result = self.function(geom)
+        if isinstance(result, basestring):
+            return result
+        return dump_geometry(result, self.format_)
+
+
+# per-process worker and spatial references
+_WORKER = None
+_SR_CACHE = {}
+
+
+def _init_process(worker):
+    """ Set the worker of the pool process. The worker is inherited by
+    the forked process and therefore it does not need to be pickled.
+    """
+    global _WORKER # pylint: disable=global-statement
+    _WORKER = worker
+
+
+def _pack(geom):
+    """ Pack geometry passed to the pool process. """
+    return geom.ExportToWkb(), ig.dumpSR(geom.GetSpatialReference())
+
+
+def _process(item):
+    """ Unpack geometry and apply the worker. (Pool process.) """
+    wkb, srs = item
+    geom = ogr.CreateGeometryFromWkb(wkb)
+    if srs:
+        try:
+            sr = _SR_CACHE[srs]
+        except KeyError:
+            sr = _SR_CACHE[srs] = ig.parseSR(srs)
+        geom.AssignSpatialReference(sr)
+    return _WORKER(geom)
+
+
+def process_stream(function, geoms, format_="WKB", jobs=1,
+                   chunksize=STREAM_CHUNK_SIZE):
+    """ Apply function to a sequence of geometries and iterate the dumped
+    results in the input order. The function gets a geometry and returns
+    either a new geometry (dumped in the given format) or an output string.
+    For more than one job the geometries are processed in a pool of worker
+    processes passing the geometries as WKB.
+    """
+    worker = _Worker(function, format_)
+    if jobs <= 1:
+        for geom in geoms:
+            yield worker(geom)
+        return
+
+    pool = Pool(jobs, _init_process, (worker,))
+    try:
+        for data in pool.imap(_process, (_pack(g) for g in geoms), chunksize):
+            yield data
+    finally:
+        pool.terminate()
+        pool.join()
+
+
+def run(function, input_, format_="WKB", jobs=1, debug=False, output=None):
+    """ Apply function to all geometries read from the input (see
+    iter_geometries) and write the results to the output stream
+    (by default stdout).
+    """
+    output = sys.stdout if output is None else output
+    for data in process_stream(
+            function, iter_geometries(input_, debug), format_, jobs
+        ):
+        output.write(data)
@@ -0,0 +1,344 @@
+#-------------------------------------------------------------------------------
+#
+#  TWKB geometry encoding
+#
+#    Compact Tiny WKB (TWKB) encoding of the flat geometries (see img_wkb).
+#    The coordinates are quantised to the given number of decimal digits,
+#    delta-encoded and stored as the zig-zag variable-length integers.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import numpy as np
+from img_wkb import (
+    FlatGeometry, TYPE_NAME, TYPE_CODE, NDIM,
+    WKB_POINT, WKB_LINESTRING, WKB_POLYGON, WKB_MULTIPOINT,
+    WKB_MULTILINESTRING, WKB_MULTIPOLYGON,
+)
+
+# metadata header flags
+_TWKB_BBOX = 0x01
+_TWKB_SIZE = 0x02
+_TWKB_IDLIST = 0x04
+_TWKB_EXTENDED_DIMS = 0x08
+_TWKB_EMPTY = 0x10
+
+# extended dimensions flags
+_TWKB_HAS_Z = 0x01
+_TWKB_HAS_M = 0x02
+
+# supported geometry types (geometry collections are not supported)
+_TWKB_TYPES = (
+    WKB_POINT, WKB_LINESTRING, WKB_POLYGON, WKB_MULTIPOINT,
+    WKB_MULTILINESTRING, WKB_MULTIPOLYGON,
+)
+
+#------------------------------------------------------------------------------
+# variable-length integers
+
+def _zigzag(values):
+    """ Zig-zag encode signed 64-bit integers. """
+    values = np.asarray(values, 'int64')
+    return ((values << 1) ^ (values >> 63)).astype('uint64')
+
+
+def _unzigzag(values):
+    """ Zig-zag decode unsigned 64-bit integers. """
+    values = np.asarray(values, 'uint64')
+    return (
+        (values >> np.uint64(1)).astype('int64') ^
+        -(values & np.uint64(1)).astype('int64')
+    )
+
+
+def _encode_varints(values):
+    """ Encode array of unsigned integers as variable-length integers. """
+    values = np.asarray(values, 'uint64')
+    nbytes = np.ones(values.shape, 'int64')
+    rest = values >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+    starts = np.cumsum(nbytes) - nbytes
+    output = np.empty(nbytes.sum(), 'uint8')
+    for idx in xrange(nbytes.max() if len(nbytes) else 0):
+        mask = nbytes > idx
+        output[starts[mask] + idx] = (
+            (values[mask] >> np.uint64(7 * idx)) & np.uint64(0x7f)
+        ).astype('uint8') | np.where(nbytes[mask] > idx + 1, 0x80, 0x00)
+    return output.tobytes()
+
+
+def _decode_varints(data):
+    """ Decode array of variable-length integers. Returns the decoded
+    values and the end offsets of the values in bytes.
+    """
+    data = np.frombuffer(data, 'uint8')
+    ends = np.flatnonzero(data < 0x80) + 1
+    starts = np.concatenate(([0], ends[:-1])).astype('int64')
+    lengths = ends - starts
+    values = np.zeros(len(ends), 'uint64')
+    for idx in xrange(lengths.max() if len(lengths) else 0):
+        mask = lengths > idx
+        values[mask] |= (
+            data[starts[mask] + idx] & 0x7f
+        ).astype('uint64') << np.uint64(7 * idx)
+    return values, ends
+
+
+def _read_varint(buf, offset):
+    """ Read one variable-length integer. """
+    value, shift = 0, 0
+    while True:
+        try:
+            byte = ord(buf[offset:offset+1])
+        except TypeError:
+            raise ValueError("Truncated TWKB buffer!")
+        value |= (byte & 0x7f) << shift
+        offset += 1
+        shift += 7
+        if byte < 0x80:
+            return value, offset
+
+#------------------------------------------------------------------------------
+# TWKB reader
+
+def _read_header(buf, offset):
+    """ Read TWKB header. Returns type code, dimensions, scale factors
+    of the dimensions, metadata flags and the new offset.
+    """
+    if len(buf) < offset + 2:
+        raise ValueError("Truncated TWKB buffer!")
+    type_byte, flags = ord(buf[offset:offset+1]), ord(buf[offset+1:offset+2])
+    offset += 2
+    code = type_byte & 0x0f
+    if code not in _TWKB_TYPES or flags & 0xe0:
+        raise ValueError("Invalid TWKB header!")
+    precision = int(_unzigzag(type_byte >> 4))
+    dims, scales = "XY", [10.0 ** precision] * 2
+    if flags & _TWKB_EXTENDED_DIMS:
+        if len(buf) < offset + 1:
+            raise ValueError("Truncated TWKB buffer!")
+        ext = ord(buf[offset:offset+1])
+        offset += 1
+        if ext & _TWKB_HAS_Z:
+            dims += "Z"
+            scales.append(10.0 ** ((ext >> 2) & 0x07))
+        if ext & _TWKB_HAS_M:
+            dims += "M"
+            scales.append(10.0 ** ((ext >> 5) & 0x07))
+    return code, dims, np.array(scales), flags, offset
+
+
+def is_twkb(buf, offset=0):
+    """ Check whether the buffer starts with a valid TWKB header. """
+    try:
+        _read_header(buf, offset)
+    except ValueError:
+        return False
+    return True
+
+
+def load(buf, offset=0):
+    """ Parse TWKB geometry starting at the given offset of the buffer.
+    Returns the FlatGeometry object and offset of the end of the parsed
+    geometry.
+    """
+    code, dims, scales, flags, offset = _read_header(buf, offset)
+    ndim = NDIM[dims]
+    end = offset if flags & _TWKB_EMPTY else len(buf)
+    if flags & _TWKB_SIZE:
+        size_, offset = _read_varint(buf, offset)
+        end = offset + size_
+        if end > len(buf):
+            raise ValueError("Truncated TWKB buffer!")
+
+    if flags & _TWKB_EMPTY:
+        return FlatGeometry(
+            TYPE_NAME[code], np.empty((0, ndim)), [0], [0], dims
+        ), end
+
+    values, ends = _decode_varints(buf[offset:end])
+    position = [2 * ndim if flags & _TWKB_BBOX else 0]
+    blocks, ring_sizes, part_sizes = [], [], []
+
+    def _count():
+        try:
+            value = int(values[position[0]])
+        except IndexError:
+            raise ValueError("Truncated TWKB buffer!")
+        position[0] += 1
+        return value
+
+    def _ring(count):
+        start = position[0]
+        position[0] += count * ndim
+        if position[0] > len(values):
+            raise ValueError("Truncated TWKB buffer!")
+        blocks.append(values[start:position[0]])
+        ring_sizes.append(count)
+
+    if code == WKB_POINT:
+        _ring(1)
+        part_sizes.append(1)
+    elif code in (WKB_LINESTRING, WKB_POLYGON):
+        nparts = 1
+    else:
+        nparts = _count()
+        if flags & _TWKB_IDLIST:
+            position[0] += nparts
+    if code != WKB_POINT:
+        is_multi = code in (WKB_MULTILINESTRING, WKB_MULTIPOLYGON)
+        for _ in xrange(nparts):
+            if code == WKB_MULTIPOINT:
+                _ring(1)
+                part_sizes.append(1)
+            elif code in (WKB_LINESTRING, WKB_MULTILINESTRING):
+                count = _count()
+                if count > 0:
+                    _ring(count)
+                if count > 0 or is_multi: # empty members kept
+                    part_sizes.append(1 if count > 0 else 0)
+            else:
+                nring = _count()
+                for _ in xrange(nring):
+                    _ring(_count())
+                if nring > 0 or is_multi: # empty members kept
+                    part_sizes.append(nring)
+
+    coords = _unzigzag(
+        np.concatenate(blocks) if blocks else np.empty(0, 'uint64')
+    ).reshape((-1, ndim))
+    coords = np.cumsum(coords, axis=0) / scales
+    if not flags & _TWKB_SIZE:
+        end = offset + (ends[position[0] - 1] if position[0] > 0 else 0)
+
+    return FlatGeometry(
+        TYPE_NAME[code], coords,
+        np.concatenate(([0], np.cumsum(ring_sizes, dtype='int64'))),
+        np.concatenate(([0], np.cumsum(part_sizes, dtype='int64'))),
+        dims
+    ), end
+
+
+def loads(buf):
+    """ Parse TWKB geometry. """
+    return load(buf)[0]
+
+
+def size(buf, offset=0):
+    """ Get size in bytes of the TWKB geometry starting at the given offset
+    of the buffer.
+    """
+    start = offset
+    _, _, _, flags, offset = _read_header(buf, offset)
+    if flags & _TWKB_SIZE:
+        size_, offset = _read_varint(buf, offset)
+        if offset + size_ > len(buf):
+            raise ValueError("Truncated TWKB buffer!")
+        return offset + size_ - start
+    return load(buf, start)[1] - start
+
+#------------------------------------------------------------------------------
+# TWKB writer
+
+def dumps(geom, precision=7, z_precision=None, m_precision=None):
+    """ Dump flat geometry as a TWKB buffer. The X and Y coordinates are
+    rounded to the given number of decimal digits (-8 to 7). The Z and M
+    coordinates are rounded to the given number of digits (0 to 7)
+    defaulting to the clipped X and Y precision.
+    """
+    code = TYPE_CODE[geom.type]
+    if code not in _TWKB_TYPES:
+        raise ValueError("Geometry collections are not supported!")
+    if not -8 <= precision <= 7:
+        raise ValueError("Invalid TWKB precision %r!" % precision)
+
+    def _ext_precision(value):
+        value = min(max(precision, 0), 7) if value is None else value
+        if not 0 <= value <= 7:
+            raise ValueError("Invalid TWKB precision %r!" % value)
+        return value
+
+    header = chr((int(_zigzag(precision)) & 0x0f) << 4 | code)
+    flags = 0
+    scales = [10.0 ** precision] * 2
+    ext = ""
+    if geom.dims != "XY":
+        flags |= _TWKB_EXTENDED_DIMS
+        ext_byte = 0
+        if "Z" in geom.dims:
+            z_precision = _ext_precision(z_precision)
+            ext_byte |= _TWKB_HAS_Z | z_precision << 2
+            scales.append(10.0 ** z_precision)
+        if "M" in geom.dims:
+            m_precision = _ext_precision(m_precision)
+            ext_byte |= _TWKB_HAS_M | m_precision << 5
+            scales.append(10.0 ** m_precision)
+        ext = chr(ext_byte)
+
+    if geom.is_empty():
+        return header + chr(flags | _TWKB_EMPTY) + ext
+
+    # quantised delta-encoded coordinates
+    quantised = np.round(geom.coords * scales).astype('int64')
+    deltas = np.diff(quantised, axis=0)
+    coords = _zigzag(np.vstack((quantised[:1], deltas))).ravel()
+
+    ndim = geom.ndim
+    offsets = geom.ring_offsets * ndim
+    chunks = []
+
+    def _ring(idx, with_count=True):
+        if with_count:
+            chunks.append([geom.ring_offsets[idx+1] - geom.ring_offsets[idx]])
+        chunks.append(coords[offsets[idx]:offsets[idx+1]])
+
+    parts = xrange(geom.part_count)
+    if code == WKB_MULTIPOINT:
+        # TWKB cannot encode the empty points of a multi-point
+        parts = np.flatnonzero(np.diff(geom.part_offsets) > 0)
+    if code in (WKB_MULTIPOINT, WKB_MULTILINESTRING, WKB_MULTIPOLYGON):
+        chunks.append([len(parts)])
+    for part in parts:
+        first, last = geom.part_offsets[part], geom.part_offsets[part+1]
+        if code in (WKB_POINT, WKB_MULTIPOINT):
+            _ring(first, False)
+        elif code in (WKB_LINESTRING, WKB_MULTILINESTRING):
+            if last > first:
+                _ring(first)
+            else: # empty line-string
+                chunks.append([0])
+        else:
+            chunks.append([last - first])
+            for idx in xrange(first, last):
+                _ring(idx)
+
+    body = _encode_varints(np.concatenate([
+        np.asarray(chunk, 'uint64') for chunk in chunks
+    ]))
+    return b"".join([
+        header, chr(flags | _TWKB_SIZE), ext,
+        _encode_varints([len(body)]), body,
+    ])
@@ -0,0 +1,440 @@
+#-------------------------------------------------------------------------------
+#
+#  Native WKB codec
+#
+#    Pure NumPy reader and writer of the Well Known Binary (WKB) geometries.
+#    The geometries are exposed as flat coordinate buffers plus ring and part
+#    offset arrays so that the geometry tools can work on the coordinates
+#    without the per-vertex OGR calls.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import struct
+import numpy as np
+
+# WKB geometry type codes
+WKB_POINT = 1
+WKB_LINESTRING = 2
+WKB_POLYGON = 3
+WKB_MULTIPOINT = 4
+WKB_MULTILINESTRING = 5
+WKB_MULTIPOLYGON = 6
+WKB_GEOMETRYCOLLECTION = 7
+
+# geometry type names
+TYPE_NAME = {
+    WKB_POINT: "POINT",
+    WKB_LINESTRING: "LINESTRING",
+    WKB_POLYGON: "POLYGON",
+    WKB_MULTIPOINT: "MULTIPOINT",
+    WKB_MULTILINESTRING: "MULTILINESTRING",
+    WKB_MULTIPOLYGON: "MULTIPOLYGON",
+    WKB_GEOMETRYCOLLECTION: "GEOMETRYCOLLECTION",
+}
+TYPE_CODE = dict((name, code) for code, name in TYPE_NAME.items())
+
+# multi-geometries and their parts
+MULTI_PART = {
+    WKB_MULTIPOINT: WKB_POINT,
+    WKB_MULTILINESTRING: WKB_LINESTRING,
+    WKB_MULTIPOLYGON: WKB_POLYGON,
+}
+
+# coordinate dimensions
+DIMS = ("XY", "XYZ", "XYM", "XYZM")
+NDIM = {"XY": 2, "XYZ": 3, "XYM": 3, "XYZM": 4}
+
+# byte order markers
+_BYTE_ORDER = {0: ">", 1: "<"}
+
+# flags of the extended (OGR 2.5D / EWKB) type codes
+_WKB_Z_FLAG = 0x80000000
+_WKB_M_FLAG = 0x40000000
+_WKB_SRID_FLAG = 0x20000000
+
+
+class FlatGeometry(object):
+    """ Simple geometry (point, line-string, polygon or their multi-geometry
+    variants) stored as flat arrays:
+
+        coords        (N, ndim) float64 array of all vertices
+        ring_offsets  (R + 1) int array, coordinates of the i-th ring
+                      (point or line-string) are
+                      coords[ring_offsets[i]:ring_offsets[i+1]]
+        part_offsets  (P + 1) int array, rings of the j-th part (point,
+                      line-string or polygon) are the rings
+                      part_offsets[j] ... part_offsets[j+1] - 1
+
+    Points and line-strings are stored as single-ring parts. The single
+    geometries (point, line-string, polygon) have one part unless empty.
+    The empty members of the multi-geometries are kept as parts without
+    any ring.
+    """
+
+    def __init__(self, type_, coords, ring_offsets, part_offsets, dims="XY"):
+        if type_ not in TYPE_CODE:
+            raise ValueError("Invalid geometry type %r!" % type_)
+        self.type = type_
+        self.dims = dims
+        self.coords = np.asarray(coords, 'float64').reshape(
+            (-1, NDIM[dims])
+        )
+        self.ring_offsets = np.asarray(ring_offsets, 'int64')
+        self.part_offsets = np.asarray(part_offsets, 'int64')
+
+    def __str__(self):
+        return "%s(%s, parts=%d, rings=%d, coords=%d)" % (
+            self.__class__.__name__, self.type, self.part_count,
+            self.ring_count, len(self.coords)
+        )
+
+    @classmethod
+    def from_parts(cls, type_, parts, dims="XY"):
+        """ Create flat geometry from a list of parts, each part being a list
+        of coordinate arrays (rings).
+        """
+        ring_sizes = [len(ring) for part in parts for ring in part]
+        part_sizes = [len(part) for part in parts]
+        rings = [ring for part in parts for ring in part]
+        ndim = NDIM[dims]
+        return cls(
+            type_,
+            np.concatenate(rings) if rings else np.empty((0, ndim)),
+            np.concatenate(([0], np.cumsum(ring_sizes, dtype='int64'))),
+            np.concatenate(([0], np.cumsum(part_sizes, dtype='int64'))),
+            dims,
+        )
+
+    @property
+    def ndim(self):
+        """ Number of the coordinate dimensions. """
+        return NDIM[self.dims]
+
+    @property
+    def ring_count(self):
+        """ Number of the rings. """
+        return len(self.ring_offsets) - 1
+
+    @property
+    def part_count(self):
+        """ Number of the parts. """
+        return len(self.part_offsets) - 1
+
+    @property
+    def ring_sizes(self):
+        """ Array of the ring sizes. """
+        return np.diff(self.ring_offsets)
+
+    def is_empty(self):
+        """ True if the geometry has no vertices. """
+        return len(self.coords) == 0
+
+    def ring(self, idx):
+        """ Get coordinates of the given ring. """
+        return self.coords[self.ring_offsets[idx]:self.ring_offsets[idx+1]]
+
+    def rings(self):
+        """ Iterate coordinate arrays of all rings. """
+        for idx in xrange(self.ring_count):
+            yield self.ring(idx)
+
+    def part(self, idx):
+        """ Get list of the coordinate arrays of the given part. """
+        return [
+            self.ring(ridx) for ridx
+            in xrange(self.part_offsets[idx], self.part_offsets[idx+1])
+        ]
+
+    def parts(self):
+        """ Iterate lists of the coordinate arrays of all parts. """
+        for idx in xrange(self.part_count):
+            yield self.part(idx)
+
+    def ring_ids(self):
+        """ Get array of the ring indices of all vertices. """
+        return np.repeat(np.arange(self.ring_count), self.ring_sizes)
+
+    def exterior_mask(self):
+        """ Get boolean mask of the exterior rings, i.e., the first rings
+        of the parts.
+        """
+        mask = np.zeros(self.ring_count, 'bool')
+        mask[self.part_offsets[:-1][np.diff(self.part_offsets) > 0]] = True
+        return mask
+
+    def envelope(self):
+        """ Get envelope as (xmin, xmax, ymin, ymax) tuple (i.e., the same
+        ordering as the OGR Geometry.GetEnvelope() method) or None for
+        an empty geometry.
+        """
+        if self.is_empty():
+            return None
+        xy_min = self.coords[:, :2].min(axis=0)
+        xy_max = self.coords[:, :2].max(axis=0)
+        return (xy_min[0], xy_max[0], xy_min[1], xy_max[1])
+
+    def copy(self, coords=None):
+        """ Get a copy of the geometry, optionally with new coordinates. """
+        return FlatGeometry(
+            self.type, self.coords.copy() if coords is None else coords,
+            self.ring_offsets.copy(), self.part_offsets.copy(), self.dims,
+        )
+
+    def xy(self):
+        """ Get a 2D copy of the geometry (Z and M dimensions are dropped). """
+        return FlatGeometry(
+            self.type, self.coords[:, :2], self.ring_offsets,
+            self.part_offsets, "XY",
+        )
+
+
+#------------------------------------------------------------------------------
+# WKB reader
+
+def _read_header(buf, offset):
+    """ Read WKB header. Returns byte order, type code, dimensions and
+    the new offset.
+    """
+    try:
+        byte_order = _BYTE_ORDER[ord(buf[offset:offset+1])]
+    except (KeyError, TypeError):
+        raise ValueError("Invalid WKB byte order marker!")
+    code, = struct.unpack_from(byte_order + "I", buf, offset + 1)
+    offset += 5
+
+    has_z = bool(code & _WKB_Z_FLAG)
+    has_m = bool(code & _WKB_M_FLAG)
+    if code & _WKB_SRID_FLAG: # EWKB SRID - ignored
+        offset += 4
+    code &= 0x0fffffff
+    iso_dims, code = divmod(code, 1000)
+    if iso_dims in (1, 3):
+        has_z = True
+    if iso_dims in (2, 3):
+        has_m = True
+    if code not in TYPE_NAME or iso_dims > 3:
+        raise ValueError("Invalid WKB geometry type!")
+
+    dims = "XY" + ("Z" if has_z else "") + ("M" if has_m else "")
+    return byte_order, code, dims, offset
+
+
+def _read_count(buf, offset, byte_order):
+    """ Read WKB 32-bit unsigned count. """
+    return struct.unpack_from(byte_order + "I", buf, offset)[0], offset + 4
+
+
+def _read_coords(buf, offset, byte_order, count, ndim):
+    """ Read array of coordinates. """
+    if offset + 8 * count * ndim > len(buf):
+        raise ValueError("Truncated WKB buffer!")
+    coords = np.frombuffer(
+        buf, byte_order + "f8", count * ndim, offset
+    ).astype('float64').reshape((count, ndim))
+    return coords, offset + 8 * count * ndim
+
+
+def _read_simple(buf, offset, byte_order, code, dims, rings, ring_sizes):
+    """ Read body of a simple geometry. Returns number of the rings. """
+    ndim = NDIM[dims]
+    if code == WKB_POINT:
+        coords, offset = _read_coords(buf, offset, byte_order, 1, ndim)
+        if np.isnan(coords).all(): # empty point
+            return 0, offset
+        rings.append(coords)
+        ring_sizes.append(1)
+        return 1, offset
+    elif code == WKB_LINESTRING:
+        count, offset = _read_count(buf, offset, byte_order)
+        coords, offset = _read_coords(buf, offset, byte_order, count, ndim)
+        if count == 0:
+            return 0, offset
+        rings.append(coords)
+        ring_sizes.append(count)
+        return 1, offset
+    elif code == WKB_POLYGON:
+        nring, offset = _read_count(buf, offset, byte_order)
+        for _ in xrange(nring):
+            count, offset = _read_count(buf, offset, byte_order)
+            coords, offset = _read_coords(buf, offset, byte_order, count, ndim)
+            rings.append(coords)
+            ring_sizes.append(count)
+        return nring, offset
+    raise ValueError("Unexpected WKB geometry type %s!" % TYPE_NAME[code])
+
+
+def load(buf, offset=0):
+    """ Parse WKB geometry starting at the given offset of the buffer.
+    Returns the FlatGeometry object and offset of the end of the parsed
+    geometry.
+    """
+    try:
+        byte_order, code, dims, offset = _read_header(buf, offset)
+        rings, ring_sizes, part_sizes = [], [], []
+
+        if code in MULTI_PART:
+            nparts, offset = _read_count(buf, offset, byte_order)
+            for _ in xrange(nparts):
+                part_order, part_code, part_dims, offset = _read_header(
+                    buf, offset
+                )
+                if part_code != MULTI_PART[code]:
+                    raise ValueError("Invalid WKB multi-geometry part!")
+                nring, offset = _read_simple(
+                    buf, offset, part_order, part_code, part_dims,
+                    rings, ring_sizes
+                )
+                part_sizes.append(nring) # empty members kept
+        elif code == WKB_GEOMETRYCOLLECTION:
+            raise ValueError("Geometry collections are not supported!")
+        else:
+            nring, offset = _read_simple(
+                buf, offset, byte_order, code, dims, rings, ring_sizes
+            )
+            if nring > 0:
+                part_sizes.append(nring)
+
+    except struct.error:
+        raise ValueError("Truncated WKB buffer!")
+
+    ndim = NDIM[dims]
+    return FlatGeometry(
+        TYPE_NAME[code],
+        np.concatenate(rings) if rings else np.empty((0, ndim)),
+        np.concatenate(([0], np.cumsum(ring_sizes, dtype='int64'))),
+        np.concatenate(([0], np.cumsum(part_sizes, dtype='int64'))),
+        dims
+    ), offset
+
+
+def geometry_type(buf, offset=0):
+    """ Get type name of the WKB geometry starting at the given offset
+    of the buffer. ValueError is raised if there is no valid WKB header.
+    """
+    try:
+        return TYPE_NAME[_read_header(buf, offset)[1]]
+    except struct.error:
+        raise ValueError("Truncated WKB buffer!")
+
+
+def loads(buf):
+    """ Parse WKB geometry. """
+    return load(buf)[0]
+
+
+def size(buf, offset=0):
+    """ Get size in bytes of the WKB geometry starting at the given offset
+    of the buffer. Unlike the load() function, the geometry collections
+    are supported.
+    """
+    try:
+        start = offset
+        byte_order, code, dims, offset = _read_header(buf, offset)
+        ndim = NDIM[dims]
+        if code == WKB_POINT:
+            offset += 8 * ndim
+        elif code == WKB_LINESTRING:
+            count, offset = _read_count(buf, offset, byte_order)
+            offset += 8 * ndim * count
+        elif code == WKB_POLYGON:
+            nring, offset = _read_count(buf, offset, byte_order)
+            for _ in xrange(nring):
+                count, offset = _read_count(buf, offset, byte_order)
+                offset += 8 * ndim * count
+        else: # multi-geometries and collections
+            nparts, offset = _read_count(buf, offset, byte_order)
+            for _ in xrange(nparts):
+                offset += size(buf, offset)
+    except struct.error:
+        raise ValueError("Truncated WKB buffer!")
+    if offset > len(buf):
+        raise ValueError("Truncated WKB buffer!")
+    return offset - start
+
+
+#------------------------------------------------------------------------------
+# WKB writer
+
+def _type_code(code, dims):
+    """ Get WKB type code for the given dimensions. The Z-only geometries
+    use the OGR 2.5D flag, any other the ISO codes.
+    """
+    if dims == "XYZ":
+        return code | _WKB_Z_FLAG
+    return code + 1000 * DIMS.index(dims)
+
+
+def _pack_coords(coords, byte_order):
+    """ Pack coordinates. """
+    return np.ascontiguousarray(coords, byte_order + "f8").tobytes()
+
+
+def _dump_simple(code, rings, dims, byte_order):
+    """ Dump simple geometry. """
+    header = struct.pack(
+        byte_order + "BI", 1 if byte_order == "<" else 0, _type_code(code, dims)
+    )
+    if code == WKB_POINT:
+        if not rings:
+            return header + _pack_coords(
+                np.nan * np.ones(NDIM[dims]), byte_order
+            )
+        return header + _pack_coords(rings[0][:1], byte_order)
+    elif code == WKB_LINESTRING:
+        coords = rings[0] if rings else np.empty((0, NDIM[dims]))
+        return b"".join([
+            header, struct.pack(byte_order + "I", len(coords)),
+            _pack_coords(coords, byte_order),
+        ])
+    elif code == WKB_POLYGON:
+        chunks = [header, struct.pack(byte_order + "I", len(rings))]
+        for ring in rings:
+            chunks.append(struct.pack(byte_order + "I", len(ring)))
+            chunks.append(_pack_coords(ring, byte_order))
+        return b"".join(chunks)
+    raise ValueError("Unexpected geometry type %s!" % TYPE_NAME[code])
+
+
+def dumps(geom, byte_order="<"):
+    """ Dump flat geometry as a WKB buffer. The byte order is either
+    "<" (little endian, default) or ">" (big endian).
+    """
+    code = TYPE_CODE[geom.type]
+    if code in MULTI_PART:
+        header = struct.pack(
+            byte_order + "BII", 1 if byte_order == "<" else 0,
+            _type_code(code, geom.dims), geom.part_count
+        )
+        return header + b"".join(
+            _dump_simple(MULTI_PART[code], part, geom.dims, byte_order)
+            for part in geom.parts()
+        )
+    elif code == WKB_GEOMETRYCOLLECTION:
+        raise ValueError("Geometry collections are not supported!")
+    else:
+        return _dump_simple(
+            code, geom.part(0) if geom.part_count > 0 else [],
+            geom.dims, byte_order
+        )
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+#  Fused mask-to-footprint pipeline.
+#
+#    This tool extracts the valid data mask from the input image, optionally
+#    smooths it, vectorizes it, optionally simplifies the vector outline
+#    and projects it to WGS84. The input image is read only once and
+#    the intermediate masks are held in memory. The whole chain is equivalent
+#    to:
+#      extract_mask.py | smooth_mask.py | extract_mask_footprint.py |
+#      geom_simplify.py | geom_to_wgs84.py
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import sys
+from os.path import basename
+from numpy import dtype
+from osgeo import ogr; ogr.UseExceptions() # pylint: disable=multiple-statements
+from osgeo import osr; osr.UseExceptions() # pylint: disable=multiple-statements
+from img import ImageFileReader, create_memory_image, Progress, execute
+from img.cli import error
+from img_geom import OUTPUT_FORMATS, setSR, dumpGeom, mapToWGS84
+from img_vectorize import vectorize
+from geom_simplify import simplify_geometry
+import extract_mask
+import smooth_mask
+
+MASKBG = 0x00
+MASKFG = 0xFF
+
+# default smoothing threshold
+DEF_THRESHOLD = 0.5
+
+# tile size used by the pipeline stages
+TILE_SIZE = (512, 512)
+
+
+def usage():
+    """ Print simple usage help. """
+    exename = basename(sys.argv[0])
+
+    def _generate_():
+        yield (
+            "USAGE: %s <input image> <no data values> [ALL_VALID|ANY_VALID] "
+            "[SMOOTH:<threshold>,<radius>] [SIMPLIFY:<tolerance>] [NATIVE] "
+            "[%s] [DEBUG]" % (exename, "|".join(OUTPUT_FORMATS))
+        )
+        yield "EXAMPLE: %s input.tif 0,0,0 SMOOTH:0.5,20 SIMPLIFY:100" % exename
+        yield "DESCRIPTION:"
+        yield "  Extract footprint of the valid image data in one pass."
+        yield "  The footprint is smoothed only if the SMOOTH option is given"
+        yield "  (see smooth_mask.py) and simplified only if the SIMPLIFY"
+        yield "  option is given (see geom_simplify.py). The simplification"
+        yield "  tolerance is in the units of the image projection. The output"
+        yield "  is projected to WGS84 unless the NATIVE option is given."
+        yield "  By default the output is dumped in the WKB format."
+
+    for line in _generate_():
+        print >>sys.stderr, line
+
+
+def extract_footprint(input_image, nodata, all_valid=False, smooth=None,
+                      gslen=0.0, to_wgs84=True, progress_output=None):
+    """ Extract footprint of the valid image data.
+
+        input_image     path or GDAL dataset of the input image
+        nodata          list of the band no-data values
+        all_valid       if True all bands must contain valid data
+        smooth          optional (<threshold>, <radius>) tuple of the mask
+                        smoothing parameters
+        gslen           simplification tolerance (simplification is skipped
+                        if not positive)
+        to_wgs84        if True the footprint is projected to WGS84
+        progress_output optional file-stream receiving the progress
+    """
+    #pylint: disable=too-many-arguments
+    img_in = ImageFileReader(input_image)
+
+    geocoding = img_in.geocoding
+    if 'geotrn' not in geocoding:
+        raise ValueError("The image must be rectified and geocoded!")
+
+    # convert no-data values to the image's data type
+    if len(nodata) == 1 and len(img_in) > 1:
+        nodata = list(nodata) * len(img_in)
+    nodata = [dtype(dt).type(nd) for dt, nd in zip(img_in.dtypes, nodata)]
+
+    def _execute(img_out, process, args):
+        progress = None
+        if progress_output:
+            progress = Progress(
+                progress_output, img_out.tile_count(TILE_SIZE)
+            )
+        execute(img_out.tiles(TILE_SIZE), process, args, progress=progress)
+
+    def _create_mask():
+        params = {
+            'nrow': img_in.size.y,
+            'ncol': img_in.size.x,
+            'nband': 1,
+            'dtype': 'uint8',
+        }
+        params.update(geocoding)
+        return create_memory_image(**params)
+
+    # stage 1 - extract the data mask (the only read of the input image)
+    img_mask = _create_mask()
+    _execute(img_mask, extract_mask.process, (
+        img_in, img_mask, nodata, all_valid
+    ))
+
+    # stage 2 - smooth the mask
+    if smooth:
+        threshold, whs = smooth
+        threshold = max(0.0, min(1.0, float(threshold)))
+        whs = max(1, int(whs))
+        img_smooth = _create_mask()
+        _execute(img_smooth, smooth_mask.process, (
+            img_mask, img_smooth, threshold, whs, MASKBG, MASKFG,
+        ))
+        img_mask = img_smooth
+
+    # stage 3 - vectorize the mask
+    sref = osr.SpatialReference(geocoding['proj'])
+    geom = setSR(vectorize(img_mask[0], lambda v: v == MASKFG), sref)
+    del img_mask
+
+    # stage 4 - simplify the outline
+    if gslen > 0:
+        geom = setSR(simplify_geometry(geom, gslen), sref)
+
+    # stage 5 - project to WGS84
+    if to_wgs84:
+        geom = mapToWGS84(geom)
+
+    return geom
+
+
+if __name__ == "__main__":
+    ALL_VALID = False
+    SMOOTH = None
+    GSLEN = 0.0
+    TO_WGS84 = True
+    DEBUG = False
+    FORMAT = "WKB"
+    try:
+        INPUT = sys.argv[1]
+        NODATA = sys.argv[2].split(",")
+        for opt in sys.argv[3:]:
+            if opt.upper() == "ALL_VALID":
+                ALL_VALID = True
+            elif opt.upper() == "ANY_VALID":
+                ALL_VALID = False
+            elif opt.startswith("SMOOTH:"):
+                SMOOTH = opt.split(":", 1)[-1].split(",")
+                if len(SMOOTH) == 1:
+                    SMOOTH = [DEF_THRESHOLD] + SMOOTH
+                SMOOTH = (float(SMOOTH[0]), int(SMOOTH[1]))
+            elif opt.startswith("SIMPLIFY:"):
+                GSLEN = float(opt.split(":", 1)[-1])
+            elif opt == "NATIVE":
+                TO_WGS84 = False
+            elif opt in OUTPUT_FORMATS:
+                FORMAT = opt # output format
+            elif opt == "DEBUG":
+                DEBUG = True # dump debugging output
+            else:
+                raise ValueError("Invalid option %r!" % opt)
+    except IndexError:
+        error("Not enough input arguments!")
+        usage()
+        sys.exit(1)
+    except ValueError as exc:
+        error(exc)
+        usage()
+        sys.exit(1)
+
+    try:
+        GEOM = extract_footprint(
+            INPUT, NODATA, ALL_VALID, SMOOTH, GSLEN, TO_WGS84,
+            progress_output=(sys.stderr if DEBUG else None),
+        )
+        sys.stdout.write(dumpGeom(GEOM, FORMAT))
+    except Exception as exc:
+        error(exc)
+        sys.exit(1)
@@ -33,6 +33,7 @@
 import sys
 import re
 from math import floor
+import numpy as np
 import img_geom as ig
 from osgeo import osr ; osr.UseExceptions()
 
@@ -164,6 +165,233 @@ def getUTM2MGRSSqId(east, north, utmz, is_north=True, precision=0,
         zstr, utm_lat_zone, ce100km, cn100km, prec_str[:precision*2]
     )
 
+#------------------------------------------------------------------------------
+# vectorised MGRS encoding and decoding
+
+# character codes of the allowed zone characters
+_N2C_CODES = np.frombuffer(N2C, 'uint8')
+
+# character code to number conversion (-1 for not allowed characters)
+_C2N_CODES = -np.ones(256, 'int64')
+_C2N_CODES[_N2C_CODES] = np.arange(len(N2C))
+
+# numbers of the allowed latitude band and 100km square northing characters
+_LATZ_ALLOWED = np.zeros(len(N2C), 'bool')
+_LATZ_ALLOWED[2:22] = True
+_N0_ALLOWED = np.zeros(len(N2C), 'bool')
+_N0_ALLOWED[:NCN] = True
+
+_BASE_NORTHING = np.array(BASE_NORTHING, 'int64')
+_ZERO = ord("0")
+
+
+def getUTM2MGRSSqIdArray(east, north, utmz, is_north=True, precision=0,
+                         leading_zero=True):
+    """
+        Vectorised version of getUTM2MGRSSqId(). The easting, northing,
+        UTM zone and hemisphere parameters are broadcasted NumPy arrays
+        (or scalars). Returns an array of the MGRS location codes.
+
+            east       easting
+            north      northing
+            utmz       UTM zone number
+            is_north   if False southern hemishpere false northig
+                       is substracted from the northing value
+
+            precision  precision level (0 ... 100km, ..., 5 ... 1m)
+            leading_zero  if True leading zero will be added to one digit zones
+                          e.g., "01" instead of "1"
+    """
+    east, north, utmz, is_north = np.broadcast_arrays(
+        np.asarray(east, 'float64'), np.asarray(north, 'float64'),
+        np.asarray(utmz, 'int64'), np.asarray(is_north, 'bool'),
+    )
+    shape = east.shape
+    east, north = east.ravel(), north.ravel()
+    utmz, is_north = utmz.ravel(), is_north.ravel()
+
+    # check zone
+    if ((utmz < 1) | (utmz > 60)).any():
+        raise ValueError("Invalid UTM zone %s !" % utmz[
+            (utmz < 1) | (utmz > 60)
+        ][0])
+
+    # substract false northing and easting and floor the values to meters
+    east = np.floor(east - FALSE_EASTING).astype('int64')
+    north = np.floor(north - np.where(
+        is_north, FALSE_NORTHING_NORTH, FALSE_NORTHING_SOUTH
+    )).astype('int64')
+
+    # get the UTM lateral zone
+    lat_idx = np.minimum(
+        np.searchsorted(_BASE_NORTHING[1:], north, side='right'),
+        len(BASE_NORTHING) - 2
+    )
+
+    # MGRS letter easting offset of the central meridian
+    off_cmr = 4+((utmz-1)%3)*8
+
+    # MGRS letter northing offset to equator
+    off_eqt = ((utmz-1)%2)*5
+
+    # 100 km square easting/northing coordinates
+    e_tmp, n_tmp = east // 100000, north // 100000
+
+    # sub 100km integer reminders
+    e_rem, n_rem = east - e_tmp*100000, north - n_tmp*100000
+
+    # assemble the codes as a character matrix
+    chars = np.empty((east.size, 5 + 2*precision), 'uint8')
+    chars[:, 0] = _ZERO + utmz // 10
+    chars[:, 1] = _ZERO + utmz % 10
+    chars[:, 2] = _N2C_CODES[lat_idx + 2]
+    chars[:, 3] = _N2C_CODES[(e_tmp + off_cmr) % NCE]
+    chars[:, 4] = _N2C_CODES[(n_tmp + off_eqt) % NCN]
+    for idx in xrange(precision):
+        base = 10**(4 - idx)
+        chars[:, 5 + 2*idx] = _ZERO + (e_rem // base) % 10
+        chars[:, 6 + 2*idx] = _ZERO + (n_rem // base) % 10
+
+    codes = chars.view('S%d' % chars.shape[1]).reshape(shape)
+    if not leading_zero:
+        codes = np.char.lstrip(codes, "0")
+    return codes
+
+
+def getUTMZoneOfLL(lon, lat):
+    """ Get array of the UTM zone numbers (including the Norway and Svalbard
+        exceptions) of the WGS84 longitudes and latitudes.
+    """
+    lon, lat = np.broadcast_arrays(
+        np.asarray(lon, 'float64'), np.asarray(lat, 'float64')
+    )
+    lon = np.mod(lon + 180.0, 360.0) - 180.0
+    utmz = np.clip(np.floor((lon + 180.0) / 6.0).astype('int64') + 1, 1, 60)
+    # Norway
+    utmz[(lat >= 56.0) & (lat < 64.0) & (lon >= 3.0) & (lon < 12.0)] = 32
+    # Svalbard
+    svalbard = (lat >= 72.0) & (lat < 84.0)
+    for lon_min, lon_max, zone in ((0., 9., 31), (9., 21., 33),
+                                   (21., 33., 35), (33., 42., 37)):
+        utmz[svalbard & (lon >= lon_min) & (lon < lon_max)] = zone
+    return utmz
+
+
+def getLL2MGRSSqIdArray(lon, lat, precision=0, leading_zero=True):
+    """ Get array of the MGRS location codes of the WGS84 longitudes and
+        latitudes. See getUTM2MGRSSqIdArray() for the parameters.
+    """
+    lon, lat = np.broadcast_arrays(
+        np.asarray(lon, 'float64'), np.asarray(lat, 'float64')
+    )
+    utmz = getUTMZoneOfLL(lon, lat)
+    is_north = lat >= 0
+    east = np.empty(lon.shape, 'float64')
+    north = np.empty(lon.shape, 'float64')
+    # transform the coordinates in bulk for each UTM zone
+    for zone in np.unique(utmz):
+        for north_flag, sr_utm in ((True, ig.OSR_UTM_N), (False, ig.OSR_UTM_S)):
+            mask = (utmz == zone) & (is_north == north_flag)
+            if mask.any():
+                east[mask], north[mask] = ig.CTransform(
+                    ig.OSR_WGS84, sr_utm[zone-1]
+                ).transform(lon[mask], lat[mask])
+    return getUTM2MGRSSqIdArray(
+        east, north, utmz, is_north, precision, leading_zero
+    )
+
+
+def getMGRS2UTMArray(sqids):
+    """
+        Decode array of the MGRS location codes. Returns tuple of arrays
+        of the SW corner easting, SW corner northing, precision and EPSG code
+        of the UTM zone. ValueError is raised if any of the codes
+        is not valid.
+    """
+    sqids = np.asarray(sqids)
+    shape = sqids.shape
+    sqids = np.char.upper(np.char.replace(
+        np.char.strip(sqids.ravel().astype('S')), " ", ""
+    ))
+    sqids = np.asarray(sqids, 'S')
+    size = max(sqids.dtype.itemsize, 1)
+    chars = np.frombuffer(sqids.tobytes(), 'uint8').reshape((-1, size))
+    chars = chars.astype('int64')
+    length = np.char.str_len(sqids)
+
+    if chars.shape[1] < 5:
+        chars = np.column_stack((
+            chars, np.zeros((len(chars), 5 - chars.shape[1]), 'int64')
+        ))
+
+    # add the missing leading zero of the one digit zones
+    one_digit = (chars[:, 1] >= ord("A"))
+    if one_digit.any():
+        chars = np.column_stack((np.zeros(len(chars), 'int64'), chars))
+        chars[~one_digit, :-1] = chars[~one_digit, 1:]
+        chars[one_digit, 0] = _ZERO
+        length = length + one_digit
+
+    def _invalid(mask):
+        if mask.any():
+            raise ValueError(
+                "Invalid MGRS 100km Square ID! %s" % sqids[mask][0]
+            )
+
+    precision = (length - 5) // 2
+    _invalid((length < 5) | (length > 15) | ((length - 5) % 2 != 0))
+
+    digits = chars - _ZERO
+    utmz = 10*digits[:, 0] + digits[:, 1]
+    _invalid(
+        (digits[:, 0] < 0) | (digits[:, 0] > 9) |
+        (digits[:, 1] < 0) | (digits[:, 1] > 9) | (utmz < 1) | (utmz > 60)
+    )
+    latz, e0, n0 = [_C2N_CODES[chars[:, idx]] for idx in (2, 3, 4)]
+    _invalid(
+        (latz < 0) | (e0 < 0) | (n0 < 0) |
+        ~_LATZ_ALLOWED[latz] | ~_N0_ALLOWED[n0]
+    )
+    # detect invalid zones
+    _invalid((latz == C2N["X"]) & np.in1d(utmz, (32, 34, 36)))
+
+    # offset of the central meridian
+    off_cmr = 4+((utmz-1)%3)*8
+    # offset to equator
+    off_eqt = ((utmz-1)%2)*5
+    n_base = (n0 - off_eqt)*100000
+    # min. and max. northing for given UTM-zone + allowed overlap
+    i = latz - 2
+    n_min = _BASE_NORTHING[i] - n_base - ALLOWED_OVERLAP - 100000
+    n_max = _BASE_NORTHING[i+1] - n_base + ALLOWED_OVERLAP
+    # unwrap the northing by multiples of 2000km
+    nb = -2000000 * np.maximum(0, -((n_max) // 2000000))
+    nb += 2000000 * np.maximum(0, -((nb - n_min) // 2000000))
+    # the square is not within he UTM zone
+    _invalid(n_max < nb)
+
+    is_north = latz > 11
+    east = (e0 - off_cmr)*100000 + FALSE_EASTING
+    north = n_base + nb + np.where(
+        is_north, FALSE_NORTHING_NORTH, FALSE_NORTHING_SOUTH
+    )
+
+    # easting and northing - sub-100km base
+    for idx in xrange(5):
+        has_digit = precision > idx
+        if not has_digit.any():
+            break
+        ve, vn = digits[:, 5 + 2*idx], digits[:, 6 + 2*idx]
+        _invalid(has_digit & ((ve < 0) | (ve > 9) | (vn < 0) | (vn > 9)))
+        east += np.where(has_digit, ve, 0) * PREC2DST[idx+1]
+        north += np.where(has_digit, vn, 0) * PREC2DST[idx+1]
+
+    epsg = np.where(is_north, 32600, 32700) + utmz
+
+    return tuple(
+        arr.reshape(shape) for arr in (east, north, precision, epsg)
+    )
+
 #------------------------------------------------------------------------------
 
 class MGRS(object):
@@ -314,7 +542,7 @@ class MGRS(object):
 
     def convertEN2LL(self, (e, n)):
         """Convert WGS84/UTM easting/northing to WGS84 longitude/latitude."""
-        ct = osr.CoordinateTransformation(self.__getSR(), ig.OSR_WGS84)
+        ct = ig.getCTransformation(self.__getSR(), ig.OSR_WGS84)
         x, y, _ = ct.TransformPoint(float(e), float(n))
         return (x, y)
 
@@ -326,14 +554,14 @@ class MGRS(object):
         # outline polygon in UTM coordinates
         ol = ig.setSR(ig.getRectangle((x0, y0, x1, y1), step), self.__getSR())
         # transform to WGS84
-        ol.TransformTo(ig.OSR_WGS84)
+        ig.transformTo(ol, ig.OSR_WGS84)
         # handle coordinates crossing the date-line
         if self.utmz < 2:
-            t = ig.Transfomer(lambda p: (p[0] - 360.0*(p[0] > 0), p[1]))
-            ol = ig.setSR(t(ol), p0.GetSpatialReference())
+            t = ig.ArrayTransformer(lambda x, y: (x - 360.0*(x > 0), y))
+            ol = ig.setSR(t(ol), ig.OSR_WGS84)
         elif self.utmz > 59:
-            t = ig.Transfomer(lambda p: (p[0] + 360.0*(p[0] < 0), p[1]))
-            ol = ig.setSR(t(ol), p0.GetSpatialReference())
+            t = ig.ArrayTransformer(lambda x, y: (x + 360.0*(x < 0), y))
+            ol = ig.setSR(t(ol), ig.OSR_WGS84)
         return ol
 
 #    def asWKT(self, n = 1):
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+#  Global index of the MGRS 100km squares.
+#
+#    The index is a single memory-mappable binary file holding a table of all
+#    valid MGRS 100km squares (square ID, UTM zone, EPSG code, UTM bounds and
+#    WGS84 bounding box) followed by the WKB polygons of the squares clipped
+#    by their UTM zones (WGS84).
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+# pylint: disable=wrong-import-position, redefined-outer-name
+
+import sys
+import struct
+from math import floor, ceil
+from os.path import basename
+import numpy as np
+from osgeo import ogr; ogr.UseExceptions() #pylint: disable=multiple-statements
+import img_geom as ig
+import utm
+import mgrs
+
+MAGIC = "MGRSIDX1"
+HEADER = struct.Struct("<8sQQ") # magic, number of records, blob size
+
+RECORD_DTYPE = np.dtype([
+    ('sqid', 'S5'),             # MGRS 100km square ID
+    ('utmz', '<i2'),            # UTM zone
+    ('epsg', '<i4'),            # EPSG code of the UTM zone
+    ('utm_bounds', '<f8', 4),   # (x0, y0, x1, y1) UTM square bounds
+    ('bbox', '<f8', 4),         # (lon_min, lat_min, lon_max, lat_max) WGS84
+    ('wkb_offset', '<i8'),      # offset of the WGS84 polygon WKB
+    ('wkb_size', '<i8'),        # size of the WGS84 polygon WKB
+])
+
+SQUARE_SIZE = 1e5 # 100km
+SQUARE_STEP = 1e4 # square outline segmentation
+
+
+class MGRSIndex(object):
+    """ Memory-mapped MGRS 100km square index.
+
+        The WGS84 polygons of the squares of the date-line UTM zones
+        are not wrapped, i.e., their longitudes may exceed the [-180, +180]
+        range.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as fobj:
+            magic, count, blob_size = HEADER.unpack(fobj.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError("%s is not an MGRS index file!" % path)
+        table_size = count * RECORD_DTYPE.itemsize
+        self.records = np.memmap(
+            path, RECORD_DTYPE, "r", HEADER.size, (count,)
+        ) if count > 0 else np.empty(0, RECORD_DTYPE)
+        self.blob = np.memmap(
+            path, 'uint8', "r", HEADER.size + table_size, (blob_size,)
+        ) if blob_size > 0 else np.empty(0, 'uint8')
+        self.bbox = np.asarray(self.records['bbox'])
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, idx):
+        return self.records[idx]
+
+    def getPolygon(self, idx, shift=0.0):
+        """ Get the WGS84 polygon of the square optionally shifted
+            by the given longitude offset.
+        """
+        rec = self.records[idx]
+        start = int(rec['wkb_offset'])
+        geom = ogr.CreateGeometryFromWkb(
+            self.blob[start:start+int(rec['wkb_size'])].tobytes()
+        )
+        if shift != 0.0:
+            geom = ig.shiftGeom(geom, (shift, 0.0))
+        return ig.setSR(geom, ig.OSR_WGS84)
+
+    def _bbox_mask(self, (lon_min, lat_min, lon_max, lat_max), shift):
+        x0, y0, x1, y1 = self.bbox.T
+        return (
+            (x0 + shift <= lon_max) & (x1 + shift >= lon_min) &
+            (y0 <= lat_max) & (y1 >= lat_min)
+        )
+
+    def bboxQuery(self, bbox):
+        """ Get sorted array of indices of the squares whose WGS84 bounding
+            boxes intersect the (lon_min, lat_min, lon_max, lat_max) bounding
+            box.
+        """
+        mask = np.zeros(len(self.records), 'bool')
+        for shift in (-360.0, 0.0, +360.0):
+            mask |= self._bbox_mask(bbox, shift)
+        return np.nonzero(mask)[0]
+
+    def geomQuery(self, geom):
+        """ Get sorted array of indices of the squares intersecting
+            the WGS84 geometry.
+        """
+        if geom.GetGeometryName() in (
+                "MULTIPOLYGON", "MULTILINESTRING", "MULTIPOINT",
+                "GEOMETRYCOLLECTION"
+            ):
+            parts = [
+                geom.GetGeometryRef(i) for i in xrange(geom.GetGeometryCount())
+            ]
+        else:
+            parts = [geom]
+        selected = set()
+        for part in parts:
+            if part.IsEmpty():
+                continue
+            xmin, xmax, ymin, ymax = part.GetEnvelope()
+            for shift in (-360.0, 0.0, +360.0):
+                mask = self._bbox_mask((xmin, ymin, xmax, ymax), shift)
+                for idx in np.nonzero(mask)[0]:
+                    if idx not in selected and part.Intersect(
+                            self.getPolygon(idx, shift)
+                        ):
+                        selected.add(idx)
+        return np.array(sorted(selected), 'int64')
+
+
+def _get_zone_squares(zone, buffer):
+    """ Get list of the (sqid, WGS84 polygon) tuples of the given zone. """
+    zone_geom = utm.getUTMZoneIndex(True, True, buffer).getZoneGeom(zone)
+    zone_geom = ig.transformTo(zone_geom.Clone(), ig.OSR_UTM_N[zone-1])
+
+    # get the bounds
+    x0, x1, y0, y1 = zone_geom.GetEnvelope()
+    i0, i1 = int(floor(x0/SQUARE_SIZE)), int(ceil(x1/SQUARE_SIZE))
+    j0, j1 = int(floor(y0/SQUARE_SIZE)), int(ceil(y1/SQUARE_SIZE))
+
+    squares = []
+    for j in xrange(j0, j1):
+        for i in xrange(i0, i1):
+            x, y = i*SQUARE_SIZE, j*SQUARE_SIZE
+            clip = ig.setSR(ig.getRectangle(
+                (x, y, x + SQUARE_SIZE, y + SQUARE_SIZE), SQUARE_STEP
+            ), ig.OSR_UTM_N[zone-1])
+            if not zone_geom.Intersect(clip):
+                continue
+            geom = ig.setSR(zone_geom.Intersection(clip), ig.OSR_UTM_N[zone-1])
+            ig.transformTo(geom, ig.OSR_WGS84)
+            # handle coordinates crossing the date-line
+            if zone < 2:
+                trn = ig.ArrayTransformer(lambda x, y: (x - 360.0*(x > 0), y))
+                geom = trn(geom)
+            elif zone > 59:
+                trn = ig.ArrayTransformer(lambda x, y: (x + 360.0*(x < 0), y))
+                geom = trn(geom)
+            sqid = mgrs.getUTM2MGRSSqId(
+                x + 0.5*SQUARE_SIZE, y + 0.5*SQUARE_SIZE, zone, True, 0
+            )
+            try:
+                square = mgrs.MGRS(sqid)
+            except ValueError: # skip invalid squares
+                continue
+            squares.append((square, geom))
+    return squares
+
+
+def buildIndex(path, buffer=0.0, verbose=False, zones=None):
+    """ Build the MGRS 100km square index file. The optional buffer (in km)
+        extends the UTM zones (see utm.getUTMZoneAsGeom). The optional list
+        of zones restricts the index to a subset of the UTM zones (all 60
+        zones by default).
+    """
+    squares = []
+    for zone in (zones or xrange(1, 61)):
+        squares.extend(_get_zone_squares(zone, buffer))
+        if verbose:
+            print >>sys.stderr, "UTM zone %2.2d: %d squares" % (
+                zone, len(squares)
+            )
+
+    records = np.zeros(len(squares), RECORD_DTYPE)
+    blobs, offset = [], 0
+    for idx, (square, geom) in enumerate(squares):
+        x0, x1, y0, y1 = geom.GetEnvelope()
+        data = geom.ExportToWkb(ogr.wkbNDR)
+        records['sqid'][idx] = square.mgrs
+        records['utmz'][idx] = square.utmz
+        records['epsg'][idx] = square.epsg
+        records['utm_bounds'][idx] = square.getCornerSW() + square.getCornerNE()
+        records['bbox'][idx] = (x0, y0, x1, y1)
+        records['wkb_offset'][idx] = offset
+        records['wkb_size'][idx] = len(data)
+        blobs.append(data)
+        offset += len(data)
+
+    with open(path, "wb") as fobj:
+        fobj.write(HEADER.pack(MAGIC, len(records), offset))
+        fobj.write(records.tobytes())
+        for data in blobs:
+            fobj.write(data)
+
+
+def usage():
+    """ print usage """
+    exename = basename(sys.argv[0])
+    print >>sys.stderr, "USAGE: %s BUILD <index> [BUFFER:<km>] [DEBUG]" % (
+        exename
+    )
+    print >>sys.stderr, "USAGE: %s <index> <lon0>,<lat0>,<lon1>,<lat1>" % (
+        exename
+    )
+    print >>sys.stderr, "USAGE: %s <index> GEOM:<WGS84 geometry|->" % exename
+    print >>sys.stderr, "\nBuild the global index of the MGRS 100km squares"
+    print >>sys.stderr, "or list the squares intersecting the given bounding"
+    print >>sys.stderr, "box or geometry."
+
+
+if __name__ == "__main__":
+    EXENAME = basename(sys.argv[0])
+    DEBUG = False
+    BUFFER = 0.0
+
+    try:
+        if sys.argv[1] == "BUILD":
+            INDEX = sys.argv[2]
+            BUILD = True
+            for arg in sys.argv[3:]:
+                if arg.startswith("BUFFER:"):
+                    BUFFER = float(arg[len("BUFFER:"):])
+                elif arg == "DEBUG":
+                    DEBUG = True
+        else:
+            INDEX = sys.argv[1]
+            BUILD = False
+            QUERY = sys.argv[2]
+            for arg in sys.argv[3:]:
+                if arg == "DEBUG":
+                    DEBUG = True
+    except IndexError:
+        print >>sys.stderr, "ERROR: %s: Not enough input arguments!" % EXENAME
+        usage()
+        sys.exit(1)
+    except Exception as exc:
+        print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+        usage()
+        sys.exit(1)
+
+    try:
+        if BUILD:
+            buildIndex(INDEX, BUFFER, DEBUG)
+            sys.exit(0)
+
+        index = MGRSIndex(INDEX)
+        if QUERY.startswith("GEOM:"):
+            INPUT = QUERY[len("GEOM:"):]
+            fin = sys.stdin if INPUT == "-" else open(INPUT)
+            geom = ig.wrapArroundWGS84(ig.parseGeom(fin.read(), DEBUG))
+            indices = index.geomQuery(geom)
+        else:
+            indices = index.bboxQuery([float(v) for v in QUERY.split(",")])
+    except Exception as exc:
+        print >>sys.stderr, "ERROR: %s: %s" % (EXENAME, exc)
+        sys.exit(1)
+
+    for rec in index.records[indices]:
+        print "%s\tEPSG:%d\t%d,%d,%d,%d" % (
+            (rec['sqid'], rec['epsg']) + tuple(rec['utm_bounds'])
+        )
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+#  Split raster image to the MGRS 100km squares.
+#
+#    All square subsets are extracted in a single tiled read pass of the input
+#    image. The subsets are kept in the source image coordinate system.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+# pylint: disable=wrong-import-position, redefined-outer-name
+
+import sys
+from os.path import basename
+import numpy as np
+from img import (
+    FormatOptions, create_geotiff, DEF_GEOTIFF_FOPT,
+    Extent, ImageFileReader, Progress, copy_subsets, pixel_offset,
+)
+from img.routing import tile_count
+from img.cli import error
+import img_geom as ig
+
+# number of the square edge segments
+SQUARE_NSTEP = 10
+
+def usage():
+    """Print a short command usage help."""
+    exename = basename(sys.argv[0])
+    print >>sys.stderr, (
+        "USAGE: %s <input image> <square list>|- <output prefix> "
+        "[THREADS=<n>] [DEBUG] [<format options>]" % exename
+    )
+    print >>sys.stderr, (
+        "\nThe square list is the output of geom_cut_to_mgrs_grid.py, i.e.,"
+        "\nlines of '<square ID> EPSG:<code> <x0>,<y0>,<x1>,<y1>'."
+        "\nOne '<output prefix><square ID>.tif' image is written per square."
+    )
+    print >>sys.stderr, (
+        "EXAMPLE: %s input.tif squares.txt output_ COMPRESS=DEFLATE" % exename
+    )
+
+
+def parse_squares(fobj):
+    """ Parse list of the MGRS squares. Returns list of the
+    (square ID, EPSG code, (x0, y0, x1, y1)) tuples.
+    """
+    squares = []
+    for line in fobj:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            sqid, srs, bounds = line.split()
+            epsg = int(srs.split(":")[-1])
+            x0, y0, x1, y1 = (float(v) for v in bounds.split(","))
+        except ValueError:
+            raise ValueError("Invalid square specification! %r" % line)
+        squares.append((sqid, epsg, (x0, y0, x1, y1)))
+    return squares
+
+
+def get_square_subset(img, epsg, (x0, y0, x1, y1)):
+    """ Get the pixel subset of the image containing the square. """
+    # densified square outline
+    tmp = np.linspace(0.0, 1.0, SQUARE_NSTEP + 1)
+    x_sq = np.concatenate((
+        x0 + (x1 - x0)*tmp, np.repeat(x1, tmp.size),
+        x1 - (x1 - x0)*tmp, np.repeat(x0, tmp.size),
+    ))
+    y_sq = np.concatenate((
+        np.repeat(y0, tmp.size), y0 + (y1 - y0)*tmp,
+        np.repeat(y1, tmp.size), y1 - (y1 - y0)*tmp,
+    ))
+    # square to the image coordinates
+    x_img, y_img = ig.CTransform(
+        ig.getSRFromEPSG(epsg), img.spatial_reference
+    ).transform(x_sq, y_sq)
+    # image coordinates to pixel coordinates
+    gtm = img.geocoding['geotrn']
+    inv = np.linalg.inv(np.array([[gtm[1], gtm[2]], [gtm[4], gtm[5]]]))
+    dx, dy = x_img - gtm[0], y_img - gtm[3]
+    x_pix = inv[0, 0]*dx + inv[0, 1]*dy
+    y_pix = inv[1, 0]*dx + inv[1, 1]*dy
+    px0, py0 = int(np.floor(x_pix.min())), int(np.floor(y_pix.min()))
+    px1, py1 = int(np.ceil(x_pix.max())), int(np.ceil(y_pix.max()))
+    return (Extent((px1 - px0, py1 - py0), (px0, py0)) & img).set_z(img)
+
+
+if __name__ == "__main__":
+    FOPTS = FormatOptions(DEF_GEOTIFF_FOPT) # default format options
+    NTHREADS = 4
+    DEBUG = False
+    try:
+        INPUT = sys.argv[1]
+        SQUARES = sys.argv[2]
+        PREFIX = sys.argv[3]
+        for arg in sys.argv[4:]:
+            if arg == "DEBUG":
+                DEBUG = True
+            elif arg.startswith("THREADS="):
+                NTHREADS = int(arg[len("THREADS="):])
+            else: #anything else treated as a format option
+                FOPTS.set_option(arg)
+    except IndexError:
+        error("Not enough input arguments!")
+        usage()
+        sys.exit(1)
+    except ValueError as exc:
+        error(exc)
+        sys.exit(1)
+
+    try:
+        fin = sys.stdin if SQUARES == "-" else open(SQUARES)
+        SQUARE_LIST = parse_squares(fin)
+    except Exception as exc:
+        error(exc)
+        sys.exit(1)
+
+    # open input image
+    IMG_IN = ImageFileReader(INPUT)
+
+    if 'geotrn' not in IMG_IN.geocoding:
+        error("The input image must be rectified!")
+        sys.exit(1)
+
+    # create the output images
+    OUTPUTS = []
+    for sqid, epsg, bounds in SQUARE_LIST:
+        subset = get_square_subset(IMG_IN, epsg, bounds)
+        if subset.extent <= 0:
+            if DEBUG:
+                print >>sys.stderr, "%s: no overlap" % sqid
+            continue
+        param = {
+            'path':   "%s%s.tif" % (PREFIX, sqid),
+            'nrow':   subset.size.y,
+            'ncol':   subset.size.x,
+            'nband':  IMG_IN.size.z,
+            'dtype':  IMG_IN.dtype,
+            'nodata': IMG_IN.nodata,
+            'options' : FOPTS.options,
+        }
+        # add translated geo-coding
+        param.update(
+            pixel_offset(IMG_IN.geocoding, (subset.offset.x, subset.offset.y))
+        )
+        if DEBUG:
+            print >>sys.stderr, "%s: %s" % (param['path'], subset)
+        OUTPUTS.append((subset, create_geotiff(**param)))
+
+    if not OUTPUTS:
+        error("No MGRS square overlaps the image!")
+        sys.exit(1)
+
+    # block size
+    TILE_SIZE = (int(FOPTS["BLOCKXSIZE"]), int(FOPTS["BLOCKYSIZE"]))
+
+    print "Splitting image to %d MGRS squares..." % len(OUTPUTS)
+    copy_subsets(
+        IMG_IN, OUTPUTS, TILE_SIZE, NTHREADS, progress=Progress(
+            sys.stdout, tile_count(
+                IMG_IN, [subset for subset, _ in OUTPUTS], TILE_SIZE
+            )
+        ),
+    )
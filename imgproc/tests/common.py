@@ -0,0 +1,65 @@
+#-------------------------------------------------------------------------------
+#
+#  shared test helpers
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=invalid-name
+
+from osgeo import ogr
+import img_wkb
+from img_wkb import FlatGeometry
+
+
+class GCP(object):
+    """ Minimal stand-in of the GDAL ground control point. """
+    def __init__(self, line, pixel, x, y):
+        self.GCPLine, self.GCPPixel, self.GCPX, self.GCPY = line, pixel, x, y
+
+
+def make_gcps(points, mapping):
+    """ Create GCPs of the (line, pixel) points mapped by the given
+    mapping(pixel, line) -> (x, y) function.
+    """
+    return [GCP(line, pixel, *mapping(pixel, line)) for line, pixel in points]
+
+
+def create_geometry(type_, parts, sr=None):
+    """ Create OGR geometry from a list of parts, each part being a list
+    of coordinate arrays (rings).
+    """
+    geom = ogr.CreateGeometryFromWkb(
+        img_wkb.dumps(FlatGeometry.from_parts(type_, parts))
+    )
+    if sr is not None:
+        geom.AssignSpatialReference(sr)
+    return geom
+
+
+def box(x_min, y_min, x_max, y_max):
+    """ Get closed counter-clockwise ring of a rectangle. """
+    return [
+        (x_min, y_min), (x_max, y_min), (x_max, y_max), (x_min, y_max),
+        (x_min, y_min),
+    ]
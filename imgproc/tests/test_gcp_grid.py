@@ -0,0 +1,95 @@
+#-------------------------------------------------------------------------------
+#
+#  GCP grid tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from numpy import allclose, array
+from img.gcp_grid import GCPGrid
+from tests.common import make_gcps
+
+
+def identity(pixel, line):
+    return float(pixel), float(line)
+
+
+class TestGCPGrid(unittest.TestCase):
+    lines = [0.5, 40.0, 100.0]
+    pixels = [0.5, 30.0, 70.0, 100.0]
+
+    def grid(self, mapping=identity):
+        points = [(l, p) for l in self.lines for p in self.pixels]
+        return GCPGrid.from_gcps(make_gcps(reversed(points), mapping))
+
+    def test_shape(self):
+        grid = self.grid()
+        self.assertEqual(grid.shape, (3, 4))
+        self.assertTrue(allclose(grid.lines, self.lines))
+        self.assertTrue(allclose(grid.pixels, self.pixels))
+
+    def test_no_gcps(self):
+        self.assertRaises(ValueError, GCPGrid.from_gcps, [])
+
+    def test_irregular(self):
+        gcps = make_gcps([
+            (0, 0), (0, 100), (30, 10), (60, 80), (100, 5), (100, 90),
+        ], identity)
+        self.assertRaises(ValueError, GCPGrid.from_gcps, gcps)
+
+    def test_misaligned_columns(self):
+        gcps = make_gcps([
+            (0, 0), (0, 100), (50, 10), (50, 100), (100, 0), (100, 100),
+        ], identity)
+        self.assertRaises(ValueError, GCPGrid.from_gcps, gcps)
+
+    def test_interpolate(self):
+        x, y = self.grid().interpolate(
+            array([0.0, 50.0, 99.0, 120.0]), array([10.0, 50.0, 2.0, -5.0])
+        )
+        self.assertTrue(allclose(x, [0.0, 50.0, 99.0, 120.0]))
+        self.assertTrue(allclose(y, [10.0, 50.0, 2.0, -5.0]))
+
+    def test_center(self):
+        self.assertTrue(allclose(self.grid().center((80, 60)), (40.0, 30.0)))
+
+    def test_boundary(self):
+        ring = self.grid().boundary()
+        self.assertTrue(allclose(ring, [
+            (0.5, 0.5), (0.5, 40.0), (0.5, 100.0), (30.0, 100.0),
+            (70.0, 100.0), (100.0, 100.0), (100.0, 40.0), (100.0, 0.5),
+            (70.0, 0.5), (30.0, 0.5), (0.5, 0.5),
+        ]))
+
+    def test_boundary_densified(self):
+        ring = self.grid().boundary(densify=2)
+        self.assertEqual(len(ring), 21)
+        self.assertTrue(allclose(ring[::2], self.grid().boundary()))
+        self.assertTrue(allclose(ring[1], (0.5, 20.25)))
+
+
+if __name__ == "__main__":
+    unittest.main()
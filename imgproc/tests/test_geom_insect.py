@@ -0,0 +1,148 @@
+#-------------------------------------------------------------------------------
+#
+#  geometry intersection tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+import img_geom as ig
+from geom_insect import intersect_geometries
+from tests.common import create_geometry, box
+
+
+def polygon(x_min, y_min, x_max, y_max, holes=()):
+    return create_geometry("POLYGON", [
+        [box(x_min, y_min, x_max, y_max)] +
+        [box(*hole)[::-1] for hole in holes]
+    ])
+
+
+def fold_intersection(geoms):
+    """ Reference intersection by a sequential fold. """
+    result = geoms[0]
+    for geom in geoms[1:]:
+        result = result.Intersection(geom)
+    return result
+
+
+class EnvelopeOnly(object):
+    """ Geometry stand-in exposing only the envelope. Any other call
+    fails the test.
+    """
+    def __init__(self, envelope):
+        self.envelope = envelope
+
+    def GetEnvelope(self):
+        return self.envelope
+
+
+class TestIntersectGeometries(unittest.TestCase):
+
+    def assertSameArea(self, geom0, geom1):
+        self.assertAlmostEqual(geom0.GetArea(), geom1.GetArea(), 9)
+        self.assertAlmostEqual(geom0.Difference(geom1).GetArea(), 0., 9)
+        self.assertAlmostEqual(geom1.Difference(geom0).GetArea(), 0., 9)
+
+    def test_disjoint_envelopes(self):
+        result = intersect_geometries([
+            EnvelopeOnly((0., 10., 0., 10.)), EnvelopeOnly((5., 15., 5., 15.)),
+            EnvelopeOnly((11., 12., 0., 4.)),
+        ])
+        self.assertEqual(result.GetGeometryName(), "POLYGON")
+        self.assertTrue(result.IsEmpty())
+
+    def test_empty_result(self):
+        # overlapping envelopes but disjoint polygons
+        result = intersect_geometries([
+            polygon(0, 0, 10, 10, [(1, 1, 9, 9)]), polygon(2, 2, 8, 8),
+            polygon(0, 0, 20, 20),
+        ])
+        self.assertTrue(result.IsEmpty())
+
+    def test_polygons_with_holes(self):
+        geoms = [
+            polygon(0, 0, 10, 10, [(2, 2, 4, 4), (6, 6, 8, 9)]),
+            polygon(3, -1, 12, 8, [(7, 1, 9, 3)]),
+            create_geometry("MULTIPOLYGON", [
+                [box(1, 1, 5, 7), box(2, 5, 3, 6)[::-1]], [box(6, 0, 11, 11)],
+            ]),
+        ]
+        result = intersect_geometries(geoms)
+        self.assertTrue(result.GetArea() > 0)
+        self.assertSameArea(result, fold_intersection(geoms))
+        self.assertSameArea(
+            intersect_geometries(geoms[::-1]), fold_intersection(geoms)
+        )
+
+    def test_non_polygon(self):
+        # horizontal and vertical lines have degenerate envelopes
+        for line in (
+                create_geometry("LINESTRING", [[[(-5, 5), (15, 5)]]]),
+                create_geometry("LINESTRING", [[[(3, -5), (3, 15)]]]),
+                create_geometry("LINESTRING", [[[(-5, -4), (15, 16)]]]),
+        ):
+            geoms = [polygon(0, 0, 10, 10, [(2, 2, 4, 6)]), line]
+            result = intersect_geometries(geoms)
+            self.assertFalse(result.IsEmpty())
+            self.assertTrue(result.Equals(fold_intersection(geoms)))
+
+
+class TestEnvelopes(unittest.TestCase):
+
+    def test_envelope_intersection(self):
+        self.assertEqual(
+            ig.envelopeIntersection((0, 10, 0, 10), (5, 15, -5, 5)),
+            (5, 10, 0, 5)
+        )
+        self.assertEqual(
+            ig.envelopeIntersection((0, 10, 0, 10), (10, 15, 0, 5)),
+            (10, 10, 0, 5)
+        )
+        self.assertIsNone(
+            ig.envelopeIntersection((0, 10, 0, 10), (11, 15, 0, 5))
+        )
+        self.assertIsNone(
+            ig.envelopeIntersection((0, 10, 0, 10), (0, 10, -5, -1))
+        )
+
+    def test_clip_to_envelope(self):
+        geom = polygon(0, 0, 10, 10, [(2, 2, 4, 4), (6, 6, 8, 9)])
+        clipped = ig.clipToEnvelope(geom, (3., 7., -1., 8.))
+        reference = geom.Intersection(polygon(3, -1, 7, 8))
+        self.assertAlmostEqual(clipped.GetArea(), reference.GetArea(), 9)
+        self.assertAlmostEqual(clipped.Difference(reference).GetArea(), 0, 9)
+
+    def test_clip_degenerate_envelope(self):
+        geom = polygon(0, 0, 10, 10)
+        self.assertIs(ig.clipToEnvelope(geom, (0., 10., 5., 5.)), geom)
+
+    def test_clip_non_polygon(self):
+        line = create_geometry("LINESTRING", [[[(-5, 5), (15, 5)]]])
+        self.assertIs(ig.clipToEnvelope(line, (0., 1., 0., 1.)), line)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+#-------------------------------------------------------------------------------
+#
+#  cascaded union tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from numpy.random import RandomState
+import geom_union
+from geom_union import cascaded_union
+from tests.common import create_geometry, box
+
+
+def polygon(x_min, y_min, x_max, y_max):
+    return create_geometry("POLYGON", [[box(x_min, y_min, x_max, y_max)]])
+
+
+def fold_union(geoms):
+    """ Reference union by a sequential fold. """
+    result = geoms[0]
+    for geom in geoms[1:]:
+        result = result.Union(geom)
+    return result
+
+
+def random_boxes(random, size, extent=10., box_size=2.):
+    x_0 = random.uniform(0, extent, size)
+    y_0 = random.uniform(0, extent, size)
+    return [
+        polygon(x, y, x + box_size, y + box_size) for x, y in zip(x_0, y_0)
+    ]
+
+
+class TestCascadedUnion(unittest.TestCase):
+
+    def assertSameArea(self, geom0, geom1):
+        self.assertAlmostEqual(geom0.GetArea(), geom1.GetArea(), 9)
+        self.assertAlmostEqual(geom0.Difference(geom1).GetArea(), 0., 9)
+        self.assertAlmostEqual(geom1.Difference(geom0).GetArea(), 0., 9)
+
+    def test_disjoint_collected(self):
+        calls = []
+        union_wkb = geom_union._union_wkb
+        geom_union._union_wkb = lambda wkbs: calls.append(wkbs)
+        try:
+            result = cascaded_union([
+                polygon(0, 0, 1, 1), polygon(2, 0, 3, 1), polygon(0, 2, 1, 3),
+            ])
+        finally:
+            geom_union._union_wkb = union_wkb
+        self.assertEqual(calls, [])
+        self.assertEqual(result.GetGeometryName(), "MULTIPOLYGON")
+        self.assertEqual(result.GetGeometryCount(), 3)
+        self.assertAlmostEqual(result.GetArea(), 3.)
+
+    def test_overlapping(self):
+        random = RandomState(0)
+        for size in (2, 3, 7, 40):
+            geoms = random_boxes(random, size)
+            self.assertSameArea(cascaded_union(geoms), fold_union(geoms))
+
+    def test_mixed_groups(self):
+        random = RandomState(1)
+        geoms = random_boxes(random, 10, 5.) + [
+            polygon(100, 100, 101, 101), polygon(100.5, 100, 102, 101),
+        ] + random_boxes(random, 10, 5., 1.)
+        result = cascaded_union(geoms)
+        self.assertEqual(result.GetGeometryName(), "MULTIPOLYGON")
+        self.assertSameArea(result, fold_union(geoms))
+
+    def test_jobs(self):
+        geoms = random_boxes(RandomState(2), 30, 20.)
+        self.assertEqual(
+            cascaded_union(geoms, jobs=3).ExportToWkb(),
+            cascaded_union(geoms, jobs=1).ExportToWkb()
+        )
+
+    def test_empty(self):
+        result = cascaded_union([])
+        self.assertEqual(result.GetGeometryName(), "POLYGON")
+        self.assertTrue(result.IsEmpty())
+
+    def test_single(self):
+        geom = polygon(0, 0, 1, 1)
+        result = cascaded_union([geom])
+        self.assertEqual(result.ExportToWkb(), geom.ExportToWkb())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#-------------------------------------------------------------------------------
+#
+#  envelope grouping tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from numpy.random import RandomState
+import img_geom as ig
+from geom_split import separate
+from tests.common import create_geometry, box
+
+
+def reference_groups(envelopes):
+    """ Transitive closure of the envelope overlaps by a brute-force graph
+    traversal. Returns list of lists of indices ordered by the lowest index.
+    """
+    def _overlap((xmin0, xmax0, ymin0, ymax0), (xmin1, xmax1, ymin1, ymax1)):
+        return (
+            xmin0 <= xmax1 and xmin1 <= xmax0 and
+            ymin0 <= ymax1 and ymin1 <= ymax0
+        )
+    assigned, groups = set(), []
+    for idx in xrange(len(envelopes)):
+        if idx in assigned:
+            continue
+        group, stack = set([idx]), [idx]
+        while stack:
+            current = stack.pop()
+            for other in xrange(len(envelopes)):
+                if other not in group and _overlap(
+                        envelopes[current], envelopes[other]
+                ):
+                    group.add(other)
+                    stack.append(other)
+        assigned |= group
+        groups.append(sorted(group))
+    return groups
+
+
+def envelope(x_min, y_min, x_max, y_max):
+    return (x_min, x_max, y_min, y_max)
+
+
+class TestGroupEnvelopes(unittest.TestCase):
+
+    def test_chain(self):
+        # A-B and B-C overlap, A-C do not
+        self.assertEqual(ig.groupEnvelopes([
+            envelope(0, 0, 2, 2), envelope(5, 0, 7, 2), envelope(1, 1, 6, 3),
+        ]), [[0, 1, 2]])
+
+    def test_long_chain(self):
+        # chain visited against the sweep order
+        envelopes = [envelope(10 - i, 0, 11 - i, 1) for i in xrange(10)]
+        envelopes = [
+            envelope(x_min + 0.1*i, y_min, x_max + 0.1*i, y_max)
+            for i, (x_min, x_max, y_min, y_max) in enumerate(envelopes)
+        ]
+        self.assertEqual(ig.groupEnvelopes(envelopes), [range(10)])
+
+    def test_touching(self):
+        self.assertEqual(ig.groupEnvelopes([
+            envelope(0, 0, 1, 1), envelope(1, 0, 2, 1), envelope(2, 1, 3, 2),
+        ]), [[0, 1, 2]])
+
+    def test_disjoint(self):
+        self.assertEqual(ig.groupEnvelopes([
+            envelope(0, 0, 1, 1), envelope(0, 2, 1, 3), envelope(2, 0, 3, 1),
+            envelope(0.5, 0.5, 0.6, 0.6),
+        ]), [[0, 3], [1], [2]])
+        self.assertEqual(ig.groupEnvelopes([]), [])
+
+    def test_order(self):
+        # groups ordered by their lowest index, indices sorted
+        self.assertEqual(ig.groupEnvelopes([
+            envelope(10, 0, 11, 1), envelope(0, 0, 2, 2),
+            envelope(3, 0, 4, 1), envelope(11, 0, 12, 1),
+            envelope(1, 0, 3, 1),
+        ]), [[0, 3], [1, 2, 4]])
+
+    def test_reference(self):
+        random = RandomState(0)
+        for size in (1, 2, 10, 100, 300):
+            x_0 = random.uniform(0, 100, size)
+            y_0 = random.uniform(0, 100, size)
+            width = random.exponential(3, size)
+            height = random.exponential(3, size)
+            envelopes = zip(x_0, x_0 + width, y_0, y_0 + height)
+            self.assertEqual(
+                ig.groupEnvelopes(envelopes), reference_groups(envelopes)
+            )
+
+
+class TestSeparate(unittest.TestCase):
+
+    def test_separate(self):
+        geom = create_geometry("MULTIPOLYGON", [
+            [box(10, 0, 11, 1)], [box(0, 0, 2, 2)], [box(3, 0, 4, 1)],
+            [box(11, 0, 12, 1)], [box(1, 0, 3, 1)], [box(0, 5, 1, 6)],
+        ])
+        result = separate(geom)
+        self.assertEqual(
+            [item.GetGeometryName() for item in result],
+            ["MULTIPOLYGON", "MULTIPOLYGON", "POLYGON"]
+        )
+        self.assertEqual(
+            [ig.geomToFlat(item).envelope() for item in result],
+            [(10., 12., 0., 1.), (0., 4., 0., 2.), (0., 1., 5., 6.)]
+        )
+        self.assertEqual(
+            [ig.geomToFlat(item).part_count for item in result], [2, 3, 1]
+        )
+
+    def test_not_multipolygon(self):
+        geom = create_geometry("POLYGON", [[box(0, 0, 1, 1)]])
+        self.assertEqual(separate(geom), [geom])
+
+
+if __name__ == "__main__":
+    unittest.main()
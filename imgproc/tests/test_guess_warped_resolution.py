@@ -0,0 +1,103 @@
+#-------------------------------------------------------------------------------
+#
+#  Warped resolution estimator tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from numpy import allclose, array
+from img_geom import GCPTransform, GTMTransform
+from img.gcp_grid import GCPGrid
+from guess_warped_resolution import get_pixel_transform
+from tests.common import make_gcps
+
+
+def quadratic(pixel, line):
+    return (
+        10.0 + 0.01*pixel + 1e-6*pixel*line,
+        40.0 - 0.02*line + 3e-7*pixel*pixel,
+    )
+
+
+# scattered (SPOT 1A like) GCPs; two per line so that the count divides
+SCATTERED = [
+    (0, 0), (0, 1000), (70, 130), (70, 910), (180, 420), (180, 660),
+    (300, 50), (300, 770), (420, 330), (420, 980), (560, 10), (560, 600),
+    (700, 240), (700, 1000),
+]
+
+# regular (ASAR like) GCP grid
+REGULAR = [(l, p) for l in (0, 350, 700) for p in (0, 250, 500, 750, 1000)]
+
+
+class TestPixelTransform(unittest.TestCase):
+
+    def test_geotransform(self):
+        transform = get_pixel_transform({'geotrn': (0, 1, 0, 0, 0, -1)})
+        self.assertTrue(isinstance(transform, GTMTransform))
+
+    def test_scattered_gcps(self):
+        transform = get_pixel_transform({
+            'gcps': make_gcps(SCATTERED, quadratic)
+        })
+        self.assertTrue(isinstance(transform, GCPTransform))
+        pixels = array([0.0, 123.0, 500.0, 999.0])
+        lines = array([0.0, 456.0, 350.0, 1.0])
+        x, y = transform(pixels, lines)
+        x_ref, y_ref = quadratic(pixels, lines)
+        self.assertTrue(allclose(x, x_ref) and allclose(y, y_ref))
+
+    def test_regular_gcps(self):
+        transform = get_pixel_transform({
+            'gcps': make_gcps(REGULAR, quadratic)
+        })
+        self.assertEqual(transform.__self__.__class__, GCPGrid)
+        x, y = transform(array([250.0]), array([350.0]))
+        self.assertTrue(allclose((x[0], y[0]), quadratic(250.0, 350.0)))
+
+    def test_regular_gcps_forced_order(self):
+        transform = get_pixel_transform({
+            'gcps': make_gcps(REGULAR, quadratic)
+        }, 1)
+        self.assertTrue(isinstance(transform, GCPTransform))
+
+
+class TestGCPTransform(unittest.TestCase):
+
+    def test_default_order(self):
+        transform = GCPTransform(make_gcps(SCATTERED, quadratic))
+        self.assertTrue(allclose(
+            transform(500.0, 350.0), quadratic(500.0, 350.0)
+        ))
+
+    def test_not_enough_gcps(self):
+        self.assertRaises(
+            ValueError, GCPTransform, make_gcps(SCATTERED[:5], quadratic), 2
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
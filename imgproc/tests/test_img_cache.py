@@ -0,0 +1,197 @@
+#-------------------------------------------------------------------------------
+#
+#  geometry operations disk cache tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name,protected-access
+
+import os
+import unittest
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+import img_cache
+from img_cache import DiskCache
+import img_geom as ig
+from tests.common import create_geometry, box
+
+
+class TemporaryCacheMixin(object):
+
+    def setUp(self):
+        self.path = mkdtemp()
+        self.environ = dict(os.environ)
+        os.environ[img_cache.CACHE_DIR_ENV] = self.path
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        img_cache._CACHE.clear()
+        rmtree(self.path)
+
+    def entries(self):
+        return sorted(
+            join(dirpath, filename) for dirpath, _, filenames
+            in os.walk(self.path) for filename in filenames
+        )
+
+
+class TestDiskCache(TemporaryCacheMixin, unittest.TestCase):
+
+    def test_round_trip(self):
+        cache = DiskCache(self.path)
+        key = cache.key("operation", "\x00\x01data", "")
+        self.assertIsNone(cache.get(key))
+        cache.put(key, "\x00\x01result")
+        self.assertEqual(cache.get(key), "\x00\x01result")
+        self.assertEqual(cache.size(), len("\x00\x01result"))
+        cache.put(key, "other")
+        self.assertEqual(cache.get(key), "other")
+
+    def test_key(self):
+        self.assertNotEqual(DiskCache.key("ab", "c"), DiskCache.key("a", "bc"))
+        self.assertEqual(DiskCache.key("ab", "c"), DiskCache.key("ab", "c"))
+
+    def test_eviction(self):
+        cache = DiskCache(self.path, max_size=1000)
+        keys = [cache.key(str(idx)) for idx in xrange(9)]
+        for idx, key in enumerate(keys):
+            cache.put(key, "x" * 100)
+            # distinct access times
+            os.utime(cache._entry_path(key), (idx, idx))
+        # refresh the oldest entry
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertEqual(cache.size(), 900)
+        # exceeding the limit evicts the LRU entries down to the ratio
+        cache.put(cache.key("last"), "x" * 200)
+        self.assertTrue(
+            cache.size() <= int(img_cache.EVICTION_RATIO * cache.max_size)
+        )
+        self.assertEqual(cache.size(), 800)
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertIsNone(cache.get(keys[2]))
+        self.assertIsNone(cache.get(keys[3]))
+        self.assertIsNotNone(cache.get(keys[0]))
+        self.assertIsNotNone(cache.get(keys[4]))
+        self.assertIsNotNone(cache.get(cache.key("last")))
+
+    def test_get_cache(self):
+        cache = img_cache.get_cache()
+        self.assertEqual(cache.path, self.path)
+        self.assertIs(img_cache.get_cache(), cache)
+        del os.environ[img_cache.CACHE_DIR_ENV]
+        self.assertIsNone(img_cache.get_cache())
+
+
+class TestCachedOperation(TemporaryCacheMixin, unittest.TestCase):
+
+    def setUp(self):
+        super(TestCachedOperation, self).setUp()
+        self.calls = []
+
+        @ig.cachedOperation("testOperation")
+        def operation(geom, distance, flag=False):
+            self.calls.append((distance, flag))
+            return ig.setSR(geom.Buffer(distance), geom.GetSpatialReference())
+
+        self.operation = operation
+        self.geom = create_geometry(
+            "POLYGON", [[box(0, 0, 1, 1)]], ig.parseSR("EPSG:4326")
+        )
+
+    def test_hit(self):
+        result = self.operation(self.geom, 1.0)
+        cached = self.operation(self.geom, 1.0)
+        self.assertEqual(self.calls, [(1.0, False)])
+        self.assertEqual(cached.ExportToWkb(), result.ExportToWkb())
+        self.assertEqual(
+            ig.dumpSR(cached.GetSpatialReference()), "EPSG:4326"
+        )
+        self.operation(self.geom, 2.0)
+        self.assertEqual(len(self.calls), 2)
+
+    def test_key_normalisation(self):
+        self.operation(self.geom, 1.0)
+        self.operation(self.geom, 1.0, False)
+        self.operation(self.geom, distance=1.0, flag=False)
+        self.operation(self.geom, flag=False, distance=1.0)
+        self.assertEqual(self.calls, [(1.0, False)])
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_wrap_arround_key_normalisation(self):
+        geom = create_geometry(
+            "POLYGON", [[box(170, 0, 190, 10)]], ig.parseSR("EPSG:4326")
+        )
+        results = [
+            ig.wrapArroundWGS84(geom), ig.wrapArroundWGS84(geom, 200),
+            ig.wrapArroundWGS84(geom, nstep=200),
+        ]
+        self.assertEqual(len(self.entries()), 1)
+        self.assertEqual(len(set(r.ExportToWkb() for r in results)), 1)
+        ig.wrapArroundWGS84(geom, 100)
+        self.assertEqual(len(self.entries()), 2)
+
+    def test_garbled_entry(self):
+        result = self.operation(self.geom, 1.0)
+        path, = self.entries()
+        for garbage in ("garbage", "\x01\x03\x00\x00", ""):
+            with open(path, "wb") as fobj:
+                fobj.write(garbage)
+            cached = self.operation(self.geom, 1.0)
+            self.assertEqual(cached.ExportToWkb(), result.ExportToWkb())
+        self.assertEqual(len(self.calls), 4)
+        # the entry is replaced by the recalculated result
+        self.operation(self.geom, 1.0)
+        self.assertEqual(len(self.calls), 4)
+
+    def test_disabled(self):
+        del os.environ[img_cache.CACHE_DIR_ENV]
+        self.operation(self.geom, 1.0)
+        self.operation(self.geom, 1.0)
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.entries(), [])
+
+    def test_map_to_wgs84_input_unmodified(self):
+        geom = create_geometry(
+            "POLYGON", [[box(400000, 5000000, 600000, 5200000)]],
+            ig.parseSR("EPSG:32633")
+        )
+        wkb = geom.ExportToWkb()
+        for _ in xrange(2): # miss and hit
+            result = ig.mapToWGS84(geom)
+            self.assertEqual(geom.ExportToWkb(), wkb)
+            self.assertEqual(
+                ig.dumpSR(geom.GetSpatialReference()), "EPSG:32633"
+            )
+            self.assertEqual(
+                ig.dumpSR(result.GetSpatialReference()), "EPSG:4326"
+            )
+            x_min, x_max, y_min, y_max = result.GetEnvelope()
+            self.assertTrue(13 < x_min < x_max < 17)
+            self.assertTrue(45 < y_min < y_max < 47)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+#-------------------------------------------------------------------------------
+#
+#  polygon ring splitting tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from numpy import array, array_equal, allclose, concatenate
+import img_rings
+
+# square exterior crossing the date-line
+EXTERIOR = array([
+    (170., -10.), (190., -10.), (190., 10.), (170., 10.), (170., -10.),
+])
+# hole crossing the date-line
+HOLE = array([(175., -5.), (175., 5.), (185., 5.), (185., -5.), (175., -5.)])
+# hole not crossing the date-line
+HOLE_EAST = array([
+    (182., -2.), (182., 2.), (188., 2.), (188., -2.), (182., -2.),
+])
+# U-shaped polygon opened to the east
+U_SHAPE = array([
+    (170., 0.), (190., 0.), (190., 2.), (172., 2.), (172., 8.), (190., 8.),
+    (190., 10.), (170., 10.), (170., 0.),
+])
+
+
+def area(polygons):
+    """ Total area of the polygons with the exterior rings counter-clockwise
+    and the interior rings clockwise.
+    """
+    return sum(
+        img_rings.signed_area(ring) for rings in polygons for ring in rings
+    )
+
+
+class TestRings(unittest.TestCase):
+
+    def assertValidPolygons(self, polygons):
+        for rings in polygons:
+            self.assertTrue(img_rings.signed_area(rings[0]) > 0)
+            for ring in rings:
+                self.assertTrue(array_equal(ring[0], ring[-1]))
+            for ring in rings[1:]:
+                self.assertTrue(img_rings.signed_area(ring) < 0)
+
+    def assertSide(self, polygons, x_min, x_max):
+        coords = concatenate([ring for rings in polygons for ring in rings])
+        self.assertTrue(coords[:, 0].min() >= x_min)
+        self.assertTrue(coords[:, 0].max() <= x_max)
+
+    def test_signed_area(self):
+        self.assertEqual(img_rings.signed_area(EXTERIOR), 400.)
+        self.assertEqual(img_rings.signed_area(EXTERIOR[:-1]), 400.)
+        self.assertEqual(img_rings.signed_area(HOLE), -100.)
+        coords = concatenate((EXTERIOR, HOLE, HOLE_EAST))
+        self.assertTrue(array_equal(
+            img_rings.signed_areas(coords, [0, 5, 10, 15]), [400, -100, -24]
+        ))
+
+    def test_orient_rings(self):
+        coords = concatenate((EXTERIOR[::-1], HOLE[::-1]))
+        oriented = img_rings.orient_rings(coords, [0, 5, 10], [True, False])
+        self.assertTrue(array_equal(oriented, concatenate((EXTERIOR, HOLE))))
+        oriented = img_rings.orient_rings(
+            coords, [0, 5, 10], [True, False], ccw=False
+        )
+        self.assertTrue(array_equal(oriented, coords))
+
+    def test_point_in_ring(self):
+        self.assertTrue(img_rings.point_in_ring((180., 0.), EXTERIOR))
+        self.assertFalse(img_rings.point_in_ring((180., 5.), U_SHAPE))
+        self.assertTrue(img_rings.point_in_ring((171., 5.), U_SHAPE))
+
+    def test_split_crossing_hole(self):
+        lower, upper = img_rings.split_polygon([EXTERIOR, HOLE], 180.)
+        self.assertEqual((len(lower), len(upper)), (1, 1))
+        self.assertEqual([len(rings) for rings in lower + upper], [1, 1])
+        self.assertValidPolygons(lower + upper)
+        self.assertSide(lower, 170., 180.)
+        self.assertSide(upper, 180., 190.)
+        self.assertEqual(area(lower), 150.)
+        self.assertEqual(area(upper), 150.)
+
+    def test_split_hole_on_one_side(self):
+        lower, upper = img_rings.split_polygon(
+            [EXTERIOR[::-1], HOLE_EAST], 180.
+        )
+        self.assertEqual([len(rings) for rings in lower], [1])
+        self.assertEqual([len(rings) for rings in upper], [2])
+        self.assertValidPolygons(lower + upper)
+        self.assertTrue(array_equal(upper[0][1], HOLE_EAST))
+        self.assertEqual(area(lower) + area(upper), 400. - 24.)
+
+    def test_split_concave(self):
+        lower, upper = img_rings.split_polygon([U_SHAPE], 180.)
+        self.assertEqual((len(lower), len(upper)), (1, 2))
+        self.assertValidPolygons(lower + upper)
+        self.assertSide(upper, 180., 190.)
+        self.assertEqual(area(lower), 10. * 2 * 2 + 2 * 6)
+        self.assertEqual(area(upper), 2 * 10. * 2)
+
+    def test_split_horizontal(self):
+        lower, upper = img_rings.split_polygon([EXTERIOR], 4., axis=1)
+        self.assertEqual((area(lower), area(upper)), (280., 120.))
+        self.assertTrue(concatenate(lower[0])[:, 1].max() <= 4.)
+        self.assertTrue(concatenate(upper[0])[:, 1].min() >= 4.)
+
+    def test_split_degenerate(self):
+        self.assertEqual(
+            img_rings.split_polygon([EXTERIOR[:1].repeat(4, axis=0)], 180.),
+            ([], [])
+        )
+
+    def test_split_polygons(self):
+        polygons = [[EXTERIOR, HOLE], [U_SHAPE - 20.]]
+        strips = img_rings.split_polygons(polygons, [185., 165., 180.])
+        self.assertEqual(len(strips), 4)
+        for strip, (x_min, x_max) in zip(strips, [
+                (150., 165.), (165., 180.), (180., 185.), (185., 190.),
+        ]):
+            self.assertValidPolygons(strip)
+            self.assertSide(strip, x_min, x_max)
+        self.assertTrue(allclose(
+            sum(area(strip) for strip in strips), 300. + area([[U_SHAPE]])
+        ))
+        # each polygon is cut by the lines crossing its envelope only
+        self.assertEqual(len(strips[0]), 1)
+
+    def test_date_line_wrap(self):
+        # the strip east of the date-line shifted back to the regular domain
+        _, upper = img_rings.split_polygon([EXTERIOR, HOLE], 180.)
+        shifted = [[ring - (360., 0.) for ring in rings] for rings in upper]
+        self.assertSide(shifted, -180., -170.)
+        self.assertEqual(area(shifted), 150.)
+
+    def test_clip_polygon(self):
+        clipped = img_rings.clip_polygon([U_SHAPE], (175., 1., 195., 9.))
+        self.assertEqual(len(clipped), 2)
+        self.assertValidPolygons(clipped)
+        self.assertEqual(area(clipped), 2 * 15.)
+        self.assertEqual(
+            img_rings.clip_polygon([EXTERIOR], (0., 0., 10., 10.)), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,187 @@
+#-------------------------------------------------------------------------------
+#
+#  vectorised polygon simplification tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name,protected-access
+
+import unittest
+from numpy import (
+    array, argmax, clip, cos, flatnonzero, linspace, pi, sin, vstack, c_,
+)
+from numpy.random import RandomState
+import img_simplify
+from img_rings import point_in_ring
+from img_wkb import FlatGeometry
+
+
+def segment_distance2(point, point_a, point_b):
+    vector = point_b - point_a
+    length2 = vector.dot(vector)
+    param = 0 if length2 == 0 else clip(
+        (point - point_a).dot(vector) / length2, 0, 1
+    )
+    delta = point - (point_a + param * vector)
+    return delta.dot(delta)
+
+
+def reference_dp(coords, tolerance):
+    """ Scalar recursive Douglas-Peucker. Returns the retained indices. """
+    keep, stack = [0, len(coords) - 1], [(0, len(coords) - 1)]
+    while stack:
+        start, stop = stack.pop()
+        if stop - start < 2:
+            continue
+        dist = [
+            segment_distance2(coords[idx], coords[start], coords[stop])
+            for idx in xrange(start + 1, stop)
+        ]
+        idx = int(argmax(dist))
+        if dist[idx] > tolerance * tolerance:
+            keep.append(start + 1 + idx)
+            stack += [(start, start + 1 + idx), (start + 1 + idx, stop)]
+    return sorted(keep)
+
+
+def circle(size, x_0, y_0, radius, noise=0.0, random=None):
+    angle = linspace(0, 2*pi, size, endpoint=False)
+    if noise:
+        radius = radius * (1 + noise * random.uniform(-1, 1, size))
+    ring = c_[x_0 + radius * cos(angle), y_0 + radius * sin(angle)]
+    return vstack((ring, ring[:1]))
+
+
+def is_crossing(point_a, point_b, point_c, point_d):
+    def orientation(point_p, point_q, point_r):
+        return cmp((point_q[0] - point_p[0]) * (point_r[1] - point_p[1]),
+                   (point_q[1] - point_p[1]) * (point_r[0] - point_p[0]))
+    return (
+        orientation(point_a, point_b, point_c) *
+        orientation(point_a, point_b, point_d) < 0 and
+        orientation(point_c, point_d, point_a) *
+        orientation(point_c, point_d, point_b) < 0
+    )
+
+
+def count_crossings(rings):
+    segments = [
+        (ring[idx], ring[idx + 1]) for ring in rings
+        for idx in xrange(len(ring) - 1)
+    ]
+    return sum(
+        is_crossing(seg1[0], seg1[1], seg2[0], seg2[1])
+        for idx, seg1 in enumerate(segments) for seg2 in segments[idx+1:]
+    )
+
+
+class TestSimplify(unittest.TestCase):
+
+    def test_reference_dp(self):
+        random = RandomState(3)
+        for _ in xrange(50):
+            rings = [
+                circle(random.randint(5, 300), 0, 0, 10, 0.2, random)
+                for _ in xrange(3)
+            ]
+            flat = FlatGeometry.from_parts(
+                "MULTIPOLYGON", [[ring] for ring in rings]
+            )
+            keep = img_simplify.simplify_rings(flat, 0.5)
+            for idx, ring in enumerate(rings):
+                ring_keep = keep[
+                    flat.ring_offsets[idx]:flat.ring_offsets[idx+1]
+                ]
+                self.assertEqual(
+                    list(flatnonzero(ring_keep)), reference_dp(ring, 0.5)
+                )
+
+    def test_crossing_hole(self):
+        # the simplified exterior cuts through the hole
+        shell = circle(200, 0, 0, 10)
+        hole = array([
+            (7, -1.25), (7, 1.25), (9.5, 1.25), (9.5, -1.25), (7, -1.25),
+        ])
+        flat = FlatGeometry.from_parts("POLYGON", [[shell, hole]])
+        result = img_simplify.simplify(flat, 1.5, False)
+        self.assertEqual(result.ring_count, 2)
+        self.assertTrue(count_crossings(list(result.rings())) > 0)
+        result = img_simplify.simplify(flat, 1.5, True)
+        self.assertEqual(result.ring_count, 2)
+        self.assertEqual(count_crossings(list(result.rings())), 0)
+        for point in result.ring(1):
+            self.assertTrue(point_in_ring(point, result.ring(0)))
+
+    def test_collapsed_hole(self):
+        shell = circle(200, 0, 0, 10)
+        hole = circle(40, 9, 0, 0.7)[::-1]
+        flat = FlatGeometry.from_parts("POLYGON", [[shell, hole]])
+        result = img_simplify.simplify(flat, 2.0, False)
+        self.assertEqual(result.ring_count, 1)
+        result = img_simplify.simplify(flat, 2.0, True)
+        self.assertEqual(result.ring_count, 2)
+        for point in result.ring(1):
+            self.assertTrue(point_in_ring(point, result.ring(0)))
+
+    def test_collapsed_exterior(self):
+        flat = FlatGeometry.from_parts("MULTIPOLYGON", [
+            [circle(100, 0, 0, 10)], [circle(100, 30, 0, 0.1)],
+        ])
+        result = img_simplify.simplify(flat, 1.0)
+        self.assertEqual(result.part_count, 1)
+        self.assertTrue(result.envelope()[1] <= 10)
+        result = img_simplify.simplify(flat, 100.0)
+        self.assertTrue(result.is_empty())
+
+    def test_escaped_hole(self):
+        # the hole lies in the removed bump of the exterior
+        shell = array([
+            (0, 0), (10, 0), (10, 10), (6, 10), (5, 12), (4, 10), (0, 10),
+            (0, 0),
+        ])
+        hole = array([
+            (4.9, 10.2), (4.9, 10.4), (5.1, 10.4), (5.1, 10.2), (4.9, 10.2),
+        ])
+        flat = FlatGeometry.from_parts("POLYGON", [[shell, hole]])
+        keep = array([True] * 3 + [False] * 3 + [True] * 7)
+        starts, stops = img_simplify._segments(keep, flat.ring_ids())
+        flagged = img_simplify._escaped_holes(
+            flat.coords, starts, stops, flat.ring_ids()[starts], flat
+        )
+        self.assertEqual(
+            zip(starts[flagged], stops[flagged]), [(2, 6)]
+        )
+        keep[4] = True
+        starts, stops = img_simplify._segments(keep, flat.ring_ids())
+        self.assertFalse(img_simplify._escaped_holes(
+            flat.coords, starts, stops, flat.ring_ids()[starts], flat
+        ).any())
+
+    def test_not_polygon(self):
+        flat = FlatGeometry.from_parts("LINESTRING", [[circle(10, 0, 0, 1)]])
+        self.assertRaises(ValueError, img_simplify.simplify, flat, 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+#-------------------------------------------------------------------------------
+#
+#  TWKB geometry encoding tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name,protected-access
+
+import unittest
+from numpy import allclose, array, array_equal, round as np_round
+import img_twkb
+import img_wkb
+from img_wkb import FlatGeometry
+from img_geom import sniffGeomFormat
+
+RING = array([(0.1, 0.2), (4.3, 0.4), (4.5, 3.6), (0.7, 3.8), (0.1, 0.2)])
+HOLE = array([(1.25, 1.5), (1.5, 2.75), (2.0, 2.0), (1.25, 1.5)])
+LINE = array([(-179.9999999, 89.1234567), (179.25, -89.5), (0.0, 0.0)])
+
+GEOMETRIES = [
+    ("POINT", [[LINE[:1]]]),
+    ("LINESTRING", [[LINE]]),
+    ("POLYGON", [[RING, HOLE]]),
+    ("MULTIPOINT", [[LINE[:1]], [LINE[1:2]]]),
+    ("MULTILINESTRING", [[LINE], [LINE[::-1]]]),
+    ("MULTIPOLYGON", [[RING, HOLE], [RING + 10.]]),
+]
+
+
+class TestTWKB(unittest.TestCase):
+
+    def assertSameGeometry(self, geom, type_, parts, precision, dims="XY"):
+        self.assertEqual(geom.type, type_)
+        self.assertEqual(geom.dims, dims)
+        self.assertEqual(geom.part_count, len(parts))
+        for part, expected in zip(geom.parts(), parts):
+            self.assertEqual(len(part), len(expected))
+            for ring, expected_ring in zip(part, expected):
+                self.assertTrue(allclose(
+                    ring, np_round(expected_ring, precision),
+                    rtol=0, atol=1e-9
+                ))
+
+    def test_round_trip(self):
+        for precision in (7, 3, 1, 0, -1):
+            for type_, parts in GEOMETRIES:
+                buf = img_twkb.dumps(
+                    FlatGeometry.from_parts(type_, parts), precision
+                )
+                self.assertTrue(img_twkb.is_twkb(buf))
+                self.assertEqual(img_twkb.size(buf), len(buf))
+                self.assertSameGeometry(
+                    img_twkb.loads(buf), type_, parts, precision
+                )
+
+    def test_round_trip_dims(self):
+        ring = array([(0, 0, 1, 2), (1, 0, 3, 4), (1, 1, 5, 6), (0, 0, 1, 2)])
+        for dims, ndim in (("XYZ", 3), ("XYM", 3), ("XYZM", 4)):
+            parts = [[ring[:, :ndim] + 0.5]]
+            buf = img_twkb.dumps(
+                FlatGeometry.from_parts("POLYGON", parts, dims), 2
+            )
+            self.assertSameGeometry(
+                img_twkb.loads(buf), "POLYGON", parts, 2, dims
+            )
+
+    def test_reference_encoding(self):
+        # examples of the TWKB specification (no size attribute)
+        point = img_twkb.loads(b"\x01\x00\x02\x04")
+        self.assertEqual(point.type, "POINT")
+        self.assertTrue(array_equal(point.coords, [(1, 2)]))
+        line = img_twkb.loads(b"\x02\x00\x02\x02\x02\x08\x08")
+        self.assertEqual(line.type, "LINESTRING")
+        self.assertTrue(array_equal(line.coords, [(1, 1), (5, 5)]))
+        # the writer adds the size attribute
+        self.assertEqual(
+            img_twkb.dumps(FlatGeometry.from_parts("POINT", [[[(1, 2)]]]), 0),
+            b"\x01\x02\x02\x02\x04"
+        )
+
+    def test_load_offset(self):
+        first = img_twkb.dumps(FlatGeometry.from_parts(*GEOMETRIES[2]), 2)
+        second = b"\x02\x00\x02\x02\x02\x08\x08"
+        geom, offset = img_twkb.load(first + second)
+        self.assertEqual(offset, len(first))
+        self.assertEqual(geom.type, "POLYGON")
+        geom, offset = img_twkb.load(first + second, offset)
+        self.assertEqual(offset, len(first + second))
+        self.assertEqual(geom.type, "LINESTRING")
+
+    def test_empty(self):
+        for type_ in ("POINT", "LINESTRING", "POLYGON", "MULTIPOLYGON"):
+            buf = img_twkb.dumps(FlatGeometry.from_parts(type_, []))
+            geom = img_twkb.loads(buf)
+            self.assertEqual(geom.type, type_)
+            self.assertTrue(geom.is_empty())
+            self.assertEqual(img_twkb.size(buf), len(buf))
+
+    def test_empty_members(self):
+        for type_, parts in (
+                ("MULTILINESTRING", [[], [LINE]]),
+                ("MULTIPOLYGON", [[RING, HOLE], [], [RING + 10.]]),
+        ):
+            buf = img_twkb.dumps(FlatGeometry.from_parts(type_, parts), 3)
+            self.assertSameGeometry(img_twkb.loads(buf), type_, parts, 3)
+        # the empty points of a multi-point cannot be encoded
+        buf = img_twkb.dumps(FlatGeometry.from_parts(
+            "MULTIPOINT", [[LINE[:1]], [], [LINE[1:2]]]
+        ), 3)
+        self.assertSameGeometry(
+            img_twkb.loads(buf), "MULTIPOINT", [[LINE[:1]], [LINE[1:2]]], 3
+        )
+
+    def test_invalid(self):
+        buf = img_twkb.dumps(FlatGeometry.from_parts(*GEOMETRIES[2]))
+        self.assertRaises(ValueError, img_twkb.loads, buf[:-1])
+        self.assertRaises(ValueError, img_twkb.loads, b"\x07\x00")
+        self.assertRaises(ValueError, img_twkb.loads, b"\x01\x20\x02\x04")
+        self.assertFalse(img_twkb.is_twkb(b"\x01"))
+        geom = FlatGeometry.from_parts(*GEOMETRIES[0])
+        self.assertRaises(ValueError, img_twkb.dumps, geom, 8)
+        self.assertRaises(ValueError, img_twkb.dumps, geom, -9)
+
+    def test_varints(self):
+        values = array([0, 1, -1, 63, -64, 64, 2**31, -2**31, 2**62, -2**63])
+        zigzag = img_twkb._zigzag(values)
+        self.assertEqual(list(zigzag[:5]), [0, 2, 1, 126, 127])
+        self.assertTrue(array_equal(img_twkb._unzigzag(zigzag), values))
+        data = img_twkb._encode_varints(zigzag)
+        self.assertEqual(img_twkb._encode_varints([300]), b"\xac\x02")
+        decoded, ends = img_twkb._decode_varints(data)
+        self.assertTrue(array_equal(decoded, zigzag))
+        self.assertEqual(ends[-1], len(data))
+        self.assertEqual(img_twkb._read_varint(data, 0), (0, 1))
+
+    def test_sniffing(self):
+        # the zero precision TWKB points and line-strings start with
+        # the same bytes as WKB
+        for precision in (7, 3, 1, 0, -1):
+            for type_, parts in GEOMETRIES:
+                buf = img_twkb.dumps(
+                    FlatGeometry.from_parts(type_, parts), precision
+                )
+                self.assertEqual(sniffGeomFormat(buf), "TWKB")
+                self.assertEqual(sniffGeomFormat(
+                    img_wkb.dumps(FlatGeometry.from_parts(type_, parts))
+                ), "WKB")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+#-------------------------------------------------------------------------------
+#
+#  Native WKB codec tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import struct
+import unittest
+from numpy import array, array_equal, isnan
+import img_wkb
+from img_wkb import FlatGeometry
+
+RING = array([(0., 0.), (4., 0.), (4., 3.), (0., 3.), (0., 0.)])
+HOLE = array([(1., 1.), (1., 2.), (2., 2.), (1., 1.)])
+LINE = array([(-1.5, 2.25), (3.0, -7.125), (1e10, -1e-10)])
+
+GEOMETRIES = [
+    ("POINT", [[LINE[:1]]]),
+    ("LINESTRING", [[LINE]]),
+    ("POLYGON", [[RING, HOLE]]),
+    ("MULTIPOINT", [[LINE[:1]], [LINE[1:2]]]),
+    ("MULTILINESTRING", [[LINE], [LINE[::-1]]]),
+    ("MULTIPOLYGON", [[RING, HOLE], [RING + 10.]]),
+]
+
+
+def wkb_linestring(coords, byte_order="<"):
+    """ Reference WKB line-string encoded by struct. """
+    return struct.pack(
+        byte_order + "BII", 1 if byte_order == "<" else 0, 2, len(coords)
+    ) + b"".join(struct.pack(byte_order + "dd", x, y) for x, y in coords)
+
+
+class TestWKB(unittest.TestCase):
+
+    def assertSameGeometry(self, geom, type_, parts, dims="XY"):
+        self.assertEqual(geom.type, type_)
+        self.assertEqual(geom.dims, dims)
+        self.assertEqual(geom.part_count, len(parts))
+        for part, expected in zip(geom.parts(), parts):
+            self.assertEqual(len(part), len(expected))
+            for ring, expected_ring in zip(part, expected):
+                self.assertTrue(array_equal(ring, expected_ring))
+
+    def test_round_trip(self):
+        for type_, parts in GEOMETRIES:
+            for byte_order in ("<", ">"):
+                buf = img_wkb.dumps(
+                    FlatGeometry.from_parts(type_, parts), byte_order
+                )
+                self.assertEqual(img_wkb.size(buf), len(buf))
+                self.assertEqual(img_wkb.geometry_type(buf), type_)
+                self.assertSameGeometry(img_wkb.loads(buf), type_, parts)
+
+    def test_round_trip_dims(self):
+        ring = array([(0, 0, 1, 2), (1, 0, 3, 4), (1, 1, 5, 6), (0, 0, 1, 2)])
+        for dims, ndim in (("XYZ", 3), ("XYM", 3), ("XYZM", 4)):
+            parts = [[ring[:, :ndim]]]
+            buf = img_wkb.dumps(FlatGeometry.from_parts("POLYGON", parts, dims))
+            self.assertSameGeometry(img_wkb.loads(buf), "POLYGON", parts, dims)
+
+    def test_reference_encoding(self):
+        for byte_order in ("<", ">"):
+            ref = wkb_linestring(LINE, byte_order)
+            geom = FlatGeometry.from_parts("LINESTRING", [[LINE]])
+            self.assertEqual(img_wkb.dumps(geom, byte_order), ref)
+            self.assertSameGeometry(img_wkb.loads(ref), "LINESTRING", [[LINE]])
+
+    def test_load_offset(self):
+        first, second = wkb_linestring(LINE), wkb_linestring(LINE[::-1])
+        buf = first + second
+        geom, offset = img_wkb.load(buf)
+        self.assertEqual(offset, len(first))
+        self.assertSameGeometry(geom, "LINESTRING", [[LINE]])
+        geom, offset = img_wkb.load(buf, offset)
+        self.assertEqual(offset, len(buf))
+        self.assertSameGeometry(geom, "LINESTRING", [[LINE[::-1]]])
+
+    def test_empty(self):
+        for type_ in ("POINT", "LINESTRING", "POLYGON", "MULTIPOLYGON"):
+            buf = img_wkb.dumps(FlatGeometry.from_parts(type_, []))
+            geom = img_wkb.loads(buf)
+            self.assertEqual(geom.type, type_)
+            self.assertTrue(geom.is_empty())
+            self.assertEqual(geom.part_count, 0)
+        # empty point is encoded as NaN coordinates
+        self.assertTrue(isnan(struct.unpack_from(
+            "<dd", img_wkb.dumps(FlatGeometry.from_parts("POINT", [])), 5
+        )).all())
+
+    def test_empty_members(self):
+        for type_, parts in (
+                ("MULTIPOINT", [[LINE[:1]], [], [LINE[1:2]]]),
+                ("MULTILINESTRING", [[], [LINE]]),
+                ("MULTIPOLYGON", [[RING, HOLE], [], [RING + 10.]]),
+        ):
+            buf = img_wkb.dumps(FlatGeometry.from_parts(type_, parts))
+            geom = img_wkb.loads(buf)
+            self.assertSameGeometry(geom, type_, parts)
+            self.assertEqual(img_wkb.dumps(geom), buf)
+
+    def test_invalid(self):
+        buf = wkb_linestring(LINE)
+        for invalid in (
+                buf[:-1], b"\x02" + buf[1:], buf[:1] + b"\x09" + buf[2:], b"",
+        ):
+            self.assertRaises(ValueError, img_wkb.loads, invalid)
+        self.assertRaises(ValueError, img_wkb.size, buf[:-8])
+
+    def test_flat_geometry(self):
+        geom = FlatGeometry.from_parts(*GEOMETRIES[-1])
+        self.assertEqual(geom.ring_count, 3)
+        self.assertEqual(list(geom.ring_sizes), [5, 4, 5])
+        self.assertEqual(list(geom.exterior_mask()), [True, False, True])
+        self.assertEqual(list(geom.ring_ids()), [0]*5 + [1]*4 + [2]*5)
+        self.assertEqual(geom.envelope(), (0., 14., 0., 13.))
+        self.assertTrue(array_equal(geom.ring(1), HOLE))
+        self.assertIsNone(FlatGeometry.from_parts("POLYGON", []).envelope())
+
+
+if __name__ == "__main__":
+    unittest.main()
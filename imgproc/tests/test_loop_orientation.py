@@ -0,0 +1,90 @@
+#-------------------------------------------------------------------------------
+#
+#  ring orientation tools tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import sys
+import unittest
+from StringIO import StringIO
+from numpy import array
+import img_geom as ig
+from img_rings import signed_area
+from geom_loop_orientation_print import dump_winding
+from tests.common import create_geometry
+
+RING = array([(0., 0.), (4., 0.), (4., 3.), (0., 3.), (0., 0.)])
+HOLE = array([(1., 1.), (2., 1.), (2., 2.), (1., 1.)])
+
+
+def capture_winding(geom):
+    stdout, sys.stdout = sys.stdout, StringIO()
+    try:
+        dump_winding(geom)
+        return [line.strip() for line in sys.stdout.getvalue().splitlines()]
+    finally:
+        sys.stdout = stdout
+
+
+class TestLoopOrientation(unittest.TestCase):
+
+    def test_force_winding(self):
+        geom = create_geometry(
+            "MULTIPOLYGON", [[RING[::-1], HOLE[::-1]], [RING + 10.]]
+        )
+        for is_cw, signs in ((False, [1, -1, 1]), (True, [-1, 1, -1])):
+            flat = ig.geomToFlat(ig.forceWinding(geom, is_cw))
+            self.assertEqual(
+                [cmp(signed_area(ring), 0) for ring in flat.rings()], signs
+            )
+
+    def test_force_winding_empty_member(self):
+        geom = create_geometry("MULTIPOLYGON", [[RING[::-1]], [], [RING]])
+        flat = ig.geomToFlat(ig.forceWinding(geom))
+        self.assertEqual(flat.part_count, 3)
+        self.assertEqual([len(part) for part in flat.parts()], [1, 0, 1])
+        self.assertEqual(
+            [cmp(signed_area(ring), 0) for ring in flat.rings()], [1, 1]
+        )
+
+    def test_print_winding(self):
+        geom = create_geometry("POLYGON", [[RING, HOLE[::-1]]])
+        self.assertEqual(capture_winding(geom), [
+            "POLYGON", "LINEARRING(O) CCW", "LINEARRING(I) CW",
+        ])
+
+    def test_print_winding_empty_member(self):
+        geom = create_geometry("MULTIPOLYGON", [[RING], [], [RING[::-1]]])
+        self.assertEqual(capture_winding(geom), [
+            "MULTIPOLYGON",
+            "POLYGON", "LINEARRING(O) CCW",
+            "POLYGON",
+            "POLYGON", "LINEARRING(O) CW",
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
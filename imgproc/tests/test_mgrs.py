@@ -0,0 +1,115 @@
+#-------------------------------------------------------------------------------
+#
+#  vectorised MGRS tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from numpy import array, where
+from numpy.random import RandomState
+import mgrs
+
+
+def random_utm(size, seed=0):
+    random = RandomState(seed)
+    is_north = random.rand(size) < 0.5
+    return (
+        random.uniform(150000, 850000, size),
+        where(
+            is_north, random.uniform(0, 9400000, size),
+            random.uniform(1100000, 10000000, size)
+        ),
+        random.randint(1, 61, size),
+        is_north,
+    )
+
+
+class TestMGRS(unittest.TestCase):
+
+    def test_encode(self):
+        east, north, utmz, is_north = random_utm(2000)
+        for precision in (0, 1, 3, 5):
+            for leading_zero in (True, False):
+                self.assertEqual(
+                    list(mgrs.getUTM2MGRSSqIdArray(
+                        east, north, utmz, is_north, precision, leading_zero
+                    )), [
+                        mgrs.getUTM2MGRSSqId(
+                            *(args + (precision, leading_zero))
+                        ) for args in zip(east, north, utmz, is_north)
+                    ]
+                )
+
+    def test_encode_broadcast(self):
+        codes = mgrs.getUTM2MGRSSqIdArray(
+            array([[450000.], [550000.]]), array([5500000., 6500000.]),
+            33, True, 2
+        )
+        self.assertEqual(codes.shape, (2, 2))
+        self.assertEqual(codes[1, 0], mgrs.getUTM2MGRSSqId(
+            550000., 5500000., 33, True, 2
+        ))
+
+    def test_decode(self):
+        east, north, utmz, is_north = random_utm(2000, 1)
+        codes = list(
+            mgrs.getUTM2MGRSSqIdArray(east, north, utmz, is_north, 3, False)
+        ) + list(
+            mgrs.getUTM2MGRSSqIdArray(east, north, utmz, is_north, 0)
+        ) + ["33 U VP 1234", "4qfj12345678"]
+        valid, expected = [], []
+        for code in codes:
+            try:
+                location = mgrs.MGRS(code)
+            except ValueError:
+                continue
+            valid.append(code)
+            expected.append(location.getCornerSW()[:2] + (
+                location.precision, location.epsg
+            ))
+        self.assertTrue(len(valid) > len(codes) // 2)
+        self.assertEqual(
+            zip(*mgrs.getMGRS2UTMArray(array(valid))), expected
+        )
+
+    def test_decode_shape(self):
+        result = mgrs.getMGRS2UTMArray(array([["33UVP"], ["1CAL12"]]))
+        for values in result:
+            self.assertEqual(values.shape, (2, 1))
+
+    def test_decode_invalid(self):
+        self.assertRaises(ValueError, mgrs.getMGRS2UTMArray, ["32XAB"])
+        self.assertRaises(ValueError, mgrs.getMGRS2UTMArray, ["33UVP123"])
+
+    def test_utm_zone_of_ll(self):
+        self.assertEqual(list(mgrs.getUTMZoneOfLL(
+            [-180., 179.9, 180., 0., 5., 10.7, 15., 30., 5.],
+            [0., 0., 0., 0., 60., 59.9, 78., 78., 50.],
+        )), [1, 60, 1, 31, 32, 32, 33, 35, 31])
+
+
+if __name__ == "__main__":
+    unittest.main()
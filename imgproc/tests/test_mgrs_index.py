@@ -0,0 +1,174 @@
+#-------------------------------------------------------------------------------
+#
+#  tile routing tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from os import remove
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from osgeo import ogr
+import img_geom as ig
+import utm
+import mgrs
+from mgrs_index import MGRSIndex, buildIndex, HEADER, MAGIC
+from geom_cut_to_mgrs_grid import chop2mgrs
+
+ZONES = (1, 31, 32, 60)
+
+
+def chop2mgrs_sqids(geom, zones):
+    """ Square IDs of the indexed zones following the default (non-indexed)
+        path of geom_cut_to_mgrs_grid.py.
+    """
+    geom = ig.wrapArroundWGS84(geom)
+    sqids = set()
+    for zone, zg in utm.getUTMZoneIndex(True, True, 0).intersecting(geom):
+        if zone in zones:
+            sqids.update(chop2mgrs(
+                ig.setSR(zg.Intersection(geom), zg.GetSpatialReference()), zone
+            ))
+    return sorted(sqids)
+
+
+def wgs84(wkt):
+    return ig.setSR(ogr.CreateGeometryFromWkt(wkt), ig.OSR_WGS84)
+
+
+class TestMGRSIndex(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = mkdtemp()
+        cls.path = join(cls.tmpdir, "mgrs.idx")
+        buildIndex(cls.path, zones=ZONES)
+        cls.index = MGRSIndex(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.index
+        rmtree(cls.tmpdir)
+
+    def geom_query(self, geom):
+        geom = ig.wrapArroundWGS84(geom)
+        return sorted(self.index.records['sqid'][self.index.geomQuery(geom)])
+
+    def bbox_query(self, bbox):
+        return sorted(self.index.records['sqid'][self.index.bboxQuery(bbox)])
+
+    def assertSameAsChop2MGRS(self, wkt):
+        geom = wgs84(wkt)
+        expected = chop2mgrs_sqids(geom.Clone(), ZONES)
+        self.assertTrue(expected)
+        self.assertEqual(self.geom_query(geom.Clone()), expected)
+        # the bounding boxes of the squares cover the squares
+        x0, x1, y0, y1 = geom.GetEnvelope()
+        bbox_sqids = self.bbox_query((x0, y0, x1, y1))
+        self.assertTrue(set(expected) <= set(bbox_sqids))
+
+    def test_records(self):
+        self.assertTrue(len(self.index) > 0)
+        self.assertEqual(sorted(set(self.index.records['utmz'])), list(ZONES))
+        with open(self.path, "rb") as fobj:
+            magic, count, _ = HEADER.unpack(fobj.read(HEADER.size))
+        self.assertEqual(magic, MAGIC)
+        self.assertEqual(count, len(self.index))
+        for idx in (0, len(self.index) // 2, len(self.index) - 1):
+            rec = self.index[idx]
+            square = mgrs.MGRS(rec['sqid'])
+            self.assertEqual(rec['utmz'], square.utmz)
+            self.assertEqual(rec['epsg'], square.epsg)
+            self.assertEqual(
+                tuple(rec['utm_bounds']),
+                square.getCornerSW() + square.getCornerNE()
+            )
+            x0, x1, y0, y1 = self.index.getPolygon(idx).GetEnvelope()
+            self.assertEqual(tuple(rec['bbox']), (x0, y0, x1, y1))
+
+    def test_invalid_file(self):
+        path = join(self.tmpdir, "invalid.idx")
+        with open(path, "wb") as fobj:
+            fobj.write(HEADER.pack("INVALID!", 0, 0))
+        try:
+            self.assertRaises(ValueError, MGRSIndex, path)
+        finally:
+            remove(path)
+
+    def test_single_square(self):
+        self.assertSameAsChop2MGRS(
+            "POLYGON((9.2 48.1,9.6 48.1,9.6 48.4,9.2 48.4,9.2 48.1))"
+        )
+
+    def test_multiple_squares(self):
+        self.assertSameAsChop2MGRS(
+            "POLYGON((7.3 46.1,10.7 46.2,10.1 48.6,7.9 48.3,7.3 46.1))"
+        )
+
+    def test_zone_boundary(self):
+        self.assertSameAsChop2MGRS(
+            "POLYGON((4.7 51.1,7.4 51.1,7.4 51.9,4.7 51.9,4.7 51.1))"
+        )
+
+    def test_date_line_east(self):
+        # crossing +180dg and wrapped around to the western hemisphere
+        self.assertSameAsChop2MGRS(
+            "POLYGON((179.5 -40,180.5 -40,180.5 -39.6,179.5 -39.6,179.5 -40))"
+        )
+
+    def test_date_line_west(self):
+        # crossing -180dg and wrapped around to the eastern hemisphere
+        self.assertSameAsChop2MGRS(
+            "POLYGON((-180.5 40,-179.5 40,-179.5 40.4,-180.5 40.4,-180.5 40))"
+        )
+
+    def test_multipolygon(self):
+        self.assertSameAsChop2MGRS(
+            "MULTIPOLYGON(((9.2 48.1,9.6 48.1,9.6 48.4,9.2 48.4,9.2 48.1)),"
+            "((179.6 10.1,179.9 10.1,179.9 10.4,179.6 10.4,179.6 10.1)))"
+        )
+
+    def test_outside_of_the_indexed_zones(self):
+        geom = wgs84(
+            "POLYGON((50.2 10.1,50.6 10.1,50.6 10.4,50.2 10.4,50.2 10.1))"
+        )
+        self.assertEqual(chop2mgrs_sqids(geom.Clone(), ZONES), [])
+        self.assertEqual(self.geom_query(geom), [])
+        self.assertEqual(self.bbox_query((50.2, 10.1, 50.6, 10.4)), [])
+
+    def test_bbox_across_date_line(self):
+        # the +/-360dg shifted bounding boxes select the same squares
+        self.assertEqual(
+            self.bbox_query((179.5, -40.0, 180.5, -39.6)),
+            self.bbox_query((-180.5, -40.0, -179.5, -39.6)),
+        )
+        sqids = self.bbox_query((179.5, -40.0, 180.5, -39.6))
+        self.assertEqual(set(sqid[:2] for sqid in sqids), set(["01", "60"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+#-------------------------------------------------------------------------------
+#
+#  tile routing tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import unittest
+from threading import Lock
+from numpy import arange, zeros, array_equal
+from img.extent import Extent
+from img.routing import route_tiles, copy_subsets, tile_count
+
+
+class MemoryReader(Extent):
+    """ In-memory image reader recording the read extents. """
+
+    def __init__(self, size_x, size_y, size_z=2):
+        super(MemoryReader, self).__init__((size_x, size_y, size_z))
+        self.data = arange(size_x * size_y * size_z, dtype='int32').reshape(
+            (size_y, size_x, size_z)
+        )
+        self.dtype = self.data.dtype
+        self.reads = []
+
+    def read(self, block):
+        self.reads.append(Extent(block))
+        overlap = self & block
+        if overlap.extent > 0:
+            src = overlap.offset - self.offset
+            dst = overlap.offset - block.offset
+            size = overlap.size
+            block.data[
+                dst.y:dst.y + size.y, dst.x:dst.x + size.x, :
+            ] = self.data[src.y:src.y + size.y, src.x:src.x + size.x, :]
+        return block
+
+
+class MemoryWriter(Extent):
+    """ In-memory image writer counting writes of each pixel. """
+
+    def __init__(self, size_x, size_y, size_z=2):
+        super(MemoryWriter, self).__init__((size_x, size_y, size_z))
+        self.data = zeros((size_y, size_x, size_z), 'int32')
+        self.counts = zeros((size_y, size_x), 'int32')
+        self.lock = Lock()
+
+    def write(self, block):
+        overlap = self & block
+        if overlap.extent > 0:
+            dst = overlap.offset - self.offset
+            src = overlap.offset - block.offset
+            size = overlap.size
+            with self.lock:
+                self.data[
+                    dst.y:dst.y + size.y, dst.x:dst.x + size.x, :
+                ] = block.data[
+                    src.y:src.y + size.y, src.x:src.x + size.x, :
+                ]
+                self.counts[dst.y:dst.y + size.y, dst.x:dst.x + size.x] += 1
+        return block
+
+
+def window(offset_x, offset_y, size_x, size_y):
+    return Extent((size_x, size_y, 2), (offset_x, offset_y, 0))
+
+
+def overlaps(extent0, extent1):
+    return (extent0 & extent1).extent > 0
+
+
+class TestRouteTiles(unittest.TestCase):
+
+    def test_routing(self):
+        image = Extent((100, 80, 1))
+        windows = [
+            window(0, 0, 10, 10), window(5, 5, 30, 10), window(70, 60, 30, 20),
+            window(50, 50, 0, 10), # empty
+        ]
+        routed = list(route_tiles(image, windows, (16, 16)))
+        for tile, indices in routed:
+            self.assertEqual(list(indices), [
+                idx for idx, win in enumerate(windows) if overlaps(tile, win)
+            ])
+            self.assertNotIn(3, indices)
+        # all tiles overlapping any window are routed
+        self.assertEqual(len(routed), sum(
+            1 for tile in image.tiles((16, 16))
+            if any(overlaps(tile, win) for win in windows)
+        ))
+
+    def test_no_windows(self):
+        image = Extent((100, 80, 1))
+        self.assertEqual(list(route_tiles(image, [], (16, 16))), [])
+        self.assertEqual(
+            list(route_tiles(image, [window(10, 10, 0, 0)], (16, 16))), []
+        )
+
+    def test_tiles_clipped_to_image(self):
+        image = Extent((50, 40, 1))
+        for tile, _ in route_tiles(image, [window(0, 0, 50, 40)], (32, 32)):
+            self.assertEqual((tile & image).size, tile.size)
+
+
+class TestCopySubsets(unittest.TestCase):
+
+    def test_copy(self):
+        img_in = MemoryReader(100, 80)
+        subsets = [
+            window(0, 0, 10, 10), window(5, 5, 30, 10), window(3, 40, 60, 33),
+            window(90, 70, 20, 20), # partly outside of the input
+            window(200, 200, 10, 10), # outside of the input
+            window(20, 20, 0, 5), # empty
+        ]
+        outputs = [
+            (subset, MemoryWriter(subset.size.x, subset.size.y))
+            for subset in subsets
+        ]
+        copy_subsets(img_in, outputs, (16, 16), nthreads=3)
+
+        for subset, writer in outputs:
+            inner = subset & img_in
+            if inner.extent <= 0:
+                self.assertEqual(writer.counts.sum(), 0)
+                continue
+            start = inner.offset - subset.offset
+            x_0, y_0 = start.x, start.y
+            x_1, y_1 = x_0 + inner.size.x, y_0 + inner.size.y
+            # each pixel inside of the input written exactly once
+            self.assertTrue((writer.counts[y_0:y_1, x_0:x_1] == 1).all())
+            self.assertEqual(writer.counts.sum(), inner.size.x * inner.size.y)
+            self.assertTrue(array_equal(
+                writer.data[y_0:y_1, x_0:x_1],
+                img_in.data[
+                    inner.offset.y:inner.offset.y + inner.size.y,
+                    inner.offset.x:inner.offset.x + inner.size.x,
+                ]
+            ))
+
+        # each routed tile read once, tiles outside all windows skipped
+        windows = [subset & img_in for subset in subsets]
+        self.assertEqual(
+            len(img_in.reads), tile_count(img_in, subsets, (16, 16))
+        )
+        offsets = [(read.offset.x, read.offset.y) for read in img_in.reads]
+        self.assertEqual(len(set(offsets)), len(offsets))
+        for read in img_in.reads:
+            self.assertTrue(any(overlaps(read, win) for win in windows))
+        self.assertTrue(len(img_in.reads) < img_in.tile_count((16, 16)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,208 @@
+#-------------------------------------------------------------------------------
+#
+#  tile routing tests
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+#pylint: disable=missing-docstring,invalid-name
+
+import os
+import sys
+import json
+import unittest
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from cStringIO import StringIO
+from base64 import b64encode, b64decode
+from tool_worker import process_request, serve_stream, run_tool
+
+POLYGON = "POLYGON((9.2 48.1,9.6 48.1,9.6 48.4,9.2 48.4,9.2 48.1))"
+
+# tool echoing its arguments and standard input
+ECHO_TOOL = """
+import os
+import sys
+os.chdir("/")
+os.environ["TOOL_WORKER_TEST"] = "1"
+sys.stdout.write(" ".join(sys.argv[1:]) + ":" + sys.stdin.read())
+if sys.argv[1:2] == ["FAIL"]:
+    raise RuntimeError("tool failure")
+elif sys.argv[1:2] == ["EXIT"]:
+    sys.exit(int(sys.argv[2]))
+elif sys.argv[1:2] == ["MESSAGE"]:
+    sys.exit("tool message")
+"""
+
+
+def request(**kwargs):
+    if "stdin" in kwargs:
+        kwargs["stdin"] = b64encode(kwargs["stdin"])
+    return json.dumps(kwargs)
+
+
+def reply(line):
+    response = json.loads(line)
+    response["stdout"] = b64decode(response["stdout"])
+    return response
+
+
+class TestToolWorker(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = mkdtemp()
+        cls.tool = join(cls.tmpdir, "echo_tool.py")
+        with open(cls.tool, "w") as fout:
+            fout.write(ECHO_TOOL)
+
+    @classmethod
+    def tearDownClass(cls):
+        rmtree(cls.tmpdir)
+
+    def process(self, **kwargs):
+        return reply(process_request(request(**kwargs)))
+
+    def assertError(self, response, job_id=None):
+        self.assertEqual(response["id"], job_id)
+        self.assertEqual(response["status"], 1)
+        self.assertEqual(response["stdout"], "")
+        self.assertTrue(response["stderr"].startswith("ERROR: "))
+
+    def assertSameAsTool(self, function, params, tool, args):
+        by_function = self.process(
+            id=1, function=function, params=params, format="WKT",
+            stdin=POLYGON,
+        )
+        by_tool = self.process(id=2, tool=tool, args=args, stdin=POLYGON)
+        self.assertEqual(by_function["status"], 0)
+        self.assertEqual(by_tool["status"], 0)
+        self.assertEqual(by_function["stdout"], by_tool["stdout"])
+        self.assertTrue(by_function["stdout"])
+
+    def test_tool(self):
+        cwd, environ, argv = os.getcwd(), dict(os.environ), list(sys.argv)
+        response = self.process(
+            id="job", tool=self.tool, args=["A", 1], stdin="input"
+        )
+        self.assertEqual(response, {
+            "id": "job", "status": 0, "stdout": "A 1:input", "stderr": "",
+        })
+        self.assertEqual(os.getcwd(), cwd)
+        self.assertEqual(dict(os.environ), environ)
+        self.assertEqual(sys.argv, argv)
+
+    def test_tool_exit_status(self):
+        response = self.process(id=1, tool=self.tool, args=["EXIT", 3])
+        self.assertEqual(response["status"], 3)
+        self.assertEqual(response["stdout"], "EXIT 3:")
+        response = self.process(id=1, tool=self.tool, args=["MESSAGE"])
+        self.assertEqual(response["status"], 1)
+        self.assertEqual(response["stderr"], "tool message\n")
+
+    def test_tool_exception(self):
+        response = self.process(id=1, tool=self.tool, args=["FAIL"])
+        self.assertEqual(response["status"], 1)
+        self.assertEqual(response["stdout"], "FAIL:")
+        self.assertTrue(response["stderr"].startswith("Traceback"))
+        self.assertTrue("RuntimeError: tool failure" in response["stderr"])
+
+    def test_tool_from_tool_path(self):
+        status, output, _ = run_tool(
+            "geom_loop_orientation_print", ["-"], stdin=POLYGON
+        )
+        self.assertEqual(status, 0)
+        self.assertEqual(output, " POLYGON\n  LINEARRING(O) CCW\n")
+
+    def test_invalid_tool(self):
+        self.assertError(self.process(id=5, tool="no_such_tool.py"), 5)
+
+    def test_function_print_winding(self):
+        self.assertSameAsTool(
+            "print_winding", {}, "geom_loop_orientation_print.py", ["-"]
+        )
+
+    def test_function_force_winding(self):
+        self.assertSameAsTool(
+            "force_winding", {"is_cw": True},
+            "geom_loop_orientation_force.py", ["-", "CW", "WKT"]
+        )
+
+    def test_function_cut_to_mgrs_grid(self):
+        self.assertSameAsTool(
+            "cut_to_mgrs_grid", {}, "geom_cut_to_mgrs_grid.py", ["-"]
+        )
+
+    def test_function_geometry_stream(self):
+        response = self.process(
+            id=1, function="print_winding", stdin="%s\n%s\n" % (
+                POLYGON, POLYGON
+            )
+        )
+        self.assertEqual(response["status"], 0)
+        self.assertEqual(
+            response["stdout"], 2 * " POLYGON\n  LINEARRING(O) CCW\n"
+        )
+
+    def test_invalid_function(self):
+        self.assertError(self.process(id=1, function="no_such_function"), 1)
+
+    def test_invalid_parameter(self):
+        self.assertError(self.process(
+            id=1, function="force_winding", params={"no_such_parameter": 1},
+            stdin=POLYGON,
+        ), 1)
+
+    def test_invalid_input(self):
+        response = self.process(
+            id=1, function="print_winding", stdin="NOT A GEOMETRY"
+        )
+        self.assertError(response, 1)
+        self.assertTrue(response["stderr"].startswith("ERROR: print_winding:"))
+
+    def test_invalid_request(self):
+        self.assertError(reply(process_request("{not JSON")))
+        self.assertError(reply(process_request('{"id": 1}')), 1)
+        self.assertError(reply(process_request(
+            '{"id": 1, "tool": "%s", "stdin": "not base64!"}' % self.tool
+        )), 1)
+
+    def test_serve_stream(self):
+        fin = StringIO("\n".join([
+            request(id=1, tool=self.tool, args=["A"], stdin="a"),
+            "",
+            "{not JSON",
+            request(id=3, tool=self.tool, args=["B"], stdin="b"),
+        ]) + "\n")
+        fout = StringIO()
+        serve_stream(fin, fout)
+        responses = [reply(line) for line in fout.getvalue().splitlines()]
+        self.assertEqual([resp["id"] for resp in responses], [1, None, 3])
+        self.assertEqual([resp["status"] for resp in responses], [0, 1, 0])
+        self.assertEqual(responses[0]["stdout"], "A:a")
+        self.assertEqual(responses[2]["stdout"], "B:b")
+
+
+if __name__ == "__main__":
+    unittest.main()
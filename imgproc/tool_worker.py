@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+#-------------------------------------------------------------------------------
+#
+#  Persistent tool worker.
+#
+#    This module allows execution of the command-line tools (both 'imgproc'
+#    and 'metadata') inside of an already running Python interpreter.
+#    The tools can be either executed via the importable run_tool() function
+#    or by a long-running worker process receiving the job requests
+#    over its standard input or a local (Unix domain) socket.
+#
+#    The job requests and responses are JSON objects, one per line:
+#
+#      request:  {"id": <any>, "tool": <tool name>, "args": [<argument>, ...],
+#                 "stdin": <base64 encoded input>}
+#      request:  {"id": <any>, "function": <function name>,
+#                 "params": {<parameter>: <value>, ...}, "format": <format>,
+#                 "stdin": <base64 encoded input geometries>}
+#      response: {"id": <any>, "status": <exit code>,
+#                 "stdout": <base64 encoded output>, "stderr": <error output>}
+#
+#    The heavy modules (GDAL/OGR, NumPy, LXML, the shared modules) are
+#    imported only once and they are shared by all executed jobs.
+#    The "function" requests call the geometry functions of the hot tools
+#    directly, the "tool" requests execute the complete tool scripts.
+#
+#    The "function" requests are limited to the tools processing one input
+#    geometry at a time (see FUNCTIONS). The raster and metadata tools and
+#    the tools combining several input geometries (geom_insect.py,
+#    geom_union.py, ...) are available via the "tool" requests only.
+#
+# Author: Martin Paces <martin.paces@eox.at>
+#
+#-------------------------------------------------------------------------------
+# Copyright (C) 2016 EOX IT Services GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies of this Software or works derived from this Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#-------------------------------------------------------------------------------
+
+import os
+import sys
+import json
+import traceback
+import SocketServer
+from os import remove
+from importlib import import_module
+from functools import partial
+from os.path import basename, dirname, abspath, join, exists, getmtime, isfile
+from cStringIO import StringIO
+from base64 import b64encode, b64decode
+
+# directories searched for the tools
+TOOL_PATH = [
+    dirname(abspath(__file__)),
+    abspath(join(dirname(abspath(__file__)), "..", "metadata")),
+]
+
+# modules imported in advance by the worker
+PRELOAD = ["numpy", "osgeo.gdal", "osgeo.ogr", "osgeo.osr", "lxml.etree"]
+
+
+def _parse_sr(srs):
+    """ Parse spatial reference of a function parameter. """
+    return import_module("img_geom").parseSR(srs)
+
+
+# geometry functions of the tools called directly by the worker
+#   name: (module, function, {parameter: JSON value converter})
+FUNCTIONS = {
+    "buffer": ("geom_buffer", "buffer_geometry", {"bflen": float}),
+    "segmentize": ("geom_segmentize", "segmentize_geometry", {"sglen": float}),
+    "simplify": ("geom_simplify", "simplify", {
+        "gslen": float, "preserve_topology": bool,
+    }),
+    "ctrans": ("geom_ctrans", "transform_geometry", {
+        "target_sr": _parse_sr,
+        "bounds": lambda bounds: tuple(float(v) for v in bounds),
+        "dlxfix": bool, "dlxwrap": bool,
+    }),
+    "to_wgs84": ("geom_to_wgs84", "to_wgs84", {}),
+    "info": ("geom_info", "geometry_info", {"action": str, "debug": bool}),
+    "force_winding": ("geom_loop_orientation_force", "force_winding", {
+        "is_cw": bool,
+    }),
+    "print_winding": ("geom_loop_orientation_print", "winding_info", {}),
+    "cut_to_mgrs_grid": ("geom_cut_to_mgrs_grid", "cut_to_mgrs_grid", {
+        "buffer": float, "index": str, "debug": bool,
+    }),
+}
+
+
+def usage():
+    """ Print simple usage help. """
+    exename = basename(sys.argv[0])
+    print >>sys.stderr, "USAGE: %s [SOCKET:<path>] [DEBUG]" % exename
+    print >>sys.stderr, (
+        "EXAMPLE: echo '{\"tool\": \"geom_info.py\", \"args\": [\"-\"], "
+        "\"stdin\": \"...\"}' | %s" % exename
+    )
+    print >>sys.stderr, (
+        "EXAMPLE: echo '{\"function\": \"buffer\", \"params\": "
+        "{\"bflen\": 100}, \"stdin\": \"...\", \"format\": \"WKT\"}' | %s"
+        % exename
+    )
+    print >>sys.stderr, "FUNCTIONS: %s" % ", ".join(sorted(FUNCTIONS))
+    print >>sys.stderr, (
+        "NOTE: The \"function\" requests call the tools' geometry functions "
+        "directly.\nThe \"tool\" requests execute the whole tool script "
+        "in the worker process\nwith swapped sys.argv and standard streams. "
+        "The script's globals, the working\ndirectory and the environment "
+        "are reset for each job, but the state of the\nimported modules "
+        "(e.g., the spatial reference and transformation caches)\npersists "
+        "and threads or processes started by a tool are not terminated."
+    )
+
+
+class ToolRunner(object):
+    """ Runner executing the command-line tools in the current process.
+    The compiled tools are cached.
+
+    NOTE: The runner replaces the global sys.stdin, sys.stdout, sys.stderr
+    and sys.argv during the execution and therefore it must not be used
+    from concurrent threads. The working directory and the environment
+    variables are restored after each job. The state of the modules
+    imported by the tools persists between the jobs.
+    """
+
+    def __init__(self, tool_path=None):
+        self.tool_path = list(tool_path or TOOL_PATH)
+        self._cache = {}
+
+    def locate(self, tool):
+        """ Get full path of the tool. """
+        if not tool.endswith(".py"):
+            tool = tool + ".py"
+        if basename(tool) != tool:
+            # explicit path to the tool
+            if isfile(tool):
+                return abspath(tool)
+        else:
+            for path in self.tool_path:
+                if isfile(join(path, tool)):
+                    return join(path, tool)
+        raise ValueError("Tool not found! TOOL=%r" % tool)
+
+    def compile(self, path):
+        """ Get compiled code of the tool. """
+        mtime = getmtime(path)
+        try:
+            code, code_mtime = self._cache[path]
+        except KeyError:
+            code, code_mtime = None, None
+        if code is None or code_mtime != mtime:
+            with open(path) as fin:
+                code = compile(fin.read(), path, "exec")
+            self._cache[path] = (code, mtime)
+        return code
+
+    def __call__(self, tool, args=(), stdin=""):
+        """ Execute tool with the given command-line arguments and standard
+        input. The tool's exit status, standard output and standard error
+        output are returned.
+        """
+        path = self.locate(tool)
+        code = self.compile(path)
+
+        saved = (sys.argv, sys.stdin, sys.stdout, sys.stderr, list(sys.path))
+        saved_cwd, saved_environ = os.getcwd(), dict(os.environ)
+        fout, ferr = StringIO(), StringIO()
+        status = 0
+        try:
+            sys.argv = [path] + [str(arg) for arg in args]
+            sys.stdin, sys.stdout, sys.stderr = StringIO(stdin), fout, ferr
+            sys.path.insert(0, dirname(path))
+            try:
+                exec code in {
+                    "__name__": "__main__",
+                    "__file__": path,
+                    "__builtins__": __builtins__,
+                }
+            except SystemExit as exc:
+                if exc.code is None:
+                    status = 0
+                elif isinstance(exc.code, int):
+                    status = exc.code
+                else:
+                    print >>ferr, exc.code
+                    status = 1
+            except Exception: # pylint: disable=broad-except
+                traceback.print_exc(file=ferr)
+                status = 1
+            finally:
+                sys.stdout.flush()
+        finally:
+            sys.argv, sys.stdin, sys.stdout, sys.stderr, sys.path[:] = saved
+            os.chdir(saved_cwd)
+            os.environ.clear()
+            os.environ.update(saved_environ)
+
+        return status, fout.getvalue(), ferr.getvalue()
+
+
+# default runner
+_RUNNER = ToolRunner()
+
+
+def run_tool(tool, args=(), stdin=""):
+    """ Execute tool in the current process using the default runner.
+    Returns tuple of the exit status, standard and error outputs.
+
+        status, output, errors = run_tool(
+            "geom_simplify.py", ["-", "100", "WKT"], stdin=wkb
+        )
+    """
+    return _RUNNER(tool, args, stdin)
+
+
+def call_function(name, params=None, stdin="", format_="WKB"):
+    """ Apply geometry function of a tool (see FUNCTIONS) to all geometries
+    of the input (a single geometry or a stream of geometries, see
+    img_geom.iterParseGeom) without executing the tool's script.
+    Returns tuple of the exit status, standard and error outputs.
+
+        status, output, errors = call_function(
+            "simplify", {"gslen": 100}, stdin=wkb, format_="WKT"
+        )
+    """
+    try:
+        module, function, converters = FUNCTIONS[name]
+    except KeyError:
+        raise ValueError("Invalid function! FUNCTION=%r" % name)
+    kwargs = {}
+    for key, value in (params or {}).iteritems():
+        if key not in converters:
+            raise ValueError("Invalid parameter! PARAMETER=%r" % key)
+        kwargs[key] = converters[key](value)
+    function = partial(getattr(import_module(module), function), **kwargs)
+    img_geom = import_module("img_geom")
+    dump_geometry = import_module("img_stream").dump_geometry
+    output = []
+    try:
+        for geom in img_geom.iterParseGeom(stdin):
+            result = function(geom)
+            if not isinstance(result, basestring):
+                result = dump_geometry(result, format_)
+            output.append(result)
+    except Exception as exc: # pylint: disable=broad-except
+        return 1, "", "ERROR: %s: %s\n" % (name, exc)
+    return 0, "".join(output), ""
+
+
+def preload(modules=None, debug=False):
+    """ Import the modules in advance. """
+    for module in (PRELOAD if modules is None else modules):
+        try:
+            __import__(module)
+        except ImportError as exc:
+            if debug:
+                print >>sys.stderr, "PRELOAD: %s: %s" % (module, exc)
+
+
+def process_request(line, debug=False):
+    """ Process one JSON-encoded job request and return the JSON-encoded
+    response.
+    """
+    job_id = None
+    try:
+        request = json.loads(line)
+        job_id = request.get("id")
+        if "function" in request:
+            status, output, errors = call_function(
+                request["function"], request.get("params"),
+                b64decode(request.get("stdin", "")),
+                str(request.get("format", "WKB")),
+            )
+        else:
+            status, output, errors = run_tool(
+                request["tool"], request.get("args", ()),
+                b64decode(request.get("stdin", "")),
+            )
+    except Exception as exc: # pylint: disable=broad-except
+        if debug:
+            traceback.print_exc(file=sys.stderr)
+        status, output, errors = 1, "", "ERROR: %s\n" % exc
+    return json.dumps({
+        "id": job_id,
+        "status": status,
+        "stdout": b64encode(output),
+        "stderr": errors.decode("utf-8", "replace"),
+    })
+
+
+def serve_stream(fin, fout, debug=False):
+    """ Serve the job requests read from an input stream. """
+    for line in iter(fin.readline, ""):
+        if not line.strip():
+            continue
+        fout.write(process_request(line, debug) + "\n")
+        fout.flush()
+
+
+def serve_socket(path, debug=False):
+    """ Serve the job requests received via a Unix domain socket.
+    The connections are served sequentially.
+    """
+    class _Handler(SocketServer.StreamRequestHandler):
+        """ connection handler """
+        def handle(self):
+            serve_stream(self.rfile, self.wfile, debug)
+
+    if exists(path):
+        remove(path)
+    server = SocketServer.UnixStreamServer(path, _Handler)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        remove(path)
+
+
+if __name__ == "__main__":
+    SOCKET = None
+    DEBUG = False
+    for arg in sys.argv[1:]:
+        if arg.startswith("SOCKET:"):
+            SOCKET = arg.split(":", 1)[-1]
+        elif arg == "DEBUG":
+            DEBUG = True
+        else:
+            print >>sys.stderr, "ERROR: Invalid option %r!" % arg
+            usage()
+            sys.exit(1)
+
+    preload(debug=DEBUG)
+
+    try:
+        if SOCKET:
+            serve_socket(SOCKET, DEBUG)
+        else:
+            serve_stream(sys.stdin, sys.stdout, DEBUG)
+    except KeyboardInterrupt:
+        pass
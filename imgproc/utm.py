@@ -27,6 +27,8 @@
 # THE SOFTWARE.
 #-------------------------------------------------------------------------------
 import sys
+from math import cos, radians
+import numpy as np
 import img_geom as ig
 
 STEP = 1.0
@@ -95,17 +97,17 @@ def getUTMZoneAsGeom(utmz, south=True, north=True, buffer=0.0, phase=0):
 
     if buffer != 0.0: # buffer requested
         # transform to UTM coordinates
-        geom.TransformTo(ig.OSR_UTM_N[utmz-1])
+        ig.transformTo(geom, ig.OSR_UTM_N[utmz-1])
         # enlarege by given buffer distance
         geom = ig.setSR(geom.Buffer(buffer*1e3), geom.GetSpatialReference())
         # convert back to WGS84
-        geom.TransformTo(ig.OSR_WGS84)
+        ig.transformTo(geom, ig.OSR_WGS84)
         #NOTE: transformation wraps the coordinates arround date-line
         if utmz < 2:
-            trn = ig.Transfomer(lambda p: (p[0] - 360.0*(p[0] > 0), p[1]))
+            trn = ig.ArrayTransformer(lambda x, y: (x - 360.0*(x > 0), y))
             geom = ig.setSR(trn(geom), geom.GetSpatialReference())
         elif utmz > 59:
-            trn = ig.Transfomer(lambda p: (p[0] + 360.0*(p[0] < 0), p[1]))
+            trn = ig.ArrayTransformer(lambda x, y: (x + 360.0*(x < 0), y))
             geom = ig.setSR(trn(geom), geom.GetSpatialReference())
 
     if phase != 0:
@@ -114,6 +116,115 @@ def getUTMZoneAsGeom(utmz, south=True, north=True, buffer=0.0, phase=0):
     return geom
 
 
+def getUTMZoneEnvelope(utmz, south=True, north=True, buffer=0.0):
+    """ Get conservative WGS84 envelope of the UTM zone polygon (see
+    getUTMZoneAsGeom()) as a (lon_min, lon_max, lat_min, lat_max) tuple.
+    The longitude bounds may exceed the [-180, +180] range.
+    Parameters:
+        utmz    [integer] UTM zone (1-60)
+        south   [boolean] set True to include the southern hemisphere
+        north   [boolean] set True to include the northern hemisphere
+        buffer  [float]   buffer in km
+    """
+    if (utmz < 1) or (utmz > 60):
+        raise ValueError("Invalid UTM zone!")
+    lat_min = -80.0 if south else 0.0
+    lat_max = +84.0 if north else 0.0
+    lon_min = (utmz - 1)*6.0 - 180.0
+    lon_max = lon_min + 6.0
+    if north: # northern irregularities
+        lon_min, lon_max = lon_min - 3.0, lon_max + 3.0
+    if buffer > 0.0:
+        # 10% margin for the UTM scale and the ellipsoidal distortions
+        dlat = 1.1 * buffer / 110.0
+        lat_min = max(-90.0, lat_min - dlat)
+        lat_max = min(+90.0, lat_max + dlat)
+        lat_abs = max(abs(lat_min), abs(lat_max))
+        if lat_abs < 89.0:
+            dlon = 1.1 * buffer / (111.0 * cos(radians(lat_abs)))
+        else:
+            dlon = 180.0
+        lon_min, lon_max = lon_min - dlon, lon_max + dlon
+    return (lon_min, lon_max, lat_min, lat_max)
+
+
+class UTMZoneIndex(object):
+    """ Spatial index of the date-line wrapped UTM zone polygons (WGS84).
+
+        The zones are pre-selected by their conservative envelopes and
+        only the polygons of the candidate zones are built (and cached)
+        on demand.
+    """
+
+    def __init__(self, south=True, north=True, buffer=0.0):
+        self.south = south
+        self.north = north
+        self.buffer = buffer
+        self.zones = np.arange(1, 61)
+        self.envelopes = np.array([
+            getUTMZoneEnvelope(zone, south, north, buffer)
+            for zone in self.zones
+        ])
+        self._geoms = {}
+
+    def getZoneGeom(self, utmz):
+        """ Get the date-line wrapped UTM zone polygon. """
+        try:
+            return self._geoms[utmz]
+        except KeyError:
+            geom = getUTMZoneAsGeom(utmz, self.south, self.north, self.buffer)
+            geom = ig.setSR(
+                ig.wrapArroundWGS84(geom), geom.GetSpatialReference()
+            )
+            self._geoms[utmz] = geom
+            return geom
+
+    def candidates(self, geom):
+        """ Get list of the UTM zones whose envelopes intersect
+            the envelope of any part of the WGS84 geometry.
+        """
+        if geom.GetGeometryName() in (
+                "MULTIPOLYGON", "MULTILINESTRING", "MULTIPOINT",
+                "GEOMETRYCOLLECTION"
+            ):
+            parts = [
+                geom.GetGeometryRef(i) for i in xrange(geom.GetGeometryCount())
+            ]
+        else:
+            parts = [geom]
+        x0, x1, y0, y1 = self.envelopes.T
+        mask = np.zeros(len(self.zones), 'bool')
+        for part in parts:
+            if part.IsEmpty():
+                continue
+            xmin, xmax, ymin, ymax = part.GetEnvelope()
+            mask_y = (y0 <= ymax) & (y1 >= ymin)
+            for offset in (-360.0, 0.0, +360.0):
+                mask |= mask_y & (x0 + offset <= xmax) & (x1 + offset >= xmin)
+        return list(self.zones[mask])
+
+    def intersecting(self, geom):
+        """ Iterate (zone, polygon) pairs of the UTM zones intersecting
+            the WGS84 geometry.
+        """
+        for utmz in self.candidates(geom):
+            zone_geom = self.getZoneGeom(utmz)
+            if geom.Intersect(zone_geom):
+                yield utmz, zone_geom
+
+
+_ZONE_INDEX = {}
+
+def getUTMZoneIndex(south=True, north=True, buffer=0.0):
+    """ Get shared UTM zone index. """
+    key = (south, north, buffer)
+    try:
+        return _ZONE_INDEX[key]
+    except KeyError:
+        _ZONE_INDEX[key] = index = UTMZoneIndex(south, north, buffer)
+        return index
+
+
 if __name__ == "__main__":
     # print UTM zone extended by overlap buffer
     # parse UTM zone
@@ -34,6 +34,11 @@ import numpy as np
 from collections import Iterable
 from osgeo import ogr ; ogr.UseExceptions()
 from osgeo import osr ; osr.UseExceptions()
+import img_wkb
+from img_srs import ( # pylint: disable=unused-import
+    createSRFromEPSG, getSRFromEPSG, SRSequence, OSR_WGS84, OSR_UTM_N,
+    OSR_UTM_S, CT_CACHE_SIZE, getCTransformation, transformTo,
+)
 
 _gerexURL = re.compile(r"^http://www.opengis.net/def/crs/epsg/\d+\.?\d*/(\d+)$", re.IGNORECASE)
 _gerexURN = re.compile(r"^urn:ogc:def:crs:epsg:\d*\.?\d*:(\d+)$", re.IGNORECASE)
@@ -41,52 +46,53 @@ _gerexShortCode = re.compile(r"^epsg:(\d+)$", re.IGNORECASE)
 
 #-------------------------------------------------------------------------------
 # coordinate transformation
-RO = ['readonly']
-WO = ['writeonly', 'allocate']
+
+# maximum number of points passed to one OSR TransformPoints() call
+CT_CHUNK_SIZE = 65536
+
+def _asCoordArrays(xarr, yarr):
+    """ Convert the coordinates to float64 arrays of the same shape. """
+    xarr = np.asarray(xarr, dtype='float64')
+    yarr = np.asarray(yarr, dtype='float64')
+    if xarr.shape != yarr.shape:
+        raise ValueError("Array shape mismatch!")
+    return xarr, yarr
 
 class CTransform(object):
 
     def __init__(self, sr_src, sr_dst):
-        self._ct = osr.CoordinateTransformation(sr_src, sr_dst)
+        self._ct = getCTransformation(sr_src, sr_dst)
+
+    def transform(self, xarr, yarr):
+        """ Transform NumPy arrays of coordinates in bulk. """
+        xarr, yarr = _asCoordArrays(xarr, yarr)
+        xsrc, ysrc = xarr.ravel(), yarr.ravel()
+        xdst = np.empty(xsrc.shape, 'float64')
+        ydst = np.empty(ysrc.shape, 'float64')
+        for idx in xrange(0, xsrc.size, CT_CHUNK_SIZE):
+            chunk = slice(idx, idx + CT_CHUNK_SIZE)
+            points = np.asarray(self._ct.TransformPoints(
+                np.column_stack((xsrc[chunk], ysrc[chunk])).tolist()
+            ), 'float64')
+            xdst[chunk], ydst[chunk] = points[:, 0], points[:, 1]
+        return xdst.reshape(xarr.shape), ydst.reshape(yarr.shape)
 
     def __call__(self, xarr, yarr):
-        if hasattr(np, 'nditer') and isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
+        if isinstance(xarr, np.ndarray) and isinstance(yarr, np.ndarray):
             # NumPy array
-            if xarr.shape != yarr.shape:
-                raise ValueError("Array shape mismatch!")
-            itr = np.nditer([xarr, yarr, None, None], [], [RO, RO, WO, WO])
-            for x, y, u, v in itr:
-                u[...], v[...], _ = self._ct.TransformPoint(float(x), float(y))
-            return itr.operands[2], itr.operands[3]
-        elif isinstance(xarr, Iterable) and isinstance(xarr, Iterable):
-            # generic iterables + NumPy prior 'np.nditer'
-            u, v = [], []
-            for x, y in zip(xarr, yarr):
-                _u, _v, _ = self._ct.TransformPoint(float(x), float(y))
-                u.append(_u)
-                v.append(_v)
-            return u, v
+            return self.transform(xarr, yarr)
+        elif isinstance(xarr, Iterable) and isinstance(yarr, Iterable):
+            # generic iterables
+            u, v = self.transform(list(xarr), list(yarr))
+            return u.tolist(), v.tolist()
         else: # assuming scalar values
             return self._ct.TransformPoint(float(xarr), float(yarr))[0:2]
 
 #-------------------------------------------------------------------------------
 # spatial references
 
-# the most common spatial references
-
-def createSRFromEPSG(epsg):
-    """ Create OSR Spatial Reference from EPSG number code"""
-    sr = osr.SpatialReference()
-    sr.ImportFromEPSG(epsg)
-    return sr
-
-OSR_WGS84 = createSRFromEPSG(4326)
-OSR_USP_N = createSRFromEPSG(32661)
-OSR_USP_N = createSRFromEPSG(32761)
-
-OSR_UTM_N = tuple(createSRFromEPSG(32601+i) for i in xrange(60))
-OSR_UTM_S = tuple(createSRFromEPSG(32701+i) for i in xrange(60))
-
+# the shared spatial references and the cached coordinate transformations
+# are defined in img_srs
 
 def setSR(geom, sr):
     """Assing spatial reference to a geometry and return it."""
@@ -99,7 +105,7 @@ def parseSR(srs, debug=False):
     for regex in (_gerexShortCode, _gerexURN, _gerexURL):
         match = regex.match(srs)
         if match is not None:
-            return createSRFromEPSG(int(match.group(1)))
+            return getSRFromEPSG(int(match.group(1)))
     if srs[:7] == "PROJCS[":
         return osr.SpatialReference(srs)
     if srs in (None, "", "NONE"):
@@ -263,11 +269,11 @@ def mapToWGS84(geom):
 
     def fix_dateline(geom, east):
         """fix the +/-180dg ambiguity of the date-line nodes"""
-        def _dlflip_east((x, y, _)): # date-line point flipper
-            return (x+360.0 if x < -179.0 else x, y)
-        def _dlflip_west((x, y, _)): # date-line point flipper
-            return (x-360.0 if x > (+179.0) else x, y)
-        return Transfomer(_dlflip_east if east else _dlflip_west)(geom)
+        def _dlflip_east(x, y): # date-line point flipper
+            return (x + 360.0*(x < -179.0), y)
+        def _dlflip_west(x, y): # date-line point flipper
+            return (x - 360.0*(x > +179.0), y)
+        return ArrayTransformer(_dlflip_east if east else _dlflip_west)(geom)
 
     def transform_polar(north):
         # generate polygon spliting the polar geometry to halves
@@ -299,8 +305,8 @@ def mapToWGS84(geom):
     sr_dst = OSR_WGS84
 
     # coordinate transformation objects
-    ct_fwd = osr.CoordinateTransformation(sr_src, sr_dst)
-    ct_rev = osr.CoordinateTransformation(sr_dst, sr_src)
+    ct_fwd = getCTransformation(sr_src, sr_dst)
+    ct_rev = getCTransformation(sr_dst, sr_src)
 
     # envelope and centroid in the source coordinates
     x0_min, x0_max, y0_min, y0_max = geom.GetEnvelope()
@@ -347,13 +353,13 @@ def mapToWGS84(geom):
 
         # point unwrapping fuctions
         if x_cnt < x_max: # EAST to WEST
-            def _dlflip(p):
-                return (p[0]-360*(p[0] > x_max), p[1])
+            def _dlflip(x, y):
+                return (x - 360.0*(x > x_max), y)
         elif x_cnt > x_min: # WEST to EAST
-            def _dlflip(p):
-                return (p[0]+360*(p[0] < x_min), p[1])
+            def _dlflip(x, y):
+                return (x + 360.0*(x < x_min), y)
 
-        geom = setSR(Transfomer(_dlflip)(geom), OSR_WGS84)
+        geom = setSR(ArrayTransformer(_dlflip)(geom), OSR_WGS84)
 
     # perform proper wrapparround
     return setSR(wrapArroundDateLine(geom, (-180, -90, 180, 90), 1), OSR_WGS84)
@@ -429,10 +435,7 @@ def getRectangle((x_min, y_min, x_max, y_max), step=1.0):
 
 def shiftGeom(g, (dx, dy)):
     """ shift geometry by a given offset """
-    def _shift(p, (dx, dy)):
-        return (p[0]+dx, p[1]+dy)
-    t = Transfomer(_shift)
-    return t(g, (dx, dy))
+    return ArrayTransformer(lambda x, y: (x + dx, y + dy))(g)
 
 #------------------------------------------------------------------------------
 
@@ -491,3 +494,61 @@ class Transfomer(object):
                 m1.AddGeometry(rv)
         return m1
 
+
+class ArrayTransformer(object):
+    """ Vectorised geometry transformer.
+
+        The transformation function receives NumPy arrays of the x and y
+        coordinates of all vertices of the geometry and returns
+        the transformed coordinate arrays:
+
+            f(x, y, *prm, **kw) -> (x, y)
+
+        The geometry is decoded and rebuilt in bulk via the native WKB codec,
+        i.e., the function is called once per geometry (once per member
+        of a geometry collection). The output geometry is always 2D
+        and it has no spatial reference.
+    """
+
+    def __init__(self, f):
+        self.__f = f
+
+    def __call__(self, g0, *prm, **kw):
+        name = g0.GetGeometryName()
+        if name == "LINEARRING":
+            # linear ring has no WKB representation -> wrap it in a polygon
+            poly = ogr.Geometry(ogr.wkbPolygon)
+            poly.AddGeometry(g0)
+            return self(poly, *prm, **kw).GetGeometryRef(0).Clone()
+        elif name == "GEOMETRYCOLLECTION":
+            geom = ogr.Geometry(ogr.wkbGeometryCollection)
+            for i in xrange(g0.GetGeometryCount()):
+                geom.AddGeometry(self(g0.GetGeometryRef(i), *prm, **kw))
+            return geom
+        flat = geomToFlat(g0)
+        coords = np.empty((len(flat.coords), 2))
+        if len(coords) > 0:
+            coords[:, 0], coords[:, 1] = (self.__f)(
+                flat.coords[:, 0], flat.coords[:, 1], *prm, **kw
+            )
+        return flatToGeom(img_wkb.FlatGeometry(
+            flat.type, coords, flat.ring_offsets, flat.part_offsets
+        ))
+
+#------------------------------------------------------------------------------
+
+def geomToFlat(geom):
+    """ Convert OGR geometry to a flat geometry (see img_wkb.FlatGeometry)
+        holding the coordinates in NumPy arrays.
+    """
+    return img_wkb.loads(geom.ExportToWkb(ogr.wkbNDR))
+
+
+def flatToGeom(flat, sr=None):
+    """ Convert flat geometry (see img_wkb.FlatGeometry) to OGR geometry
+        optionally with the given spatial reference.
+    """
+    geom = ogr.CreateGeometryFromWkb(img_wkb.dumps(flat))
+    if sr is not None:
+        geom.AssignSpatialReference(sr)
+    return geom
@@ -0,0 +1 @@
+../imgproc/img_srs.py
\ No newline at end of file
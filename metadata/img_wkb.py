@@ -0,0 +1 @@
+../imgproc/img_wkb.py
\ No newline at end of file